@@ -1,31 +1,32 @@
 import streamlit as st
 import pandas as pd
 import os
-import pickle
-from sklearn.impute import SimpleImputer
+import time
 
 # --- Importações do Projeto ---
 from core.data.io import read_csv_smart
-from core.data.database import (
-    create_database_and_tables,
-    insert_csv_to_sor,
-    run_etl_sor_to_sot,
-    run_etl_sot_to_spec_train,
-    run_etl_for_test_data,
-    load_data,
-    drop_database
+from core.data.database import load_table_stats
+from core.data.stats import compute_table_stats, render_stats_context
+from core.retrieval.index import load_retrieval_index, render_retrieval_context
+from core.features.spec import FeatureSpec
+from core.models.compiled import load_compiled
+from core.models.predict import headline_metrics
+from core.models.registry import ModelRegistry
+from core.models.runs import RunCache
+from core.pipeline import reset_database, run_scoring, run_training
+from core.ui.widgets import (
+    UPLOAD_CACHE_ENTRIES, applicant_inputs, convert_df_to_csv, find_upload, parse_upload, upload_digest
 )
-from core.features.preprocess import make_preprocess_pipeline
-from core.models.train import train_regressor
-from core.models.predict import evaluate_regressor
-from core.explain.coefficients import extract_linear_importances
-from core.chatbot.rules import answer_from_metrics
+from core.chatbot.rules import answer_from_metrics, route_question
+from core.llm.cache import CompletionCache
+from core.llm.client import StreamingChatClient
+from core.llm.history import DEFAULT_TOKEN_BUDGET, build_prompt
 
 # Tenta importar a OpenAI (opcional)
 try:
-    from openai import OpenAI
+    from openai import AsyncOpenAI
 except ImportError:
-    OpenAI = None
+    AsyncOpenAI = None
 
 # --- Configurações da Página ---
 st.set_page_config(page_title="Análise de Empréstimo (IA + RAG)", layout="wide")
@@ -50,40 +51,37 @@ if "importances" not in st.session_state:
 # --- Diretórios ---
 MODEL_DIR = "model"
 os.makedirs(MODEL_DIR, exist_ok=True)
-MODEL_PATH = os.path.join(MODEL_DIR, "regressor_model.pickle")
-IMPUTER_PATH = os.path.join(MODEL_DIR, "num_imputer.pickle")
+REGISTRY = ModelRegistry(os.path.join(MODEL_DIR, "registry"))
+# Execuções do pipeline (ETL e treino) por hash do upload + parâmetros
+RUNS = RunCache(os.path.join(MODEL_DIR, "runs"))
+MODEL_NAME = "regressor"
+# Respostas do LLM em cache (SQLite), por modelo + mensagens + versão do contexto
+LLM_CACHE = CompletionCache(os.path.join(MODEL_DIR, "llm_cache.db"))
+LLM_MODEL = "gpt-4o-mini"
+CSV_CHUNKSIZE = 100_000
 
 # --- Funções Auxiliares ---
-@st.cache_data
-def convert_df_to_csv(df):
-    return df.to_csv(index=False).encode('utf-8')
-
 def get_openai_client():
     key = os.getenv("OPENAI_API_KEY")
-    if not key or OpenAI is None:
+    if not key or AsyncOpenAI is None:
         return None
     try:
-        return OpenAI(api_key=key)
+        return streaming_client(key)
     except Exception:
         return None
 
-def build_rag_context(df: pd.DataFrame, max_chars: int = 4000) -> str:
-    num_cols = df.select_dtypes(include='number').columns
-    cat_cols = df.select_dtypes(include=['object','category','bool']).columns
-    parts = [f"Shape: {df.shape[0]} x {df.shape[1]}"]
-    if len(num_cols) > 0:
-        desc = df[num_cols].describe().T
-        desc['median'] = df[num_cols].median()
-        cols = ['count','mean','median','std','min','max']
-        parts.append("[Resumo Numérico]\n" + desc[cols].to_string())
-    if len(cat_cols) > 0:
-        cat_summary = []
-        for c in cat_cols:
-            vc = df[c].value_counts(dropna=False).head(5)
-            cat_summary.append(f"{c}:\n{vc.to_string()}")
-        parts.append("[Resumo Categórico]\n" + "\n".join(cat_summary))
-    ctx = "\n\n".join(parts)
-    return ctx[:max_chars] + ("\n... (contexto truncado)" if len(ctx) > max_chars else "")
+@st.cache_resource
+def streaming_client(key):
+    # Um cliente por processo: o limite de requisições simultâneas vale para todas as sessões
+    return StreamingChatClient(AsyncOpenAI(api_key=key))
+
+@st.cache_data(max_entries=UPLOAD_CACHE_ENTRIES)
+def upload_stats(digest, _file):
+    """
+    Estatísticas por coluna do CSV, calculadas uma única vez por conteúdo.
+    Leitura em blocos com sketches mergeáveis: o arquivo não precisa caber em memória.
+    """
+    return compute_table_stats(read_csv_smart(_file, chunksize=CSV_CHUNKSIZE))
 
 # --- Layout Lateral ---
 with st.sidebar:
@@ -96,80 +94,46 @@ with st.sidebar:
 
     st.header("⚙️ Ações do Pipeline")
     test_size = st.slider("Tamanho do conjunto de validação", 0.1, 0.4, 0.2, 0.05)
+    incremental = st.checkbox("Carga incremental (delta)", value=False)
+    out_of_core = st.checkbox("Treino em blocos (SGD, fora da memória)", value=False)
+    tune = st.checkbox("Busca de hiperparâmetros (validação cruzada)", value=False)
+    sparse = st.checkbox("Matriz esparsa (CSR float32)", value=False)
 
     # --- Treinar Modelo ---
     if st.button("🚀 Executar Treino"):
-        df_train = next((read_csv_smart(f) for f in uploaded_files if "train" in f.name.lower()), None)
-        if df_train is not None:
+        train_file = find_upload(uploaded_files, "train")
+        if train_file is not None:
             with st.spinner("Treinando modelo..."):
-                create_database_and_tables()
-                insert_csv_to_sor(df_train)
-                run_etl_sor_to_sot()
-                run_etl_sot_to_spec_train()
-                df_spec_train = load_data("spec_emprestimo_train")
-
-                target = "Loan_Status"
-                y = df_spec_train[target].map({'Y': 1, 'N': 0})
-                X = df_spec_train.drop(columns=[target])
-
-                # --- Pré-processamento ---
-                num_cols = ['Dependents', 'ApplicantIncome', 'CoapplicantIncome',
-                            'LoanAmount', 'Loan_Amount_Term', 'Credit_History']
-                X['Dependents'] = X['Dependents'].replace('3+', 3).astype(float)
-                X['Credit_History'] = X['Credit_History'].replace({'N': 0, 'Y': 1}).astype(float)
-
-                num_imputer = SimpleImputer(strategy='mean')
-                X[num_cols] = num_imputer.fit_transform(X[num_cols])
-
-                pre = make_preprocess_pipeline(X)
-                model, X_test, y_test = train_regressor(X, y, pre, test_size=test_size)
-
-                # --- Salva Modelo e Imputador ---
-                with open(MODEL_PATH, "wb") as f:
-                    pickle.dump(model, f)
-                with open(IMPUTER_PATH, "wb") as f:
-                    pickle.dump(num_imputer, f)
-
-                # --- Métricas ---
-                st.session_state.metrics = evaluate_regressor(model, X_test, y_test)
-                st.session_state.importances = extract_linear_importances(model, X.columns, pre)
+                # ETL e treino pulados quando o cache de execuções já tem a saída do estágio
+                fit_run, reused = run_training(
+                    REGISTRY, RUNS, MODEL_NAME, train_file, upload_digest(train_file),
+                    test_size=test_size, incremental=incremental, out_of_core=out_of_core, tune=tune, sparse=sparse,
+                )
+                st.session_state.metrics = fit_run["metrics"]
+                st.session_state.importances = pd.DataFrame(fit_run["importances"])
+                st.session_state.model_version = fit_run["version"]
                 st.session_state.model_trained = True
                 st.session_state.predictions_made = False
 
             st.success("✅ Modelo treinado e salvo com sucesso!")
+            if reused:
+                st.caption(f"Reaproveitado do cache de execuções: {', '.join(reused)}.")
         else:
             st.warning("⚠️ Arquivo 'Train.csv' não encontrado.")
 
     # --- Fazer Previsão ---
     if st.button("📊 Carregar Modelo e Fazer Previsões"):
-        if not os.path.exists(MODEL_PATH) or not os.path.exists(IMPUTER_PATH):
-            st.error("Nenhum modelo ou imputador encontrado! Treine primeiro.")
+        model_meta = REGISTRY.get(MODEL_NAME, st.session_state.get("model_version"))
+        if model_meta is None:
+            st.error("Nenhum modelo ou FeatureSpec encontrado! Treine primeiro.")
         else:
-            df_test = next((read_csv_smart(f) for f in uploaded_files if "test" in f.name.lower()), None)
-            if df_test is not None:
+            test_file = find_upload(uploaded_files, "test")
+            if test_file is not None:
                 with st.spinner("Gerando previsões..."):
-                    run_etl_for_test_data(df_test)
-                    df_spec_predict = load_data("spec_emprestimo_predict")
-
-                    with open(IMPUTER_PATH, "rb") as f:
-                        num_imputer = pickle.load(f)
-                    num_cols = ['Dependents', 'ApplicantIncome', 'CoapplicantIncome',
-                                'LoanAmount', 'Loan_Amount_Term', 'Credit_History']
-
-                    df_spec_predict['Dependents'] = df_spec_predict['Dependents'].replace('3+', 3).astype(float)
-                    df_spec_predict['Credit_History'] = df_spec_predict['Credit_History'].replace({'N': 0, 'Y': 1}).astype(float)
-                    df_spec_predict[num_cols] = num_imputer.transform(df_spec_predict[num_cols])
-
-                    with open(MODEL_PATH, 'rb') as f:
-                        model = pickle.load(f)
-
-                    ids = df_spec_predict[['Loan_ID']]
-                    X_predict = df_spec_predict.drop(columns=['Loan_ID'])
-                    predictions = model.predict(X_predict)
-
-                    result_df = ids.copy()
-                    result_df['Loan_Status'] = predictions
+                    df_test = parse_upload(upload_digest(test_file), test_file)
+                    report, result_df = run_scoring(REGISTRY, MODEL_NAME, model_meta["version"], df_test)
                     st.session_state.prediction_df = result_df
+                    st.session_state.scoring_report = report
                     st.session_state.predictions_made = True
                 st.success("✅ Previsões geradas com sucesso!")
             else:
@@ -177,14 +141,21 @@ with st.sidebar:
 
     # --- Limpar Tudo ---
     if st.button("🧹 Limpar Tudo"):
-        drop_database()
-        for path in [MODEL_PATH, IMPUTER_PATH]:
-            if os.path.exists(path):
-                os.remove(path)
+        reset_database()
+        REGISTRY.clear()
+        RUNS.clear()
+        LLM_CACHE.clear()
         st.session_state.clear()
         st.info("Tudo foi limpo!")
         st.rerun()
 
+    # Tempo até o primeiro token das respostas do LLM neste processo
+    llm_client = get_openai_client()
+    if llm_client is not None and "ttft_p50" in llm_client.latency_stats():
+        latency = llm_client.latency_stats()
+        st.caption(f"LLM · 1º token p50 {latency['ttft_p50']:.2f}s · p95 {latency['ttft_p95']:.2f}s "
+                   f"({latency['requests']} respostas)")
+
 # --- Abas ---
 tab_train, tab_predict, tab_chat, tab_rag = st.tabs(
     ["📊 Resultados do Treino", "🚀 Previsões", "💬 Chat com o Modelo", "💬 Chat RAG"]
@@ -207,10 +178,31 @@ with tab_predict:
     if not st.session_state.predictions_made:
         st.info("Faça uma previsão para ver os resultados.")
     else:
+        report = st.session_state.scoring_report
+        st.caption(f"Execução {report['run_id'][:8]} · modelo {report['model_version']} · "
+                   f"{report['rows']} linhas em {report['seconds']}s ({report['rows_per_sec']} linhas/s)")
         st.dataframe(st.session_state.prediction_df)
-        csv_data = convert_df_to_csv(st.session_state.prediction_df)
+        csv_data = convert_df_to_csv(report["run_id"], st.session_state.prediction_df)
         st.download_button("💾 Baixar CSV", csv_data, "submission.csv", "text/csv")
 
+    # --- Um solicitante: modelo compilado (arrays NumPy), sem DataFrame nem Pipeline a cada clique ---
+    st.subheader("🎯 Simular um Solicitante")
+    model_meta = REGISTRY.get(MODEL_NAME, st.session_state.get("model_version")) if st.session_state.model_trained else None
+    scorer = load_compiled(model_meta) if model_meta is not None else None
+    if scorer is None:
+        st.info("Treine um modelo linear para simular um solicitante.")
+    else:
+        spec = FeatureSpec.from_dict(model_meta["feature_spec"])
+        with st.form("applicant"):
+            applicant = applicant_inputs(scorer, spec)
+            submitted = st.form_submit_button("Pontuar")
+        if submitted:
+            start = time.perf_counter()
+            score = scorer.score(spec.transform_row(applicant))
+            elapsed_us = (time.perf_counter() - start) * 1e6
+            st.metric("Score previsto (Loan_Status)", f"{score:.3f}")
+            st.caption(f"Modelo {model_meta['version']} · pontuado em {elapsed_us:.0f} µs")
+
 # --- Aba Chat Modelo ---
 with tab_chat:
     st.header("🤖 Chat com o Modelo (IA + Métricas)")
@@ -223,53 +215,72 @@ with tab_chat:
 
         if prompt := st.chat_input("Pergunte algo sobre o modelo ou as variáveis..."):
             st.session_state.chat_messages.append({"role": "user", "content": prompt})
-            client = get_openai_client()
-
-            if client:
-                try:
-                    response = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        temperature=0.4,
-                        messages=[
-                            {"role": "system", "content": "Você é um assistente que explica modelos de previsão de empréstimos."},
-                            {"role": "system", "content": f"Métricas: {st.session_state.metrics}\nImportâncias: {st.session_state.importances.head(10).to_dict()}"},
-                            {"role": "user", "content": prompt}
-                        ]
+            with st.chat_message("user"):
+                st.markdown(prompt)
+            # Caminho rápido: perguntas de rotina respondidas direto dos artefatos, sem rede
+            reply = route_question(prompt, "Regressão", st.session_state.metrics, st.session_state.importances)
+            client = get_openai_client() if reply is None else None
+
+            with st.chat_message("assistant"):
+                if reply is not None:
+                    st.markdown(reply)
+                elif client:
+                    try:
+                        # Resposta exibida à medida que chega; mesma pergunta (ou quase) sobre
+                        # a mesma versão do modelo sai do cache
+                        reply = st.write_stream(LLM_CACHE.stream(
+                            client, LLM_MODEL,
+                            messages=[
+                                {"role": "system", "content": "Você é um assistente que explica modelos de previsão de empréstimos."},
+                                {"role": "system", "content": f"Métricas: {headline_metrics(st.session_state.metrics)}\nImportâncias: {st.session_state.importances.head(10).to_dict()}"},
+                                {"role": "user", "content": prompt}
+                            ],
+                            context_version=st.session_state.get("model_version", ""),
+                            question=prompt,
+                            near_duplicates=True,
+                            temperature=0.4,
+                        ))
+                    except Exception as e:
+                        reply = f"⚠️ Erro ao acessar OpenAI: {e}"
+                        st.markdown(reply)
+                else:
+                    reply = answer_from_metrics(
+                        question=prompt,
+                        task="Regressão",
+                        metrics_df_or_dict=st.session_state.metrics,
+                        importances_df=st.session_state.importances
                     )
-                    reply = response.choices[0].message.content
-                except Exception as e:
-                    reply = f"⚠️ Erro ao acessar OpenAI: {e}"
-            else:
-                reply = answer_from_metrics(
-                    question=prompt,
-                    task="Regressão",
-                    metrics_df_or_dict=st.session_state.metrics,
-                    importances_df=st.session_state.importances
-                )
+                    st.markdown(reply)
 
             st.session_state.chat_messages.append({"role": "assistant", "content": reply})
-            with st.chat_message("assistant"):
-                st.markdown(reply)
             st.rerun()
 
 # --- Aba Chat RAG ---
 with tab_rag:
     st.header("🤖 Chat RAG — Perguntas com Contexto da Base")
 
-    # Carrega o dataset base (preferência: Train.csv)
-    df_rag = next((read_csv_smart(f) for f in uploaded_files if "train" in f.name.lower()), None)
-    if df_rag is None and os.path.exists("emprestimos.csv"):
-        df_rag = pd.read_csv("emprestimos.csv")
-
-    if df_rag is None:
+    # Contexto: estatísticas da SPEC de treino mantidas pelo ETL (tabela spec_stats);
+    # sem base processada, resume o Train.csv enviado (ou emprestimos.csv), em cache pelo hash do conteúdo
+    rag_stats = load_table_stats("spec_emprestimo_train")
+    rag_version = str(rag_stats["version"].iloc[0]) if not rag_stats.empty else ""
+    if rag_stats.empty:
+        rag_source = find_upload(uploaded_files, "train")
+        if rag_source is None and os.path.exists("emprestimos.csv"):
+            rag_source = "emprestimos.csv"
+        if rag_source is not None:
+            rag_version = upload_digest(rag_source)
+            rag_stats = upload_stats(rag_version, rag_source)
+
+    if rag_stats.empty:
         st.info("Faça upload de Train.csv ou coloque emprestimos.csv para usar o chat RAG.")
     else:
         # Parâmetros de exibição
         max_ctx_chars = st.slider("Limite do contexto (caracteres)", 500, 12000, 4000, step=500)
+        token_budget = st.slider("Orçamento do prompt (tokens)", 1000, 16000, DEFAULT_TOKEN_BUDGET, step=500)
         show_rag_ctx = st.checkbox("Mostrar contexto RAG", value=False)
 
         # Constrói o contexto (resumo estatístico + amostra de dados)
-        rag_context = build_rag_context(df_rag, max_chars=max_ctx_chars)
+        rag_context = render_stats_context(rag_stats, max_chars=max_ctx_chars)
         if show_rag_ctx:
             with st.expander("📊 Ver contexto RAG (resumo da base)"):
                 st.text(rag_context)
@@ -291,35 +302,58 @@ with tab_rag:
         if rag_prompt:
             # Adiciona mensagem do usuário ao histórico
             st.session_state.rag_messages.append({"role": "user", "content": rag_prompt})
-
-            # Monta as mensagens para o modelo OpenAI
-            messages = [
-                {"role": "system", "content": "Você é um analista financeiro. Use o contexto fornecido para responder perguntas sobre os dados."},
-                {"role": "user", "content": f"Contexto (resumo da base):\n{rag_context}"}
-            ]
-            # Inclui o histórico (user + assistant)
-            for m in st.session_state.rag_messages:
-                if m["role"] in ("user", "assistant"):
-                    messages.append(m)
-
-            # Faz a chamada à API
-            client = get_openai_client()
-            if client:
-                try:
-                    response = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=messages,
-                        temperature=0.3
-                    )
-                    reply = response.choices[0].message.content
-                except Exception as e:
-                    reply = f"⚠️ Erro ao acessar a OpenAI: {e}"
+            with st.chat_message("user"):
+                st.markdown(rag_prompt)
+
+            # Com a base indexada, o contexto é a busca local pela pergunta (linhas e agregados
+            # relevantes), que não cresce com a base; sem índice, usa o resumo estatístico
+            rag_index = load_retrieval_index()
+            if rag_index is not None:
+                context_label = "busca na base"
+                question_context = render_retrieval_context(rag_index.search(rag_prompt), max_chars=max_ctx_chars)
             else:
-                # fallback local se não houver OpenAI
-                reply = f"(Sem OpenAI configurado)\nPergunta: {rag_prompt}\n\nContexto:\n{rag_context[:1000]}..."
-
-            # Armazena e exibe resposta
-            st.session_state.rag_messages.append({"role": "assistant", "content": reply})
+                context_label = "resumo da base"
+                question_context = rag_context
+
+            # Monta as mensagens para o modelo OpenAI: contexto + histórico dentro do orçamento de tokens
+            # (mensagens recentes na íntegra, as antigas num resumo incremental guardado na sessão)
+            messages = build_prompt(
+                [
+                    {"role": "system", "content": "Você é um analista financeiro. Use o contexto fornecido para responder perguntas sobre os dados."},
+                    {"role": "user", "content": f"Contexto ({context_label}):\n{question_context}"}
+                ],
+                st.session_state.rag_messages,
+                st.session_state.setdefault("rag_memory", {}),
+                budget=token_budget,
+            )
+
+            # Com modelo treinado, perguntas sobre ele (métricas, importâncias, pipeline, LGPD)
+            # não precisam do LLM; as demais seguem para a API (resposta em streaming)
+            reply = None
+            if st.session_state.model_trained:
+                reply = route_question(rag_prompt, "Regressão", st.session_state.metrics, st.session_state.importances)
+            client = get_openai_client() if reply is None else None
             with st.chat_message("assistant"):
-                st.markdown(reply)
+                if reply is not None:
+                    st.markdown(reply)
+                elif client:
+                    try:
+                        # Cache escopado pela versão dos dados: um novo ETL invalida as respostas
+                        reply = st.write_stream(LLM_CACHE.stream(
+                            client, LLM_MODEL, messages,
+                            context_version=rag_version,
+                            question=rag_prompt,
+                            near_duplicates=True,
+                            temperature=0.3,
+                        ))
+                    except Exception as e:
+                        reply = f"⚠️ Erro ao acessar a OpenAI: {e}"
+                        st.markdown(reply)
+                else:
+                    # fallback local se não houver OpenAI
+                    reply = f"(Sem OpenAI configurado)\nPergunta: {rag_prompt}\n\nContexto ({context_label}):\n{question_context[:2000]}"
+                    st.markdown(reply)
+
+            # Armazena resposta
+            st.session_state.rag_messages.append({"role": "assistant", "content": reply})
             st.rerun()
@@ -1,10 +1,84 @@
-def answer_from_metrics(question: str, task: str, metrics_df_or_dict, importances_df):
+from core.models.predict import headline_metrics
+from core.retrieval.index import tokenize
+
+# Palavras-chave por intenção, já sem acentos. Cada chave casa com o início de um token
+# ("importan" casa com "importantes"); com espaço no fim, só com o token inteiro ("oi ").
+# Frases com várias palavras casam com tokens consecutivos. O peso soma na pontuação da intenção.
+INTENT_KEYWORDS = {
+    "importances": {
+        "importan": 2, "influen": 2, "coeficient": 2, "pesam": 2, "relevan": 1,
+        "variave": 1, "feature": 1,
+    },
+    "metrics": {
+        "metric": 2, "score": 2, "acur": 2, "rmse": 3, "r2 ": 3, "auc ": 3, "f1 ": 3,
+        "desempenho": 2, "performance": 2, "erro medio": 2, "erro do modelo": 2,
+    },
+    "pipeline": {
+        "como foi treinado": 3, "pipeline": 2, "pre processa": 2, "preprocess": 2, "one hot": 2,
+        "imputa": 2, "padroniza": 1, "escalon": 1, "treinament": 1, "como o modelo funciona": 3,
+    },
+    "lgpd": {
+        "lgpd": 3, "privacid": 2, "dados sensive": 2, "dados pessoa": 2, "consentiment": 2,
+        "anonimiz": 2,
+    },
+    "greeting": {
+        "oi ": 2, "ola ": 2, "bom dia": 2, "boa tarde": 2, "boa noite": 2, "obrigad": 2, "valeu ": 2,
+    },
+}
+# Em empate vence a que aparece primeiro (mesma precedência das regras antigas)
+INTENT_PRIORITY = list(INTENT_KEYWORDS)
+# Pontuação mínima para responder sem o LLM (uma palavra genérica como "variáveis" não basta)
+ROUTER_MIN_SCORE = 2
+
+
+class IntentRouter:
     """
-    Responde a perguntas do usuário com base nas métricas e importâncias do modelo.
+    Roteador de intenções compilado: as palavras-chave viram uma trie de caracteres e a pergunta
+    normalizada (minúsculas, sem acentos nem pontuação) é percorrida uma única vez, a partir do
+    início de cada token. Custo proporcional ao tamanho da pergunta, independente do número de regras.
     """
-    q = (question or "").lower()
 
-    if "importan" in q or "importân" in q or "variáve" in q or "features" in q:
+    def __init__(self, keywords=INTENT_KEYWORDS):
+        self.trie = {}
+        for intent, words in keywords.items():
+            for word, weight in words.items():
+                node = self.trie
+                for ch in word:
+                    node = node.setdefault(ch, {})
+                node.setdefault(None, []).append((intent, weight, word))
+
+    def scores(self, question) -> dict:
+        text = " ".join(tokenize(question or "")) + " "
+        scores, seen = {}, set()
+        starts = [0] + [i + 1 for i, ch in enumerate(text) if ch == " "]
+        for start in starts[:-1]:
+            node = self.trie
+            for ch in text[start:]:
+                node = node.get(ch)
+                if node is None:
+                    break
+                for intent, weight, word in node.get(None, ()):
+                    # Cada palavra-chave conta uma vez por pergunta
+                    if word not in seen:
+                        seen.add(word)
+                        scores[intent] = scores.get(intent, 0) + weight
+        return scores
+
+    def route(self, question, min_score=ROUTER_MIN_SCORE):
+        """Intenção com maior pontuação (None se nenhuma atingir `min_score`)."""
+        scores = self.scores(question)
+        if not scores:
+            return None
+        best = max(scores, key=lambda intent: (scores[intent], -INTENT_PRIORITY.index(intent)))
+        return best if scores[best] >= min_score else None
+
+
+ROUTER = IntentRouter()
+
+
+def answer_intent(intent: str, task: str, metrics_df_or_dict, importances_df):
+    """Resposta pronta para a intenção, a partir dos artefatos do modelo (sem LLM)."""
+    if intent == "importances":
         if importances_df is not None and not importances_df.empty:
             top = importances_df.head(5)[["feature"]].to_dict("records")
             top_str = ", ".join([t["feature"] for t in top])
@@ -12,13 +86,38 @@ def answer_from_metrics(question: str, task: str, metrics_df_or_dict, importance
         else:
             return "Ainda não tenho dados de importância das variáveis para mostrar."
 
-    if "métric" in q or "score" in q or "acur" in q or "rmse" in q:
-        return f"As métricas do modelo de {task} são: {metrics_df_or_dict}"
+    if intent == "metrics":
+        return f"As métricas do modelo de {task} são: {headline_metrics(metrics_df_or_dict)}"
 
-    if "como foi treinado" in q or "pipeline" in q:
+    if intent == "pipeline":
         return "O pipeline aplica imputação de dados faltantes, one-hot encoding para variáveis categóricas e padronização (scaling). Depois, treina um modelo de Regressão Linear."
 
-    if "privacid" in q or "lgpd" in q:
+    if intent == "lgpd":
         return "Para este projeto, evitamos dados sensíveis. Em um ambiente de produção, garantiríamos consentimento expresso, minimização de dados e auditoria."
 
-    return "Desculpe, não entendi. Você pode perguntar sobre 'variáveis importantes' ou 'métricas'."
\ No newline at end of file
+    if intent == "greeting":
+        return "Olá! Pergunte sobre as métricas, as variáveis mais importantes, o pipeline de treino ou privacidade (LGPD)."
+
+    return None
+
+
+def route_question(question: str, task: str, metrics_df_or_dict, importances_df, min_score=ROUTER_MIN_SCORE):
+    """
+    Caminho rápido antes do LLM: responde direto perguntas de rotina (métricas, importâncias,
+    pipeline, LGPD). Devolve None quando a pergunta deve seguir para o LLM.
+    """
+    intent = ROUTER.route(question, min_score)
+    if intent is None:
+        return None
+    return answer_intent(intent, task, metrics_df_or_dict, importances_df)
+
+
+def answer_from_metrics(question: str, task: str, metrics_df_or_dict, importances_df):
+    """
+    Responde a perguntas do usuário com base nas métricas e importâncias do modelo.
+    """
+    # Sem LLM: aceita qualquer palavra-chave (inclusive as genéricas)
+    reply = route_question(question, task, metrics_df_or_dict, importances_df, min_score=1)
+    if reply is not None:
+        return reply
+    return "Desculpe, não entendi. Você pode perguntar sobre 'variáveis importantes' ou 'métricas'."
@@ -0,0 +1,129 @@
+import itertools
+import os
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+
+# Ajustes aplicados a toda conexão do pool
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",        # leitores não bloqueiam o escritor
+    "PRAGMA synchronous = NORMAL",      # seguro com WAL e bem mais rápido que FULL
+    "PRAGMA cache_size = -65536",       # 64 MiB de cache de páginas
+    "PRAGMA mmap_size = 268435456",     # 256 MiB de I/O mapeado em memória
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+# Quantidade de comandos preparados reaproveitados por conexão
+STATEMENT_CACHE_SIZE = 256
+
+
+def apply_pragmas(conn):
+    """(Re)aplica os ajustes padrão do pool à conexão."""
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+
+
+def open_connection(db_path):
+    """Abre uma nova conexão ajustada (fora do pool)."""
+    conn = sqlite3.connect(
+        db_path, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE
+    )
+    apply_pragmas(conn)
+    return conn
+
+
+def _is_open(conn):
+    try:
+        conn.total_changes
+        return True
+    except sqlite3.ProgrammingError:
+        return False
+
+
+class _ThreadConnections(dict):
+    """Conexões de uma thread (por arquivo de banco); dict com suporte a weakref."""
+
+
+class ConnectionPool:
+    """
+    Pool com uma conexão reutilizável por thread e por arquivo de banco.
+    Cada sessão do Streamlit roda em sua própria thread, então várias sessões leem em paralelo (WAL).
+    O Streamlit cria uma thread nova a cada rerun: quando a thread termina, o thread-local é
+    liberado e um finalizador fecha as conexões dela.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._tokens = itertools.count()
+        # caminho -> {token da thread: conexão}
+        self._opened = {}
+
+    def get(self, db_path):
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = _ThreadConnections()
+            conns.token = next(self._tokens)
+            weakref.finalize(conns, self._release, conns.token)
+        conn = conns.get(db_path)
+        if conn is None or not _is_open(conn):
+            conn = conns[db_path] = open_connection(db_path)
+            with self._lock:
+                self._opened.setdefault(db_path, {})[conns.token] = conn
+        return conn
+
+    def _release(self, token):
+        # Chamado quando a thread dona das conexões termina
+        with self._lock:
+            conns = [by_thread.pop(token) for by_thread in self._opened.values() if token in by_thread]
+        for conn in conns:
+            conn.close()
+
+    def open_count(self, db_path=None):
+        with self._lock:
+            paths = [db_path] if db_path else list(self._opened)
+            return sum(len(self._opened.get(path, {})) for path in paths)
+
+    def close_all(self, db_path=None):
+        """Fecha as conexões de todas as threads (ex.: antes de apagar o arquivo do banco)."""
+        with self._lock:
+            paths = [db_path] if db_path else list(self._opened)
+            conns = [conn for path in paths for conn in self._opened.pop(path, {}).values()]
+        for conn in conns:
+            conn.close()
+
+
+POOL = ConnectionPool()
+
+
+def get_connection(db_path):
+    """Conexão do pool para a thread atual (não deve ser fechada pelo chamador)."""
+    return POOL.get(db_path)
+
+
+@contextmanager
+def pooled_connection(db_path):
+    """Context manager: confirma a transação ao sair ou desfaz em caso de erro."""
+    conn = POOL.get(db_path)
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def close_connections(db_path=None):
+    POOL.close_all(db_path)
+
+
+def remove_database_files(db_path):
+    """Fecha as conexões e apaga o banco junto com os arquivos auxiliares do WAL."""
+    close_connections(db_path)
+    removed = False
+    for path in (db_path, db_path + "-wal", db_path + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+            removed = removed or path == db_path
+    return removed
@@ -1,6 +1,18 @@
-import sqlite3
 import pandas as pd
 import os
+import sqlite3
+import time
+
+from core.data.connection import apply_pragmas, get_connection, pooled_connection, remove_database_files
+from core.data.schema import BULK_PRAGMAS, bulk_insert, coerce_to_schema
+from core.data.snapshot import (
+    SNAPSHOT_TABLES, append_snapshot, read_snapshot, remove_snapshots, snapshot_path, write_snapshot
+)
+from core.data.stats import (
+    STATS_TABLES, compute_table_stats, read_table_stats, remove_sketches,
+    stats_from_sketch, write_table_sketch, write_table_stats
+)
+from core.data.fingerprint import append_fingerprint, dataframe_fingerprint
 
 # Pega o caminho absoluto do diretório onde este arquivo (database.py) está.
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -9,101 +21,333 @@ APP_DIR = os.path.dirname(os.path.dirname(CURRENT_DIR))
 DB_NAME = os.path.join(APP_DIR, "emprestimo.db")  # <-- ALTERADO
 
 def connect_db():
-    """Cria uma conexão com o banco de dados SQLite."""
-    return sqlite3.connect(DB_NAME)
+    """Retorna a conexão do pool (uma por thread, reutilizada) com o banco de dados SQLite."""
+    return get_connection(DB_NAME)
+
+def db_session():
+    """Context manager sobre a conexão do pool: commit ao sair, rollback em caso de erro."""
+    return pooled_connection(DB_NAME)
+
+# Migrações aplicadas em ordem; a versão do esquema fica em PRAGMA user_version
+MIGRATIONS = [
+    "sor_emprestimo.sql",
+    "sot_emprestimo.sql",
+    "spec_emprestimo_train.sql",
+    "spec_emprestimo_predict.sql",
+    "migration_incremental.sql",
+    "migration_table_versions.sql",
+    "migration_predictions.sql",
+    "migration_spec_stats.sql",
+    "migration_table_versions_delta.sql",
+]
+
+def _read_sql(filename):
+    filepath = os.path.join(SQL_DIR, filename)
+    if not os.path.exists(filepath):
+        raise FileNotFoundError(f"Arquivo SQL não encontrado: {filepath}")
+    with open(filepath, 'r') as f:
+        return f.read()
 
 def execute_sql_from_file(filepath):
     """Lê um arquivo .sql e executa os comandos."""
-    conn = connect_db()
-    cursor = conn.cursor()
     with open(filepath, 'r') as f:
         sql_script = f.read()
-    cursor.executescript(sql_script)
-    conn.commit()
-    conn.close()
+    with db_session() as conn:
+        conn.executescript(sql_script)
+
+def execute_sql_transaction(conn, *scripts):
+    """Executa vários scripts SQL em uma única transação."""
+    try:
+        conn.executescript("BEGIN;\n" + "\n".join(scripts) + "\nCOMMIT;")
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+
+def migrate_database():
+    """Aplica as migrações pendentes (idempotente; não apaga dados existentes)."""
+    with db_session() as conn:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, filename in enumerate(MIGRATIONS[version:], start=version + 1):
+            execute_sql_transaction(conn, _read_sql(filename), f"PRAGMA user_version = {number};")
 
 def create_database_and_tables():
-    """Cria o banco de dados e todas as tabelas a partir dos arquivos .sql."""
-    if os.path.exists(DB_NAME):
-        os.remove(DB_NAME)
-    
-    sql_files = [
-        os.path.join(SQL_DIR, "sor_emprestimo.sql"),       # <-- ALTERADO
-        os.path.join(SQL_DIR, "sot_emprestimo.sql"),       # <-- ALTERADO
-        os.path.join(SQL_DIR, "spec_emprestimo_train.sql"),# <-- ALTERADO
-        os.path.join(SQL_DIR, "spec_emprestimo_predict.sql") # <-- ALTERADO
-    ]
-    for filepath in sql_files:
-        if not os.path.exists(filepath):
-            raise FileNotFoundError(f"Arquivo SQL não encontrado: {filepath}")
-        execute_sql_from_file(filepath)
+    """Recria o banco de dados do zero e aplica todas as migrações."""
+    drop_database()
+    migrate_database()
     print("Banco de dados e tabelas criados com sucesso.")
 
-def insert_csv_to_sor(df):
-    """Insere os dados de um DataFrame na tabela SOR."""
-    conn = connect_db()
-    # A tabela SOR é genérica, então apenas inserimos os dados de treino nela
-    df_train = df[df['Loan_Status'].notna()]  # <-- ALTERADO
-    df_train.to_sql("sor_emprestimo", conn, if_exists="replace", index=False)  # <-- ALTERADO
-    conn.close()
-    print("Dados de treino inseridos na tabela SOR.")
-
-def run_etl_sor_to_sot():
-    """Executa a transformação de SOR para SOT para os dados de treino."""
-    conn = connect_db()
-    df = pd.read_sql_query("SELECT * FROM sor_emprestimo", conn)  # <-- ALTERADO
+def insert_csv_to_sor(df, incremental: bool = False):
+    """
+    Insere os dados na tabela SOR tipada (criada por sql/sor_emprestimo.sql).
+    Aceita um DataFrame ou um iterável de DataFrames (ex.: read_csv_smart(..., chunksize=N)).
+    Os blocos são convertidos para os tipos do DDL e inseridos em uma única transação.
+    Loan_IDs repetidos são descartados; com incremental=True as linhas são anexadas às existentes.
+    """
+    chunks = [df] if isinstance(df, pd.DataFrame) else df
+    total = 0
+    with db_session() as conn:
+        for pragma in BULK_PRAGMAS:
+            conn.execute(pragma)
+        try:
+            if not incremental:
+                conn.execute("DELETE FROM sor_emprestimo")
+            for chunk in chunks:
+                # A tabela SOR é genérica, então apenas inserimos os dados de treino nela
+                df_train = coerce_to_schema(chunk[chunk['Loan_Status'].notna()], "sor_emprestimo")
+                total += bulk_insert(conn, "sor_emprestimo", df_train, or_ignore=True)
+            conn.commit()
+        finally:
+            # A conexão é reutilizada pelo pool: volta aos ajustes padrão
+            apply_pragmas(conn)
+    print(f"Dados de treino inseridos na tabela SOR ({total} linhas novas).")
+
+def _set_watermark(conn, layer, source):
+    conn.execute(
+        f"UPDATE etl_watermark SET last_rowid = (SELECT COALESCE(MAX(rowid), 0) FROM {source}) WHERE layer = ?",
+        (layer,),
+    )
+
+def get_table_version(table_name: str):
+    """Versão atual dos dados da tabela (None se nunca foi publicada pelo ETL)."""
+    try:
+        with db_session() as conn:
+            row = conn.execute(
+                "SELECT version FROM table_versions WHERE table_name = ?", (table_name,)
+            ).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+def get_table_hash(table_name: str):
+    """Hash do conteúdo da versão publicada da tabela, gravado na publicação (None se não houver)."""
+    try:
+        with db_session() as conn:
+            row = conn.execute(
+                "SELECT data_hash FROM table_versions WHERE table_name = ?", (table_name,)
+            ).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+def _publish_delta(conn, table_name, version, base):
+    """
+    Publica só as linhas anexadas desde a versão `base` (rowid > last_rowid): parte nova no snapshot,
+    sketch da base atualizado com o delta para `spec_stats` e hash encadeado.
+    Retorna (last_rowid, data_hash), ou None se faltar algum artefato da base.
+    """
+    base_version, base_rowid, base_hash = base
+    if base_rowid is None or base_hash is None:
+        return None
+    df = pd.read_sql_query(
+        f"SELECT rowid AS _rowid, * FROM {_quote(table_name)} WHERE rowid > ? ORDER BY rowid",
+        conn, params=(base_rowid,),
+    )
+    last_rowid = int(df["_rowid"].max()) if len(df) else base_rowid
+    df = df.drop(columns="_rowid")
+    # Sem snapshot da base (ex.: sem pyarrow) a nova versão também fica sem e load_data lê do SQLite
+    base_snapshot = snapshot_path(DB_NAME, table_name, base_version)
+    if (table_name in SNAPSHOT_TABLES and os.path.isdir(base_snapshot)
+            and append_snapshot(DB_NAME, table_name, base_version, version, df) is None):
+        return None
+    if table_name in STATS_TABLES:
+        sketch = write_table_sketch(df, DB_NAME, table_name, version, base_version=base_version)
+        if sketch is None:
+            return None
+        write_table_stats(conn, table_name, version, stats_from_sketch(sketch))
+    return last_rowid, append_fingerprint(base_hash, df)
+
+def publish_table(table_name: str, append: bool = False):
+    """
+    Registra uma nova versão dos dados, materializa o snapshot colunar da tabela
+    e recalcula suas estatísticas em `spec_stats` (a tabela é lida uma única vez).
+    Com append=True (carga incremental), só as linhas novas são lidas e somadas aos artefatos
+    da versão anterior.
+    Sem os artefatos da versão anterior, a tabela é publicada por inteiro.
+    """
+    version = time.time_ns()
+    with db_session() as conn:
+        base = conn.execute(
+            "SELECT version, last_rowid, data_hash FROM table_versions WHERE table_name = ?", (table_name,)
+        ).fetchone() if append else None
+        published = _publish_delta(conn, table_name, version, base) if base else None
+        if published is None:
+            df = pd.read_sql_query(f"SELECT rowid AS _rowid, * FROM {_quote(table_name)}", conn)
+            last_rowid = int(df["_rowid"].max()) if len(df) else 0
+            df = df.drop(columns="_rowid")
+            if table_name in SNAPSHOT_TABLES:
+                write_snapshot(conn, DB_NAME, table_name, version, df=df)
+            if table_name in STATS_TABLES:
+                write_table_stats(conn, table_name, version, compute_table_stats(df))
+                # Sketch guardado para que a próxima carga incremental só some o delta
+                write_table_sketch(df, DB_NAME, table_name, version)
+            published = last_rowid, dataframe_fingerprint(df)
+        conn.execute(
+            "INSERT OR REPLACE INTO table_versions (table_name, version, last_rowid, data_hash) VALUES (?, ?, ?, ?)",
+            (table_name, version, *published),
+        )
+    return version
+
+def load_table_stats(table_name: str) -> pd.DataFrame:
+    """Estatísticas por coluna da versão publicada da tabela (vazio se ainda não houver)."""
+    if not os.path.exists(DB_NAME):
+        return pd.DataFrame()
+    try:
+        with db_session() as conn:
+            return read_table_stats(conn, table_name)
+    except sqlite3.OperationalError:
+        return pd.DataFrame()
+
+def run_etl_sor_to_sot(mode: str = "pandas"):
+    """
+    Executa a transformação de SOR para SOT para os dados de treino.
+    mode="sql" executa imputação e padronização com INSERT ... SELECT dentro do SQLite.
+    """
+    if mode == "sql":
+        with db_session() as conn:
+            execute_sql_transaction(
+                conn,
+                "DELETE FROM sot_emprestimo;",
+                "UPDATE etl_watermark SET last_rowid = 0 WHERE layer = 'sot_emprestimo';",
+                _read_sql("etl_fill_values.sql"),
+                _read_sql("etl_sor_to_sot.sql"),
+            )
+        print("ETL de SOR para SOT (treino, SQL) concluído.")
+        return
+    with db_session() as conn:
+        df = pd.read_sql_query("SELECT * FROM sor_emprestimo", conn)  # <-- ALTERADO
 
     # Lógica de Transformação (ajustada para empréstimo)
-    df['LoanAmount'].fillna(df['LoanAmount'].median(), inplace=True)
-    df['Loan_Amount_Term'].fillna(df['Loan_Amount_Term'].mode()[0], inplace=True)
-    df['Credit_History'].fillna(df['Credit_History'].mode()[0], inplace=True)
+    fill_values = {
+        'LoanAmount': df['LoanAmount'].median(),
+        'Loan_Amount_Term': df['Loan_Amount_Term'].mode()[0],
+        'Credit_History': df['Credit_History'].mode()[0],
+    }
+    for col, value in fill_values.items():
+        df[col] = df[col].fillna(value)
 
     # Padronização de categorias
     df['Gender'] = df['Gender'].replace({'Male': 'M', 'Female': 'F'})
     df['Married'] = df['Married'].replace({'Yes': 'Y', 'No': 'N'})
 
-    # Inserir na SOT (sem Loan_ID)
-    df_sot = df.drop(columns=['Loan_ID'], errors='ignore')
-    df_sot.to_sql("sot_emprestimo", conn, if_exists="replace", index=False)  # <-- ALTERADO
-    conn.close()
+    # Inserir na SOT (sem Loan_ID), mantendo a tabela tipada do DDL
+    df_sot = coerce_to_schema(df.drop(columns=['Loan_ID'], errors='ignore'), "sot_emprestimo")
+    with db_session() as conn:
+        conn.execute("DELETE FROM sot_emprestimo")
+        bulk_insert(conn, "sot_emprestimo", df_sot)
+        conn.execute("DELETE FROM etl_fill_values")
+        conn.executemany("INSERT INTO etl_fill_values (column_name, value) VALUES (?, ?)",
+                         [(col, float(value)) for col, value in fill_values.items()])
+        _set_watermark(conn, "sot_emprestimo", "sor_emprestimo")
     print("ETL de SOR para SOT (treino) concluído.")
 
-def run_etl_sot_to_spec_train():
-    """Copia dados da SOT para a SPEC de treino."""
-    conn = connect_db()
-    df = pd.read_sql_query("SELECT * FROM sot_emprestimo", conn)  # <-- ALTERADO
-    df.to_sql("spec_emprestimo_train", conn, if_exists="replace", index=False)  # <-- ALTERADO
-    conn.close()
+def run_etl_sot_to_spec_train(mode: str = "pandas"):
+    """Copia dados da SOT para a SPEC de treino (mode="sql" copia com INSERT ... SELECT)."""
+    if mode == "sql":
+        with db_session() as conn:
+            execute_sql_transaction(
+                conn,
+                "DELETE FROM spec_emprestimo_train;",
+                "UPDATE etl_watermark SET last_rowid = 0 WHERE layer = 'spec_emprestimo_train';",
+                _read_sql("etl_sot_to_spec_train.sql"),
+            )
+        publish_table("spec_emprestimo_train")
+        print("ETL de SOT para SPEC (treino, SQL) concluído.")
+        return
+    with db_session() as conn:
+        df = pd.read_sql_query("SELECT * FROM sot_emprestimo", conn)  # <-- ALTERADO
+        conn.execute("DELETE FROM spec_emprestimo_train")
+        bulk_insert(conn, "spec_emprestimo_train", coerce_to_schema(df, "spec_emprestimo_train"))
+        _set_watermark(conn, "spec_emprestimo_train", "sot_emprestimo")
+    publish_table("spec_emprestimo_train")
     print("ETL de SOT para SPEC (treino) concluído.")
 
-def run_etl_for_test_data(df_test):
-    """Executa o ETL para os dados de teste e salva na SPEC de previsão."""
-    conn = connect_db()
-    
+def run_etl_incremental():
+    """
+    Move pela SOT e pela SPEC de treino somente as linhas após as marcas d'água.
+    O custo é proporcional ao delta; os valores de imputação da última carga completa são reutilizados.
+    """
+    with db_session() as conn:
+        scripts = []
+        if conn.execute("SELECT COUNT(*) FROM etl_fill_values").fetchone()[0] == 0:
+            # Primeira carga do banco: aprende a imputação com o próprio delta
+            scripts.append(_read_sql("etl_fill_values.sql"))
+        scripts += [_read_sql("etl_sor_to_sot.sql"), _read_sql("etl_sot_to_spec_train.sql")]
+        execute_sql_transaction(conn, *scripts)
+    publish_table("spec_emprestimo_train", append=True)
+    print("ETL incremental (SOR -> SOT -> SPEC) concluído.")
+
+def run_etl_for_test_data(df_test, spec):
+    """
+    Executa o ETL para os dados de teste e salva na SPEC de previsão.
+    `spec` é o FeatureSpec ajustado no treino (qualquer objeto com `transform(df)`).
+    O DataFrame de entrada não é alterado.
+    """
     # Aplica as mesmas transformações dos dados de treino
-    df_test['LoanAmount'].fillna(df_test['LoanAmount'].median(), inplace=True)
-    df_test['Loan_Amount_Term'].fillna(df_test['Loan_Amount_Term'].mode()[0], inplace=True)
-    df_test['Credit_History'].fillna(df_test['Credit_History'].mode()[0], inplace=True)
+    df_test = spec.transform(df_test)
 
-    df_test['Gender'] = df_test['Gender'].replace({'Male': 'M', 'Female': 'F'})
-    df_test['Married'] = df_test['Married'].replace({'Yes': 'Y', 'No': 'N'})
-    
     # Mantém os identificadores para o resultado final
     df_spec = df_test[['Loan_ID'] + [col for col in df_test.columns if col != 'Loan_ID']]
     
-    df_spec.to_sql("spec_emprestimo_predict", conn, if_exists="replace", index=False)  # <-- ALTERADO
-    conn.close()
+    with db_session() as conn:
+        df_spec.to_sql("spec_emprestimo_predict", conn, if_exists="replace", index=False)  # <-- ALTERADO
+    publish_table("spec_emprestimo_predict")
     print("ETL para dados de teste concluído e salvo na SPEC (previsão).")
 
-def load_data(table_name: str):
-    """Carrega dados de qualquer tabela especificada."""
+def _quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+def _table_columns(conn, table_name):
+    """Colunas da tabela; também valida o nome (evita SQL injection via nome de tabela)."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type IN ('table', 'view') AND name = ?", (table_name,)
+    ).fetchone()
+    if not exists:
+        raise ValueError(f"Tabela não encontrada: {table_name}")
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({_quote(table_name)})")]
+
+def load_data(table_name: str, columns=None, where: str = None, params=(),
+              limit: int = None, sample: int = None, chunksize: int = None):
+    """
+    Carrega dados de qualquer tabela especificada.
+
+    columns: lista de colunas (projeção); `rowid` também é aceito.
+    where: expressão SQL com placeholders `?`, cujos valores vão em `params`.
+    limit: número máximo de linhas; sample: número de linhas sorteadas aleatoriamente.
+    chunksize: se informado, retorna um iterador de DataFrames em vez de um único DataFrame.
+
+    Sem filtro nem amostra, o snapshot colunar da versão atual é lido via memory-map.
+    """
+    if limit is not None and sample is not None:
+        raise ValueError("Use limit ou sample, não ambos.")
     conn = connect_db()
-    df = pd.read_sql_query(f"SELECT * FROM {table_name}", conn)
-    conn.close()
-    return df
+    table_columns = _table_columns(conn, table_name)
+    if columns is not None:
+        unknown = [c for c in columns if c not in table_columns and c != "rowid"]
+        if unknown:
+            raise ValueError(f"Colunas inexistentes em {table_name}: {unknown}")
+
+    if where is None and sample is None and "rowid" not in (columns or ()):
+        df = read_snapshot(DB_NAME, table_name, get_table_version(table_name),
+                           columns=columns, limit=limit, chunksize=chunksize)
+        if df is not None:
+            return df
+
+    select = ", ".join(_quote(c) if c != "rowid" else "rowid" for c in columns) if columns else "*"
+    query = f"SELECT {select} FROM {_quote(table_name)}"
+    if where:
+        query += f" WHERE {where}"
+    if sample is not None:
+        query += " ORDER BY RANDOM() LIMIT ?"
+        params = tuple(params) + (int(sample),)
+    elif limit is not None:
+        query += " LIMIT ?"
+        params = tuple(params) + (int(limit),)
+    return pd.read_sql_query(query, conn, params=tuple(params), chunksize=chunksize)
 
 def drop_database():
-    """Remove o arquivo do banco de dados."""
-    if os.path.exists(DB_NAME):
-        os.remove(DB_NAME)
+    """Fecha as conexões do pool e remove o arquivo do banco de dados (e os arquivos do WAL)."""
+    remove_snapshots(DB_NAME)
+    remove_sketches(DB_NAME)
+    if remove_database_files(DB_NAME):
         print(f"Banco de dados '{DB_NAME}' removido.")
@@ -0,0 +1,30 @@
+import hashlib
+
+import pandas as pd
+
+
+def dataframe_fingerprint(df: pd.DataFrame) -> str:
+    """Hash do conteúdo do DataFrame (colunas + valores), usado como `data_hash`."""
+    return frames_fingerprint([df])
+
+
+def frames_fingerprint(frames) -> str:
+    """
+    Como dataframe_fingerprint, para uma sequência de blocos (ex.: load_data(..., chunksize=N)).
+    O hash é por linha, então o resultado é o mesmo da tabela inteira em um único DataFrame.
+    """
+    digest = None
+    for df in frames:
+        if digest is None:
+            digest = hashlib.sha256(",".join(map(str, df.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16] if digest is not None else None
+
+
+def append_fingerprint(base_hash, df: pd.DataFrame) -> str:
+    """
+    Hash da tabela após anexar `df` a uma tabela com hash `base_hash` (encadeado, custo do delta).
+    Difere do hash da tabela inteira: a mesma base carregada por outro caminho só gera uma
+    chave nova no cache, nunca um acerto errado.
+    """
+    return hashlib.sha256(f"{base_hash}+{dataframe_fingerprint(df)}".encode()).hexdigest()[:16]
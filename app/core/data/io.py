@@ -1,4 +1,108 @@
+import csv
+import hashlib
+import io
 import pandas as pd
 
-def read_csv_smart(file_or_path):
-    return pd.read_csv(file_or_path, sep=None, engine="python")
+# Tamanho da amostra (bytes) usada para detectar separador e encoding
+SNIFF_BYTES = 64 * 1024
+DEFAULT_CHUNKSIZE = 100_000
+ENCODINGS = ("utf-8-sig", "utf-8", "latin-1")
+
+
+def _is_path(file_or_path):
+    return isinstance(file_or_path, (str, bytes)) or hasattr(file_or_path, "__fspath__")
+
+
+def _read_head(file_or_path, n_bytes=SNIFF_BYTES):
+    """Lê os primeiros bytes do arquivo sem consumir o buffer (file-like)."""
+    if _is_path(file_or_path):
+        with open(file_or_path, "rb") as f:
+            return f.read(n_bytes)
+    pos = file_or_path.tell()
+    head = file_or_path.read(n_bytes)
+    file_or_path.seek(pos)
+    if isinstance(head, str):
+        head = head.encode("utf-8")
+    return head
+
+
+def sniff_csv(file_or_path, n_bytes=SNIFF_BYTES):
+    """Detecta separador e encoding a partir de uma pequena amostra do início do arquivo."""
+    head = _read_head(file_or_path, n_bytes)
+    encoding, text = "utf-8", head.decode("utf-8", errors="replace")
+    for enc in ENCODINGS:
+        try:
+            text = head.decode(enc)
+            encoding = enc
+            break
+        except UnicodeDecodeError as e:
+            # A amostra pode cortar um caractere multibyte no final
+            if e.start >= len(head) - 4:
+                text = head[:e.start].decode(enc, errors="ignore")
+                encoding = enc
+                break
+    # Descarta a última linha (possivelmente incompleta) antes de detectar o separador
+    sample = text.rsplit("\n", 1)[0] if "\n" in text else text
+    try:
+        sep = csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+    except csv.Error:
+        sep = ","
+    return sep, encoding
+
+
+def _rewind(file_or_path, encoding):
+    """Volta o buffer ao início; buffers de texto já estão decodificados."""
+    if _is_path(file_or_path):
+        return encoding
+    file_or_path.seek(0)
+    return None if isinstance(file_or_path, io.TextIOBase) else encoding
+
+
+def file_digest(file_or_path, block_size=1 << 20):
+    """
+    Hash SHA-256 do conteúdo do arquivo (caminho ou file-like), sem consumir o buffer.
+    Usado como chave de cache: o mesmo conteúdo gera a mesma chave, qualquer que seja o nome.
+    """
+    digest = hashlib.sha256()
+    if _is_path(file_or_path):
+        with open(file_or_path, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                digest.update(block)
+    elif hasattr(file_or_path, "getbuffer"):
+        # BytesIO/UploadedFile: hash direto sobre a memória, sem cópia
+        digest.update(file_or_path.getbuffer())
+    else:
+        pos = file_or_path.tell()
+        file_or_path.seek(0)
+        for block in iter(lambda: file_or_path.read(block_size), b""):
+            digest.update(block.encode("utf-8") if isinstance(block, str) else block)
+        file_or_path.seek(pos)
+    return digest.hexdigest()
+
+
+def iter_csv_chunks(file_or_path, chunksize=DEFAULT_CHUNKSIZE, **kwargs):
+    """
+    Lê o CSV em blocos de `chunksize` linhas com o parser C.
+    O separador e o encoding são detectados uma única vez; o pico de memória fica em torno de um bloco.
+    """
+    sep, encoding = sniff_csv(file_or_path)
+    encoding = _rewind(file_or_path, encoding)
+    reader = pd.read_csv(
+        file_or_path, sep=sep, encoding=encoding, engine="c",
+        chunksize=chunksize, low_memory=True, **kwargs
+    )
+    with reader:
+        for chunk in reader:
+            yield chunk
+
+
+def read_csv_smart(file_or_path, chunksize=None):
+    """
+    Lê um CSV detectando separador e encoding.
+    Com `chunksize`, retorna um gerador de DataFrames (modo streaming) em vez do arquivo inteiro.
+    """
+    if chunksize:
+        return iter_csv_chunks(file_or_path, chunksize=chunksize)
+    sep, encoding = sniff_csv(file_or_path)
+    encoding = _rewind(file_or_path, encoding)
+    return pd.read_csv(file_or_path, sep=sep, encoding=encoding, engine="c")
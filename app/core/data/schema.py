@@ -0,0 +1,107 @@
+import os
+import re
+import numpy as np
+import pandas as pd
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+SQL_DIR = os.path.join(CURRENT_DIR, "sql")
+
+_CREATE_RE = re.compile(r"CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s*\((.*?)\);", re.IGNORECASE | re.DOTALL)
+_INT32 = np.iinfo(np.int32)
+
+# Pragmas aplicados somente durante a carga em massa
+BULK_PRAGMAS = (
+    "PRAGMA synchronous = OFF",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",
+)
+
+
+def read_table_schema(table_name: str):
+    """Lê os tipos das colunas a partir do arquivo DDL `sql/<tabela>.sql`."""
+    filepath = os.path.join(SQL_DIR, f"{table_name}.sql")
+    if not os.path.exists(filepath):
+        raise FileNotFoundError(f"Arquivo SQL não encontrado: {filepath}")
+    with open(filepath, "r") as f:
+        sql = re.sub(r"--[^\n]*", "", f.read())
+    for name, body in _CREATE_RE.findall(sql):
+        if name != table_name:
+            continue
+        schema = {}
+        for line in body.split(","):
+            parts = line.split()
+            if len(parts) >= 2:
+                schema[parts[0]] = parts[1].upper()
+        return schema
+    raise ValueError(f"CREATE TABLE {table_name} não encontrado em {filepath}")
+
+
+def _downcast_real(s: pd.Series) -> pd.Series:
+    """Converte para int32/float32 somente quando não há perda de informação."""
+    s = pd.to_numeric(s, errors="coerce")
+    values = s.to_numpy(dtype=np.float64, na_value=np.nan)
+    notna = ~np.isnan(values)
+    if notna.all() and np.all(np.mod(values, 1) == 0) and \
+            (values.size == 0 or (values.min() >= _INT32.min and values.max() <= _INT32.max)):
+        return s.astype(np.int32)
+    as32 = values.astype(np.float32)
+    if np.array_equal(as32[notna].astype(np.float64), values[notna]):
+        return pd.Series(as32, index=s.index, name=s.name)
+    return s.astype(np.float64)
+
+
+def _to_text(s: pd.Series) -> pd.Series:
+    """Converte para categoria de strings (ex.: Dependents lido como número em um bloco)."""
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        values = s.dropna()
+        if (values % 1 == 0).all():
+            s = s.astype("Int64")
+        s = s.astype("string")
+    return s.astype("category")
+
+
+def coerce_to_schema(df: pd.DataFrame, table_name: str) -> pd.DataFrame:
+    """
+    Ajusta o DataFrame às colunas e tipos do DDL da tabela.
+    TEXT vira category; REAL/INTEGER é reduzido para int32/float32 quando seguro.
+    """
+    schema = read_table_schema(table_name)
+    out = {}
+    for col, sql_type in schema.items():
+        s = df[col] if col in df.columns else pd.Series(np.nan, index=df.index, name=col)
+        if sql_type in ("REAL", "INTEGER", "NUMERIC"):
+            out[col] = _downcast_real(s)
+        else:
+            out[col] = _to_text(s)
+    return pd.DataFrame(out, index=df.index)
+
+
+def _column_values(s: pd.Series):
+    """Lista de valores Python com None no lugar de ausentes (formato aceito pelo sqlite3)."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        # Indexa as categorias pelos códigos; o código -1 (ausente) cai no None final
+        lookup = np.append(np.asarray(s.cat.categories, dtype=object), None)
+        return lookup[s.cat.codes.to_numpy()].tolist()
+    values = s.to_numpy(dtype=object)
+    values[s.isna().to_numpy()] = None
+    return values.tolist()
+
+
+def _iter_rows(df: pd.DataFrame):
+    return zip(*(_column_values(df[c]) for c in df.columns))
+
+
+def bulk_insert(conn, table_name: str, df: pd.DataFrame, or_ignore: bool = False):
+    """
+    Insere o DataFrame com executemany (o chamador controla a transação).
+    Com or_ignore=True, linhas que violam índices únicos são descartadas.
+    """
+    if df.empty:
+        return 0
+    cols = ", ".join(f'"{c}"' for c in df.columns)
+    placeholders = ", ".join("?" for _ in df.columns)
+    verb = "INSERT OR IGNORE" if or_ignore else "INSERT"
+    cursor = conn.executemany(
+        f'{verb} INTO "{table_name}" ({cols}) VALUES ({placeholders})', _iter_rows(df)
+    )
+    return cursor.rowcount
@@ -0,0 +1,331 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+# Parâmetros padrão dos sketches
+QUANTILE_K = 200          # precisão do sketch de quantis (erro de rank ~ 1/k)
+HEAVY_HITTERS_CAPACITY = 64  # contadores por coluna categórica (exato até esse número de categorias)
+
+
+def to_float_matrix(df: pd.DataFrame, columns) -> np.ndarray:
+    """Converte as colunas para uma matriz float64 (uma única coerção; não numéricos viram NaN)."""
+    return np.column_stack([
+        pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan) for c in columns
+    ]) if len(columns) else np.empty((len(df), 0))
+
+
+class MomentSketch:
+    """
+    Contagem, média, M2 (soma dos quadrados dos desvios), mínimo e máximo por coluna.
+    Cada bloco é resumido de forma vetorizada e combinado pela fórmula de Welford/Chan,
+    que também une sketches calculados em paralelo.
+    """
+
+    def __init__(self, n_columns):
+        self.n = np.zeros(n_columns)
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)
+        self.min = np.full(n_columns, np.inf)
+        self.max = np.full(n_columns, -np.inf)
+
+    def update(self, X: np.ndarray):
+        if not len(X):
+            return self
+        valid = ~np.isnan(X)
+        n = valid.sum(axis=0).astype(np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(n > 0, np.nansum(X, axis=0) / np.maximum(n, 1), 0.0)
+            m2 = np.nansum((X - mean) ** 2, axis=0)
+        other = MomentSketch(X.shape[1])
+        other.n, other.mean, other.m2 = n, mean, m2
+        other.min = np.where(valid, X, np.inf).min(axis=0)
+        other.max = np.where(valid, X, -np.inf).max(axis=0)
+        return self.merge(other)
+
+    def merge(self, other):
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ratio = np.where(n > 0, other.n / np.maximum(n, 1), 0.0)
+        self.mean = self.mean + delta * ratio
+        self.m2 = self.m2 + other.m2 + delta ** 2 * self.n * ratio
+        self.n = n
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        return self
+
+    @property
+    def std(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.n > 1, np.sqrt(self.m2 / np.maximum(self.n - 1, 1)), np.nan)
+
+
+class QuantileSketch:
+    """
+    Sketch KLL de quantis para uma coluna: memória O(k) independente do número de linhas.
+    Enquanto couber em k itens o resultado é exato; depois o erro de rank fica em torno de 1/k.
+    """
+
+    def __init__(self, k=QUANTILE_K, seed=None):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.n = 0
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # Número ímpar: um item fica no nível atual
+                keep, items = (items[:1], items[1:]) if len(items) % 2 else (items[:0], items)
+                promoted = items[self._rng.integers(2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.n += len(values)
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        """Quantil(is) aproximado(s); interpolação linear como pandas quando o sketch é exato."""
+        items = np.concatenate(self.levels)
+        if not len(items):
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        if len(self.levels) == 1:
+            return np.quantile(items, q)
+        weights = np.concatenate([np.full(len(lv), 2.0 ** h) for h, lv in enumerate(self.levels)])
+        order = np.argsort(items)
+        items, weights = items[order], weights[order]
+        cum = np.cumsum(weights) - weights / 2
+        return np.interp(np.asarray(q) * weights.sum(), cum, items)
+
+
+class HeavyHitters:
+    """
+    Misra-Gries para as categorias mais frequentes (nulos contam como categoria None).
+    Exato enquanto houver até `capacity` categorias distintas; acima disso cada contagem
+    é subestimada em no máximo n / (capacity + 1).
+    """
+
+    def __init__(self, capacity=HEAVY_HITTERS_CAPACITY):
+        self.capacity = capacity
+        self.counts = {}
+        self.n = 0
+
+    def _add(self, counts):
+        for value, count in counts.items():
+            self.counts[value] = self.counts.get(value, 0) + count
+        if len(self.counts) > self.capacity:
+            # Desconta a (capacity+1)-ésima maior contagem de todas e descarta as que zeram
+            cut = sorted(self.counts.values(), reverse=True)[self.capacity]
+            self.counts = {v: c - cut for v, c in self.counts.items() if c > cut}
+
+    def update(self, series: pd.Series):
+        counts = series.value_counts(dropna=False)
+        self.n += int(counts.sum())
+        self._add({(None if pd.isna(v) else v): int(c) for v, c in counts.items()})
+        return self
+
+    def merge(self, other):
+        self.n += other.n
+        self._add(other.counts)
+        return self
+
+    def top(self, k):
+        return sorted(self.counts.items(), key=lambda item: -item[1])[:k]
+
+
+class CoMomentSketch:
+    """
+    Co-momentos entre pares de colunas numéricas (apenas linhas com ambos os valores presentes),
+    acumulados com produtos de matrizes por bloco e combinados pela fórmula de Chan.
+    correlation() reproduz DataFrame.corr() (Pearson, pairwise-complete).
+    """
+
+    def __init__(self, n_columns):
+        shape = (n_columns, n_columns)
+        self.n = np.zeros(shape)
+        self.mean_a = np.zeros(shape)
+        self.mean_b = np.zeros(shape)
+        self.m2_a = np.zeros(shape)
+        self.m2_b = np.zeros(shape)
+        self.c = np.zeros(shape)
+
+    def update(self, X: np.ndarray):
+        valid = ~np.isnan(X)
+        M = valid.astype(np.float64)
+        # Desloca pela média do bloco para reduzir cancelamento numérico nas somas
+        counts = M.sum(axis=0)
+        shift = np.where(valid, X, 0.0).sum(axis=0) / np.maximum(counts, 1)
+        Z = np.where(valid, X - shift, 0.0)
+        other = CoMomentSketch(X.shape[1])
+        if valid.all():
+            # Sem ausentes: um único produto de matrizes
+            n = np.full((X.shape[1], X.shape[1]), float(len(X)))
+            sa = sb = np.zeros_like(n)
+            sq = np.broadcast_to((Z * Z).sum(axis=0), n.shape)
+            m2_a, m2_b, c = sq.T, sq, Z.T @ Z
+        else:
+            # M.T @ Z e M.T @ Z² são as transpostas de Z.T @ M e Z².T @ M
+            n = M.T @ M
+            sa = Z.T @ M
+            sb = sa.T
+            sq = (Z * Z).T @ M
+            m2_a, m2_b, c = sq, sq.T, Z.T @ Z
+        with np.errstate(invalid="ignore", divide="ignore"):
+            inv = np.where(n > 0, 1.0 / np.maximum(n, 1), 0.0)
+            other.n = n
+            other.mean_a = sa * inv + shift[:, None]
+            other.mean_b = sb * inv + shift[None, :]
+            other.m2_a = m2_a - sa * sa * inv
+            other.m2_b = m2_b - sb * sb * inv
+            other.c = c - sa * sb * inv
+        return self.merge(other)
+
+    def merge(self, other):
+        n = self.n + other.n
+        with np.errstate(invalid="ignore", divide="ignore"):
+            factor = np.where(n > 0, self.n * other.n / np.maximum(n, 1), 0.0)
+            ratio = np.where(n > 0, other.n / np.maximum(n, 1), 0.0)
+        delta_a = other.mean_a - self.mean_a
+        delta_b = other.mean_b - self.mean_b
+        self.m2_a = self.m2_a + other.m2_a + delta_a ** 2 * factor
+        self.m2_b = self.m2_b + other.m2_b + delta_b ** 2 * factor
+        self.c = self.c + other.c + delta_a * delta_b * factor
+        self.mean_a = self.mean_a + delta_a * ratio
+        self.mean_b = self.mean_b + delta_b * ratio
+        self.n = n
+        return self
+
+    def correlation(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = self.c / np.sqrt(self.m2_a * self.m2_b)
+        corr[self.n < 2] = np.nan
+        return corr
+
+
+class TableSketch:
+    """
+    Resumo de uma tabela em uma única passada: momentos, quantis e co-momentos das colunas
+    numéricas e categorias mais frequentes das demais. Os tipos são definidos pelo primeiro bloco
+    (ou por `numeric_columns`); sketches de blocos diferentes podem ser unidos com merge().
+    """
+
+    def __init__(self, columns=None, numeric_columns=None, quantile_k=QUANTILE_K,
+                 capacity=HEAVY_HITTERS_CAPACITY, seed=None):
+        self.quantile_k = quantile_k
+        self.capacity = capacity
+        self.seed = seed
+        self.columns = None
+        self.n_rows = 0
+        if columns is not None:
+            self._init_columns(list(columns), numeric_columns)
+
+    def _init_columns(self, columns, numeric_columns):
+        self.columns = columns
+        numeric = set(numeric_columns)
+        self.numeric_columns = [c for c in columns if c in numeric]
+        self.categorical_columns = [c for c in columns if c not in numeric]
+        self.moments = MomentSketch(len(self.numeric_columns))
+        self.comoments = CoMomentSketch(len(self.numeric_columns))
+        self.quantiles = [QuantileSketch(self.quantile_k, self.seed) for _ in self.numeric_columns]
+        self.heavy_hitters = [HeavyHitters(self.capacity) for _ in self.categorical_columns]
+        self.counts = {c: 0 for c in self.categorical_columns}
+
+    def update(self, df: pd.DataFrame):
+        if self.columns is None:
+            self._init_columns(list(df.columns), df.select_dtypes(include="number").columns)
+        X = to_float_matrix(df, self.numeric_columns)
+        self.moments.update(X)
+        self.comoments.update(X)
+        for j, sketch in enumerate(self.quantiles):
+            sketch.update(X[:, j])
+        for col, sketch in zip(self.categorical_columns, self.heavy_hitters):
+            sketch.update(df[col])
+            self.counts[col] += int(df[col].count())
+        self.n_rows += len(df)
+        return self
+
+    def merge(self, other):
+        if other.columns is None:
+            return self
+        if self.columns is None:
+            self._init_columns(other.columns, other.numeric_columns)
+        self.moments.merge(other.moments)
+        self.comoments.merge(other.comoments)
+        for mine, theirs in zip(self.quantiles, other.quantiles):
+            mine.merge(theirs)
+        for mine, theirs in zip(self.heavy_hitters, other.heavy_hitters):
+            mine.merge(theirs)
+        for col, count in other.counts.items():
+            self.counts[col] += count
+        self.n_rows += other.n_rows
+        return self
+
+    def correlation(self) -> pd.DataFrame:
+        return pd.DataFrame(self.comoments.correlation(), index=self.numeric_columns, columns=self.numeric_columns)
+
+
+def _sketch_chunk(chunk, columns, numeric_columns, options):
+    return TableSketch(columns, numeric_columns, **options).update(chunk)
+
+
+def sketch_chunks(chunks, n_workers=1, **options) -> TableSketch:
+    """
+    Resume um iterador de DataFrames em uma única passada (no máximo 2 blocos por processo em memória).
+    Com n_workers > 1 os blocos são resumidos em paralelo e os sketches parciais unidos com merge().
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    chunks = iter(chunks)
+    first = next(chunks, None)
+    sketch = TableSketch(**options)
+    if first is None:
+        return sketch
+    sketch.update(first)
+    if n_workers == 1:
+        for chunk in chunks:
+            sketch.update(chunk)
+        return sketch
+
+    columns, numeric_columns = sketch.columns, sketch.numeric_columns
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        in_flight = set()
+        exhausted = False
+        while not exhausted or in_flight:
+            while not exhausted and len(in_flight) < 2 * n_workers:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                    break
+                in_flight.add(pool.submit(_sketch_chunk, chunk, columns, numeric_columns, options))
+            if not in_flight:
+                break
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                sketch.merge(future.result())
+    return sketch
@@ -0,0 +1,149 @@
+import glob
+import os
+import shutil
+import pandas as pd
+
+# pyarrow é opcional: sem ele, load_data sempre lê do SQLite
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+# Tabelas materializadas em snapshot colunar após cada escrita do ETL
+SNAPSHOT_TABLES = ("spec_emprestimo_train", "spec_emprestimo_predict")
+# Partes acumuladas por cargas incrementais antes de o snapshot ser compactado em uma só
+SNAPSHOT_MAX_PARTS = 16
+
+
+def snapshot_dir(db_path):
+    """Diretório dos snapshots, ao lado do arquivo do banco."""
+    return db_path + ".snapshots"
+
+
+def snapshot_path(db_path, table_name, version):
+    """Diretório da versão: uma ou mais partes Arrow (`part-NNNNN.arrow`), lidas em ordem."""
+    return os.path.join(snapshot_dir(db_path), f"{table_name}-v{version}")
+
+
+def _parts(path):
+    return sorted(glob.glob(os.path.join(path, "part-*.arrow")))
+
+
+def _part_path(path, number):
+    return os.path.join(path, f"part-{number:05d}.arrow")
+
+
+def _write_part(table, path):
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _read_parts(path):
+    tables = []
+    for part in _parts(path):
+        with pa.memory_map(part, "r") as source:
+            tables.append(pa.ipc.open_file(source).read_all())
+    return pa.concat_tables(tables) if tables else None
+
+
+def _link(source, target):
+    # Partes são imutáveis: a nova versão aponta para os mesmos arquivos (cópia se não houver hard link)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def _publish(tmp_path, path, table_name):
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    for old in glob.glob(os.path.join(os.path.dirname(path), f"{table_name}-v*")):
+        if old != path:
+            if os.path.isdir(old):
+                shutil.rmtree(old, ignore_errors=True)
+            else:
+                os.remove(old)
+    return path
+
+
+def _tmp_dir(path):
+    tmp_path = path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    return tmp_path
+
+
+def write_snapshot(conn, db_path, table_name, version, df=None):
+    """
+    Materializa a tabela como arquivo Arrow IPC (sem compressão, mapeável em memória).
+    `df` evita reler a tabela quando o chamador já a carregou.
+    Snapshots de versões anteriores da mesma tabela são removidos.
+    """
+    if pa is None:
+        return None
+    os.makedirs(snapshot_dir(db_path), exist_ok=True)
+    if df is None:
+        df = pd.read_sql_query(f'SELECT * FROM "{table_name}"', conn)
+    path = snapshot_path(db_path, table_name, version)
+    tmp_path = _tmp_dir(path)
+    _write_part(pa.Table.from_pandas(df, preserve_index=False), _part_path(tmp_path, 0))
+    return _publish(tmp_path, path, table_name)
+
+
+def append_snapshot(db_path, table_name, base_version, version, df):
+    """
+    Nova versão = partes da versão `base_version` (hard links, sem reescrever) + `df` como parte nova,
+    então o custo é proporcional ao delta. Com mais de SNAPSHOT_MAX_PARTS partes, a base é
+    compactada em uma só. Retorna None se não houver snapshot da base ou se o delta não tiver
+    o mesmo esquema (o chamador refaz o snapshot inteiro).
+    """
+    if pa is None or base_version is None:
+        return None
+    base_path = snapshot_path(db_path, table_name, base_version)
+    parts = _parts(base_path)
+    if not parts:
+        return None
+    with pa.memory_map(parts[0], "r") as source:
+        schema = pa.ipc.open_file(source).schema
+    try:
+        delta = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, KeyError, ValueError):
+        return None
+    path = snapshot_path(db_path, table_name, version)
+    tmp_path = _tmp_dir(path)
+    if len(parts) >= SNAPSHOT_MAX_PARTS:
+        _write_part(_read_parts(base_path), _part_path(tmp_path, 0))
+        next_part = 1
+    else:
+        for number, part in enumerate(parts):
+            _link(part, _part_path(tmp_path, number))
+        next_part = len(parts)
+    if delta.num_rows:
+        _write_part(delta, _part_path(tmp_path, next_part))
+    return _publish(tmp_path, path, table_name)
+
+
+def read_snapshot(db_path, table_name, version, columns=None, limit=None, chunksize=None):
+    """
+    Lê o snapshot da versão pedida via memory-map; retorna None se não existir.
+    Somente as colunas pedidas (e as primeiras `limit` linhas) são convertidas para pandas.
+    Com `chunksize`, retorna um iterador de DataFrames de até `chunksize` linhas.
+    """
+    if pa is None or version is None:
+        return None
+    table = _read_parts(snapshot_path(db_path, table_name, version))
+    if table is None:
+        return None
+    if columns is not None:
+        table = table.select(list(columns))
+    if limit is not None:
+        table = table.slice(0, limit)
+    if chunksize:
+        return (batch.to_pandas(split_blocks=True) for batch in table.to_batches(max_chunksize=chunksize))
+    return table.to_pandas(split_blocks=True)
+
+
+def remove_snapshots(db_path):
+    shutil.rmtree(snapshot_dir(db_path), ignore_errors=True)
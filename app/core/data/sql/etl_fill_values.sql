@@ -0,0 +1,21 @@
+-- Calcula os valores de imputação da SOR (usado pela carga completa)
+DELETE FROM etl_fill_values;
+
+INSERT INTO etl_fill_values (column_name, value)
+WITH
+-- Mediana de LoanAmount (média dos dois valores centrais quando n é par)
+loan_amount_ordered AS (
+    SELECT LoanAmount AS v,
+           ROW_NUMBER() OVER (ORDER BY LoanAmount) AS rn,
+           COUNT(*) OVER () AS n
+    FROM sor_emprestimo
+    WHERE LoanAmount IS NOT NULL
+)
+SELECT 'LoanAmount', (SELECT AVG(v) FROM loan_amount_ordered WHERE rn IN ((n + 1) / 2, (n + 2) / 2))
+-- Moda (em caso de empate, o menor valor, como pandas.Series.mode()[0])
+UNION ALL
+SELECT 'Loan_Amount_Term', (SELECT Loan_Amount_Term FROM sor_emprestimo WHERE Loan_Amount_Term IS NOT NULL
+                            GROUP BY Loan_Amount_Term ORDER BY COUNT(*) DESC, Loan_Amount_Term LIMIT 1)
+UNION ALL
+SELECT 'Credit_History', (SELECT Credit_History FROM sor_emprestimo WHERE Credit_History IS NOT NULL
+                          GROUP BY Credit_History ORDER BY COUNT(*) DESC, Credit_History LIMIT 1);
@@ -0,0 +1,28 @@
+-- ETL SOR -> SOT executado dentro do SQLite (sem trafegar dados para o pandas)
+-- Pré-requisito: etl_fill_values.sql (carga completa) ou valores já aprendidos (incremental)
+-- Processa somente as linhas da SOR após a marca d'água da SOT
+INSERT INTO sot_emprestimo (
+    Gender, Married, Dependents, Education, Self_Employed,
+    ApplicantIncome, CoapplicantIncome, LoanAmount, Loan_Amount_Term,
+    Credit_History, Property_Area, Loan_Status
+)
+SELECT
+    CASE s.Gender WHEN 'Male' THEN 'M' WHEN 'Female' THEN 'F' ELSE s.Gender END,
+    CASE s.Married WHEN 'Yes' THEN 'Y' WHEN 'No' THEN 'N' ELSE s.Married END,
+    s.Dependents,
+    s.Education,
+    s.Self_Employed,
+    s.ApplicantIncome,
+    s.CoapplicantIncome,
+    COALESCE(s.LoanAmount, (SELECT value FROM etl_fill_values WHERE column_name = 'LoanAmount')),
+    COALESCE(s.Loan_Amount_Term, (SELECT value FROM etl_fill_values WHERE column_name = 'Loan_Amount_Term')),
+    COALESCE(s.Credit_History, (SELECT value FROM etl_fill_values WHERE column_name = 'Credit_History')),
+    s.Property_Area,
+    s.Loan_Status
+FROM sor_emprestimo AS s
+WHERE s.rowid > (SELECT last_rowid FROM etl_watermark WHERE layer = 'sot_emprestimo')
+ORDER BY s.rowid;
+
+UPDATE etl_watermark
+SET last_rowid = (SELECT COALESCE(MAX(rowid), 0) FROM sor_emprestimo)
+WHERE layer = 'sot_emprestimo';
@@ -0,0 +1,18 @@
+-- ETL SOT -> SPEC (treino) executado dentro do SQLite
+-- Processa somente as linhas da SOT após a marca d'água da SPEC
+INSERT INTO spec_emprestimo_train (
+    Gender, Married, Dependents, Education, Self_Employed,
+    ApplicantIncome, CoapplicantIncome, LoanAmount, Loan_Amount_Term,
+    Credit_History, Property_Area, Loan_Status
+)
+SELECT
+    Gender, Married, Dependents, Education, Self_Employed,
+    ApplicantIncome, CoapplicantIncome, LoanAmount, Loan_Amount_Term,
+    Credit_History, Property_Area, Loan_Status
+FROM sot_emprestimo
+WHERE rowid > (SELECT last_rowid FROM etl_watermark WHERE layer = 'spec_emprestimo_train')
+ORDER BY rowid;
+
+UPDATE etl_watermark
+SET last_rowid = (SELECT COALESCE(MAX(rowid), 0) FROM sot_emprestimo)
+WHERE layer = 'spec_emprestimo_train';
@@ -0,0 +1,18 @@
+-- Suporte à carga incremental (append-only)
+
+-- Deduplicação por Loan_ID na SOR (INSERT OR IGNORE descarta repetidos)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sor_emprestimo_loan_id ON sor_emprestimo (Loan_ID);
+
+-- Último rowid da camada de origem já processado por cada camada de destino
+CREATE TABLE IF NOT EXISTS etl_watermark (
+    layer TEXT PRIMARY KEY,
+    last_rowid INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO etl_watermark (layer, last_rowid) VALUES ('sot_emprestimo', 0);
+INSERT OR IGNORE INTO etl_watermark (layer, last_rowid) VALUES ('spec_emprestimo_train', 0);
+
+-- Valores de imputação aprendidos na carga completa e reutilizados nos deltas
+CREATE TABLE IF NOT EXISTS etl_fill_values (
+    column_name TEXT PRIMARY KEY,
+    value REAL
+);
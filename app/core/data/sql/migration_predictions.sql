@@ -0,0 +1,18 @@
+-- Resultados dos jobs de pontuação em lote
+CREATE TABLE IF NOT EXISTS prediction_runs (
+    run_id TEXT PRIMARY KEY,
+    model_version TEXT NOT NULL,
+    source_table TEXT NOT NULL,
+    rows INTEGER,
+    seconds REAL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS predictions (
+    run_id TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    Loan_ID TEXT,
+    score REAL
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_run_loan ON predictions (run_id, Loan_ID);
+CREATE INDEX IF NOT EXISTS idx_predictions_loan ON predictions (Loan_ID);
@@ -0,0 +1,20 @@
+-- Estatísticas por coluna das tabelas SPEC (recalculadas a cada publicação do ETL)
+-- Usadas para montar o contexto do chat RAG sem varrer os dados
+CREATE TABLE IF NOT EXISTS spec_stats (
+    table_name TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    column_name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    n_rows INTEGER,
+    count INTEGER,
+    mean REAL,
+    std REAL,
+    min REAL,
+    q25 REAL,
+    median REAL,
+    q75 REAL,
+    max REAL,
+    top_values TEXT,
+    PRIMARY KEY (table_name, column_name)
+);
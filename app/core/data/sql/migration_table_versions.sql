@@ -0,0 +1,6 @@
+-- Versão dos dados de cada tabela (alterada a cada escrita do ETL)
+-- Usada como chave dos snapshots colunares de load_data
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
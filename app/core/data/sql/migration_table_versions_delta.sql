@@ -0,0 +1,4 @@
+-- Estado de cada versão publicada usado pela publicação incremental:
+-- último rowid incluído (o delta seguinte é rowid > last_rowid) e hash do conteúdo
+ALTER TABLE table_versions ADD COLUMN last_rowid INTEGER;
+ALTER TABLE table_versions ADD COLUMN data_hash TEXT;
@@ -1,6 +1,4 @@
-DROP TABLE IF EXISTS sor_emprestimo;
-
-CREATE TABLE sor_emprestimo (
+CREATE TABLE IF NOT EXISTS sor_emprestimo (
     Loan_ID TEXT,
     Gender TEXT,
     Married TEXT,
@@ -1,6 +1,4 @@
-DROP TABLE IF EXISTS sot_emprestimo;
-
-CREATE TABLE sot_emprestimo (
+CREATE TABLE IF NOT EXISTS sot_emprestimo (
     Gender TEXT,
     Married TEXT,
     Dependents TEXT,       -- Ajustado para suportar "3+"
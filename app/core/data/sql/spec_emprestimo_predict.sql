@@ -1,8 +1,5 @@
--- Remove a tabela antiga se existir
-DROP TABLE IF EXISTS spec_emprestimo_predict;
-
 -- Cria a tabela para predição
-CREATE TABLE spec_emprestimo_predict (
+CREATE TABLE IF NOT EXISTS spec_emprestimo_predict (
     Loan_ID TEXT,
     Gender TEXT,
     Married TEXT,
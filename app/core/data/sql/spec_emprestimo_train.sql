@@ -1,8 +1,5 @@
--- Remove a tabela antiga se existir
-DROP TABLE IF EXISTS spec_emprestimo_train;
-
 -- Cria a tabela para treino
-CREATE TABLE spec_emprestimo_train (
+CREATE TABLE IF NOT EXISTS spec_emprestimo_train (
     Gender TEXT,
     Married TEXT,
     Dependents TEXT,       -- Dependents como TEXT para suportar "3+"
@@ -0,0 +1,197 @@
+import glob
+import json
+import os
+import pickle
+import shutil
+import numpy as np
+import pandas as pd
+
+from core.data.sketch import CoMomentSketch, TableSketch, sketch_chunks, to_float_matrix
+
+# Tabelas cujas estatísticas são recalculadas a cada publicação do ETL
+STATS_TABLES = ("spec_emprestimo_train", "spec_emprestimo_predict")
+STATS_TOP_K = 5
+CORRELATION_METHODS = ("pearson", "spearman")
+STATS_COLUMNS = [
+    "column_name", "position", "kind", "n_rows", "count",
+    "mean", "std", "min", "q25", "median", "q75", "max", "top_values",
+]
+
+
+def _to_python(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def compute_table_stats(df, top_k: int = STATS_TOP_K, n_workers: int = 1) -> pd.DataFrame:
+    """
+    Estatísticas por coluna (uma linha por coluna, na ordem do DataFrame).
+    Numéricas: contagem, média, desvio, mínimo, quartis e máximo.
+    Demais colunas: contagem e as `top_k` categorias mais frequentes (JSON, incluindo nulos).
+    Aceita também um iterável de DataFrames: os blocos são resumidos em uma única passada
+    por sketches mergeáveis (quartis aproximados), sem carregar a base inteira.
+    """
+    if not isinstance(df, pd.DataFrame):
+        return stats_from_sketch(sketch_chunks(df, n_workers=n_workers), top_k)
+    num = df.select_dtypes(include="number")
+    if len(num.columns):
+        quantiles = num.quantile([0.25, 0.5, 0.75])
+        mean, std, vmin, vmax = num.mean(), num.std(), num.min(), num.max()
+    rows = []
+    for position, col in enumerate(df.columns):
+        row = dict.fromkeys(STATS_COLUMNS)
+        row.update(column_name=col, position=position, n_rows=len(df), count=int(df[col].count()))
+        if col in num.columns:
+            row.update(
+                kind="numeric",
+                mean=_to_python(mean[col]), std=_to_python(std[col]),
+                min=_to_python(vmin[col]), max=_to_python(vmax[col]),
+                q25=_to_python(quantiles.at[0.25, col]),
+                median=_to_python(quantiles.at[0.5, col]),
+                q75=_to_python(quantiles.at[0.75, col]),
+            )
+        else:
+            counts = df[col].value_counts(dropna=False).head(top_k)
+            top = [[_to_python(v) if pd.notna(v) else None, int(n)] for v, n in counts.items()]
+            row.update(kind="categorical", top_values=json.dumps(top, ensure_ascii=False))
+        rows.append(row)
+    return pd.DataFrame(rows, columns=STATS_COLUMNS)
+
+
+def stats_from_sketch(sketch, top_k: int = STATS_TOP_K) -> pd.DataFrame:
+    """Converte um TableSketch para o formato de `spec_stats`."""
+    if sketch.columns is None:
+        return pd.DataFrame(columns=STATS_COLUMNS)
+    numeric = {c: j for j, c in enumerate(sketch.numeric_columns)}
+    categorical = {c: j for j, c in enumerate(sketch.categorical_columns)}
+    moments, std = sketch.moments, sketch.moments.std
+    rows = []
+    for position, col in enumerate(sketch.columns):
+        row = dict.fromkeys(STATS_COLUMNS)
+        row.update(column_name=col, position=position, n_rows=sketch.n_rows)
+        if col in numeric:
+            j = numeric[col]
+            n = int(moments.n[j])
+            q25, median, q75 = sketch.quantiles[j].quantile([0.25, 0.5, 0.75])
+            row.update(kind="numeric", count=n)
+            if n:
+                row.update(
+                    mean=float(moments.mean[j]), std=_to_python(std[j]),
+                    min=float(moments.min[j]), max=float(moments.max[j]),
+                    q25=float(q25), median=float(median), q75=float(q75),
+                )
+        else:
+            hitters = sketch.heavy_hitters[categorical[col]]
+            top = [[_to_python(v), int(n)] for v, n in hitters.top(top_k)]
+            row.update(kind="categorical", count=sketch.counts[col],
+                       top_values=json.dumps(top, ensure_ascii=False))
+        rows.append(row)
+    return pd.DataFrame(rows, columns=STATS_COLUMNS)
+
+
+def sketch_dir(db_path):
+    """Diretório dos sketches das tabelas publicadas, ao lado do arquivo do banco."""
+    return db_path + ".sketches"
+
+
+def sketch_path(db_path, table_name, version):
+    return os.path.join(sketch_dir(db_path), f"{table_name}-v{version}.pkl")
+
+
+def write_table_sketch(df, db_path, table_name, version, base_version=None):
+    """
+    Guarda o TableSketch da versão publicada. Com `base_version`, `df` é só o delta anexado:
+    o sketch da base é lido e atualizado com ele (custo proporcional ao delta).
+    Retorna o sketch, ou None se o sketch da base não existir.
+    """
+    if base_version is None:
+        sketch = TableSketch().update(df)
+    else:
+        base_path = sketch_path(db_path, table_name, base_version)
+        if not os.path.exists(base_path):
+            return None
+        with open(base_path, "rb") as f:
+            sketch = pickle.load(f)
+        if len(df):
+            sketch.update(df)
+    os.makedirs(sketch_dir(db_path), exist_ok=True)
+    path = sketch_path(db_path, table_name, version)
+    with open(path + ".tmp", "wb") as f:
+        pickle.dump(sketch, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + ".tmp", path)
+    for old in glob.glob(os.path.join(sketch_dir(db_path), f"{table_name}-v*.pkl")):
+        if old != path:
+            os.remove(old)
+    return sketch
+
+
+def remove_sketches(db_path):
+    shutil.rmtree(sketch_dir(db_path), ignore_errors=True)
+
+
+def correlation_matrix(df: pd.DataFrame, method: str = "pearson", columns=None) -> pd.DataFrame:
+    """
+    Matriz de correlação entre colunas (pairwise-complete, como DataFrame.corr()).
+    As colunas são convertidas uma única vez e todos os pares saem de produtos de matrizes.
+    method="spearman" correlaciona os postos; com ausentes, os postos são calculados por
+    coluna (DataFrame.corr recalcula por par), o que pode diferir levemente.
+    """
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f"Método de correlação inválido: {method}. Use {CORRELATION_METHODS}.")
+    columns = list(df.select_dtypes(include="number").columns if columns is None else columns)
+    X = to_float_matrix(df, columns)
+    if method == "spearman":
+        X = pd.DataFrame(X).rank().to_numpy()
+    corr = CoMomentSketch(len(columns)).update(X).correlation()
+    return pd.DataFrame(corr, index=columns, columns=columns)
+
+
+def target_correlations(corr: pd.DataFrame, target: str) -> pd.Series:
+    """Correlações de cada coluna com `target`, ordenadas pelo valor absoluto."""
+    s = corr[target].drop(target).dropna()
+    return s.reindex(s.abs().sort_values(ascending=False).index)
+
+
+def write_table_stats(conn, table_name, version, stats: pd.DataFrame):
+    """Substitui as estatísticas da tabela pelas da versão publicada."""
+    conn.execute("DELETE FROM spec_stats WHERE table_name = ?", (table_name,))
+    placeholders = ", ".join("?" * (len(STATS_COLUMNS) + 2))
+    conn.executemany(
+        f"INSERT INTO spec_stats (table_name, version, {', '.join(STATS_COLUMNS)}) VALUES ({placeholders})",
+        ((table_name, version, *(_to_python(v) for v in row))
+         for row in stats[STATS_COLUMNS].itertuples(index=False, name=None)),
+    )
+
+
+def read_table_stats(conn, table_name) -> pd.DataFrame:
+    return pd.read_sql_query(
+        f"SELECT version, {', '.join(STATS_COLUMNS)} FROM spec_stats WHERE table_name = ? ORDER BY position",
+        conn, params=(table_name,),
+    )
+
+
+def render_stats_context(stats: pd.DataFrame, max_chars: int = None) -> str:
+    """Resumo textual da base a partir das estatísticas (custo proporcional ao número de colunas)."""
+    if stats.empty:
+        return ""
+    parts = [f"Shape: {int(stats['n_rows'].iloc[0])} x {len(stats)}"]
+    num = stats[stats["kind"] == "numeric"]
+    if len(num) > 0:
+        desc = num.set_index("column_name")[["count", "mean", "median", "std", "min", "max"]]
+        desc.index.name = None
+        parts.append("[Resumo Numérico]\n" + desc.to_string())
+    cat = stats[stats["kind"] == "categorical"]
+    if len(cat) > 0:
+        cat_summary = []
+        for col, top_values in zip(cat["column_name"], cat["top_values"]):
+            top = json.loads(top_values)
+            vc = pd.Series([n for _, n in top], index=pd.Index([v for v, _ in top], name=col), name="count")
+            cat_summary.append(f"{col}:\n{vc.to_string()}")
+        parts.append("[Resumo Categórico]\n" + "\n".join(cat_summary))
+    ctx = "\n\n".join(parts)
+    if max_chars is None:
+        return ctx
+    return ctx[:max_chars] + ("\n... (contexto truncado)" if len(ctx) > max_chars else "")
@@ -1,7 +1,9 @@
 import numpy as np
+import pandas as pd
+import scipy.sparse as sp
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, StandardScaler
 from sklearn.impute import SimpleImputer
 
 def infer_cols(df):
@@ -9,18 +11,69 @@ def infer_cols(df):
     cat_cols = [c for c in df.columns if c not in num_cols]
     return num_cols, cat_cols
 
-def make_preprocess_pipeline(X_df):
+def _to_category(X):
+    # Categóricas como pandas `category`: códigos inteiros em vez de objetos Python por célula
+    return pd.DataFrame(X).astype("category")
+
+def _to_csr(X, dtype):
+    return sp.csr_matrix(X, dtype=dtype)
+
+def make_preprocess_pipeline(X_df, sparse=False, dtype=None, min_frequency=None):
+    """
+    Imputação + one-hot (ColumnTransformer) seguidos de StandardScaler(with_mean=False).
+
+    sparse=True garante saída CSR do começo ao fim, em `dtype` (float32 por padrão): as numéricas
+    viram CSR após a imputação, o one-hot gera CSR no mesmo tipo e o ramo categórico recebe as
+    colunas como `category`. Sem isso o ColumnTransformer densifica a matriz (float64) quando a
+    densidade passa de 30%. min_frequency agrupa categorias raras (contagem, ou fração se < 1)
+    numa coluna "infrequent", que também recebe as categorias desconhecidas na previsão.
+    """
     num_cols, cat_cols = infer_cols(X_df)
+    if sparse and dtype is None:
+        dtype = np.float32
 
     num_pipe = SimpleImputer(strategy="median")
+    onehot = OneHotEncoder(
+        handle_unknown="infrequent_if_exist" if min_frequency else "ignore",
+        min_frequency=min_frequency,
+        dtype=dtype or np.float64,
+    )
     cat_pipe = Pipeline(steps=[
         ("impute", SimpleImputer(strategy="most_frequent")),
-        ("onehot", OneHotEncoder(handle_unknown="ignore"))
+        ("onehot", onehot)
     ])
+    if sparse:
+        num_pipe = Pipeline(steps=[
+            ("impute", num_pipe),
+            ("csr", FunctionTransformer(_to_csr, kw_args={"dtype": dtype}, feature_names_out="one-to-one")),
+        ])
+        cat_pipe.steps.insert(0, ("category", FunctionTransformer(_to_category, feature_names_out="one-to-one")))
 
     pre = ColumnTransformer([
         ("num", num_pipe, num_cols),
         ("cat", cat_pipe, cat_cols)
-    ])
+    ], sparse_threshold=1.0 if sparse else 0.3)
 
     return Pipeline([("pre", pre), ("scaler", StandardScaler(with_mean=False))])
+
+def matrix_memory(Z):
+    """Relatório de memória de uma matriz transformada (densa ou esparsa) vs. a mesma matriz densa em float64."""
+    n_rows, n_cols = Z.shape
+    if sp.issparse(Z):
+        Z = Z.tocsr()
+        nbytes = Z.data.nbytes + Z.indices.nbytes + Z.indptr.nbytes
+        nnz = Z.nnz
+    else:
+        Z = np.asarray(Z)
+        nbytes = Z.nbytes
+        nnz = int(np.count_nonzero(Z))
+    dense_bytes = n_rows * n_cols * 8
+    return {
+        "format": Z.format if sp.issparse(Z) else "dense",
+        "dtype": str(Z.dtype),
+        "shape": (n_rows, n_cols),
+        "nnz": int(nnz),
+        "density": nnz / (n_rows * n_cols) if n_rows * n_cols else 0.0,
+        "mib": nbytes / 2**20,
+        "dense_float64_mib": dense_bytes / 2**20,
+    }
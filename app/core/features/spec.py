@@ -0,0 +1,141 @@
+import json
+import numpy as np
+import pandas as pd
+
+# Padronização de categorias (mesma regra do ETL SOR -> SOT)
+CATEGORY_MAPS = {
+    "Gender": {"Male": "M", "Female": "F"},
+    "Married": {"Yes": "Y", "No": "N"},
+}
+# Colunas textuais convertidas para número
+NUMERIC_MAPS = {
+    "Dependents": {"3+": "3"},
+    "Credit_History": {"N": "0", "Y": "1"},
+}
+# Estratégia de imputação por coluna; demais numéricas usam mediana e categóricas a moda
+FILL_STRATEGIES = {
+    "LoanAmount": "median",
+    "Loan_Amount_Term": "mode",
+    "Credit_History": "mode",
+}
+# Colunas que não são features (não recebem imputação)
+EXCLUDE_COLUMNS = ("Loan_ID", "Loan_Status")
+
+
+def _to_python(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def _to_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class FeatureSpec:
+    """
+    Transformador de limpeza ajustado uma única vez no treino e reaplicado na previsão.
+    Aprende os valores de imputação e guarda os mapas de categorias; é serializável em JSON.
+    """
+
+    def __init__(self, category_maps=None, numeric_maps=None, fill_strategies=None,
+                 exclude=EXCLUDE_COLUMNS):
+        self.category_maps = dict(CATEGORY_MAPS if category_maps is None else category_maps)
+        self.numeric_maps = dict(NUMERIC_MAPS if numeric_maps is None else numeric_maps)
+        self.fill_strategies = dict(FILL_STRATEGIES if fill_strategies is None else fill_strategies)
+        self.exclude = tuple(exclude)
+        self.fill_values = None
+
+    def _apply_maps(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Cópia rasa: as colunas não alteradas continuam compartilhando memória com `df`
+        out = df.copy(deep=False)
+        for col, mapping in self.category_maps.items():
+            if col in out.columns:
+                out[col] = out[col].replace(mapping)
+        for col, mapping in self.numeric_maps.items():
+            if col in out.columns and not pd.api.types.is_numeric_dtype(out[col]):
+                out[col] = pd.to_numeric(out[col].replace(mapping), errors="coerce")
+        return out
+
+    def fit(self, df: pd.DataFrame):
+        """Aprende os valores de imputação a partir dos dados de treino."""
+        df = self._apply_maps(df)
+        fill_values = {}
+        for col in df.columns:
+            if col in self.exclude:
+                continue
+            s = df[col]
+            numeric = pd.api.types.is_numeric_dtype(s)
+            strategy = self.fill_strategies.get(col, "median" if numeric else "mode")
+            if strategy == "median":
+                value = s.median()
+            elif strategy == "mean":
+                value = s.mean()
+            else:
+                mode = s.mode()
+                value = mode.iloc[0] if not mode.empty else np.nan
+            if pd.notna(value):
+                fill_values[col] = _to_python(value)
+        self.fill_values = fill_values
+        return self
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Aplica mapas e imputação sem alterar o DataFrame de entrada."""
+        if self.fill_values is None:
+            raise RuntimeError("FeatureSpec não ajustado: chame fit() antes de transform().")
+        out = self._apply_maps(df)
+        fills = {c: v for c, v in self.fill_values.items() if c in out.columns}
+        return out.fillna(value=fills) if fills else out
+
+    def transform_row(self, row: dict) -> dict:
+        """Como transform(), para um único registro (dict) e sem pandas: usado na pontuação individual."""
+        if self.fill_values is None:
+            raise RuntimeError("FeatureSpec não ajustado: chame fit() antes de transform().")
+        out = dict(row)
+        for col, mapping in self.category_maps.items():
+            if col in out and not _is_missing(out[col]):
+                out[col] = mapping.get(out[col], out[col])
+        for col, mapping in self.numeric_maps.items():
+            if isinstance(out.get(col), str):
+                out[col] = _to_number(mapping.get(out[col], out[col]))
+        for col, value in self.fill_values.items():
+            if col in out and _is_missing(out[col]):
+                out[col] = value
+        return out
+
+    def fit_transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        return self.fit(df).transform(df)
+
+    def to_dict(self):
+        return {
+            "category_maps": self.category_maps,
+            "numeric_maps": self.numeric_maps,
+            "fill_strategies": self.fill_strategies,
+            "exclude": list(self.exclude),
+            "fill_values": self.fill_values,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        spec = cls(
+            category_maps=data["category_maps"],
+            numeric_maps=data["numeric_maps"],
+            fill_strategies=data["fill_strategies"],
+            exclude=data["exclude"],
+        )
+        spec.fill_values = data["fill_values"]
+        return spec
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
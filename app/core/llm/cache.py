@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import time
+import zlib
+
+import numpy as np
+
+from core.data.connection import pooled_connection, remove_database_files
+from core.retrieval.index import tokenize
+
+DEFAULT_TTL = 7 * 24 * 3600      # segundos
+DEFAULT_MAX_ENTRIES = 5000
+# Similaridade (cosseno) mínima para considerar duas perguntas a mesma
+NEAR_DUPLICATE_THRESHOLD = 0.9
+VECTOR_DIM = 1024
+# Palavras de ligação ignoradas na assinatura da pergunta; negações ("nao", "sem", "nunca"...)
+# e prefixos de sentido ("reprovados" x "aprovados") continuam contando
+STOPWORDS = frozenset((
+    "a", "o", "as", "os", "um", "uma", "uns", "umas", "de", "do", "da", "dos", "das", "em", "no",
+    "na", "nos", "nas", "ao", "aos", "para", "pra", "por", "pelo", "pela", "pelos", "pelas", "me",
+))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS completions (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    context_version TEXT NOT NULL,
+    question TEXT,
+    vector BLOB,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    scope TEXT,
+    signature TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_completions_near ON completions (model, context_version, scope, signature);
+CREATE INDEX IF NOT EXISTS idx_completions_last_used ON completions (last_used);
+"""
+
+
+def question_vector(text, dim=VECTOR_DIM) -> np.ndarray:
+    """
+    Vetor local da pergunta: palavras e trigramas de caracteres (sem acentos nem pontuação)
+    espalhados em `dim` posições por hash estável; normalizado para similaridade por cosseno.
+    """
+    words = tokenize(text)
+    padded = " " + " ".join(words) + " "
+    grams = words + [padded[i:i + 3] for i in range(len(padded) - 2)]
+    vec = np.zeros(dim, dtype=np.float32)
+    if grams:
+        ids = [zlib.crc32(g.encode("utf-8")) % dim for g in grams]
+        vec = np.bincount(ids, minlength=dim).astype(np.float32)
+        vec /= np.linalg.norm(vec)
+    return vec
+
+
+def question_signature(text) -> str:
+    """Hash das palavras de conteúdo da pergunta (sem ordem, acentos, pontuação e palavras de ligação)."""
+    tokens = sorted({t for t in tokenize(text) if t not in STOPWORDS})
+    return hashlib.sha256(" ".join(tokens).encode("utf-8")).hexdigest()[:16]
+
+
+def history_scope(messages) -> str:
+    """Hash de tudo o que vem antes da pergunta (system, contexto, histórico)."""
+    payload = json.dumps(list(messages)[:-1], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def completion_key(model, messages, context_version="", params=None):
+    payload = json.dumps(
+        {"model": model, "messages": messages, "context": str(context_version), "params": params or {}},
+        ensure_ascii=False, sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """
+    Cache persistente (SQLite) de respostas do LLM.
+
+    A chave é o hash de modelo + mensagens + parâmetros + versão do contexto (dados ou modelo),
+    então uma nova versão dos dados invalida as respostas antigas. Entradas expiram após `ttl`
+    segundos e, acima de `max_entries`, as menos usadas recentemente são removidas.
+    Opcionalmente, uma pergunta quase igual a uma já respondida reaproveita a resposta: exige o
+    mesmo modelo, versão do contexto e mensagens anteriores (contexto + histórico), as mesmas
+    palavras de conteúdo (inclusive negações) e similaridade >= `threshold`. Só mudam ordem,
+    acentos, pontuação e palavras de ligação.
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES,
+                 threshold=NEAR_DUPLICATE_THRESHOLD):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.stats = {"exact": 0, "near": 0, "miss": 0}
+        self._ready = False
+
+    def _session(self):
+        if not self._ready:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with pooled_connection(self.path) as conn:
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(completions)")}
+                if columns and "signature" not in columns:
+                    # Cache criado antes da assinatura: descartável, recriado do zero
+                    conn.execute("DROP TABLE completions")
+                conn.executescript(_SCHEMA)
+            self._ready = True
+        return pooled_connection(self.path)
+
+    def _touch(self, conn, key, now):
+        conn.execute("UPDATE completions SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+
+    def get(self, model, messages, context_version="", question=None, near_duplicates=False, params=None):
+        """Resposta em cache ou None."""
+        now = time.time()
+        key = completion_key(model, messages, context_version, params)
+        with self._session() as conn:
+            row = conn.execute(
+                "SELECT response FROM completions WHERE key = ? AND created_at >= ?", (key, now - self.ttl)
+            ).fetchone()
+            if row:
+                self._touch(conn, key, now)
+                self.stats["exact"] += 1
+                return row[0]
+            if near_duplicates and question:
+                rows = conn.execute(
+                    "SELECT key, vector, response FROM completions "
+                    "WHERE model = ? AND context_version = ? AND scope = ? AND signature = ? "
+                    "AND vector IS NOT NULL AND created_at >= ?",
+                    (model, str(context_version), history_scope(messages), question_signature(question),
+                     now - self.ttl),
+                ).fetchall()
+                if rows:
+                    vectors = np.frombuffer(b"".join(r[1] for r in rows), dtype=np.float32).reshape(len(rows), -1)
+                    sims = vectors @ question_vector(question, vectors.shape[1])
+                    best = int(np.argmax(sims))
+                    if sims[best] >= self.threshold:
+                        self._touch(conn, rows[best][0], now)
+                        self.stats["near"] += 1
+                        return rows[best][2]
+        self.stats["miss"] += 1
+        return None
+
+    def put(self, model, messages, response, context_version="", question=None, params=None):
+        now = time.time()
+        key = completion_key(model, messages, context_version, params)
+        vector = question_vector(question).tobytes() if question else None
+        signature = question_signature(question) if question else None
+        with self._session() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO completions "
+                "(key, model, context_version, question, vector, response, created_at, last_used, scope, signature) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, model, str(context_version), question, vector, response, now, now,
+                 history_scope(messages), signature),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM completions WHERE created_at < ?", (now - self.ttl,))
+        excess = conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM completions WHERE key IN "
+                "(SELECT key FROM completions ORDER BY last_used ASC LIMIT ?)", (excess,)
+            )
+
+    def complete(self, client, model, messages, context_version="", question=None,
+                 near_duplicates=False, **params):
+        """
+        Igual a client.chat.completions.create(...).choices[0].message.content,
+        mas consultando o cache antes e guardando a resposta depois.
+        """
+        reply = self.get(model, messages, context_version, question, near_duplicates, params)
+        if reply is None:
+            response = client.chat.completions.create(model=model, messages=messages, **params)
+            reply = response.choices[0].message.content
+            self.put(model, messages, reply, context_version, question, params)
+        return reply
+
+    def stream(self, client, model, messages, context_version="", question=None,
+               near_duplicates=False, **params):
+        """
+        Versão em streaming de `complete` para um StreamingChatClient: uma resposta em cache sai
+        de uma vez; caso contrário os trechos são repassados e a resposta completa é guardada no fim.
+        """
+        reply = self.get(model, messages, context_version, question, near_duplicates, params)
+        if reply is not None:
+            yield reply
+            return
+        parts = []
+        for text in client.stream(model, messages, **params):
+            parts.append(text)
+            yield text
+        self.put(model, messages, "".join(parts), context_version, question, params)
+
+    def clear(self):
+        remove_database_files(self.path)
+        self._ready = False
@@ -0,0 +1,154 @@
+import asyncio
+import collections
+import queue
+import threading
+import time
+import weakref
+
+import numpy as np
+
+# Requisições simultâneas ao provedor (compartilhado por todas as sessões do processo)
+MAX_CONCURRENT_REQUESTS = 4
+FIRST_TOKEN_TIMEOUT = 20     # segundos até o primeiro token (inclui a espera na fila)
+REQUEST_TIMEOUT = 120        # segundos para a resposta completa
+
+_DONE = object()
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def event_loop() -> asyncio.AbstractEventLoop:
+    """Loop asyncio em uma thread de fundo, iniciado uma única vez por processo."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-event-loop", daemon=True).start()
+    return _loop
+
+
+def _delta_text(chunk):
+    # Formato de streaming da OpenAI: choices[0].delta.content (pode vir vazio)
+    if not chunk.choices:
+        return ""
+    return chunk.choices[0].delta.content or ""
+
+
+class StreamingChatClient:
+    """
+    Camada assíncrona sobre um cliente no formato `AsyncOpenAI` (chat.completions.create com stream=True).
+
+    As requisições rodam no loop de fundo, limitadas por um semáforo (`max_concurrent`, um por
+    event loop: o do loop de fundo é compartilhado por todas as sessões) e com
+    tempo máximo até o primeiro token e para a resposta inteira. `stream()` devolve um gerador
+    síncrono de trechos de texto, próprio para `st.write_stream`; sessões diferentes (threads)
+    compartilham o mesmo limite. O tempo até o primeiro token (TTFT) fica em `latency_stats()`.
+    """
+
+    def __init__(self, client, max_concurrent=MAX_CONCURRENT_REQUESTS,
+                 first_token_timeout=FIRST_TOKEN_TIMEOUT, timeout=REQUEST_TIMEOUT):
+        self.client = client
+        self.max_concurrent = max_concurrent
+        self.first_token_timeout = first_token_timeout
+        self.timeout = timeout
+        self.ttft = collections.deque(maxlen=1000)
+        self.durations = collections.deque(maxlen=1000)
+        # Um asyncio.Semaphore fica preso ao loop em que é usado pela primeira vez
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._semaphores_lock = threading.Lock()
+
+    def _semaphore(self):
+        """Semáforo do loop em execução, criado na primeira requisição feita nele."""
+        loop = asyncio.get_running_loop()
+        with self._semaphores_lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrent)
+        return semaphore
+
+    async def astream(self, model, messages, **params):
+        """Gerador assíncrono dos trechos da resposta."""
+        semaphore = self._semaphore()
+        start = time.perf_counter()
+        first_deadline = start + self.first_token_timeout
+        deadline = start + self.timeout
+        first = True
+
+        def remaining():
+            left = (min(first_deadline, deadline) if first else deadline) - time.perf_counter()
+            if left <= 0:
+                raise asyncio.TimeoutError
+            return left
+
+        acquired = False
+        response = None
+        try:
+            await asyncio.wait_for(semaphore.acquire(), remaining())
+            acquired = True
+            response = await asyncio.wait_for(
+                self.client.chat.completions.create(model=model, messages=messages, stream=True, **params),
+                remaining(),
+            )
+            chunks = aiter(response)
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(anext(chunks), remaining())
+                except StopAsyncIteration:
+                    break
+                text = _delta_text(chunk)
+                if not text:
+                    continue
+                if first:
+                    self.ttft.append(time.perf_counter() - start)
+                    first = False
+                yield text
+        except asyncio.TimeoutError:
+            stage = "o primeiro token" if first else "a resposta completa"
+            raise TimeoutError(f"Tempo esgotado aguardando {stage} do modelo {model}.") from None
+        finally:
+            if response is not None and hasattr(response, "close"):
+                await response.close()
+            if acquired:
+                semaphore.release()
+        self.durations.append(time.perf_counter() - start)
+
+    async def acomplete(self, model, messages, **params) -> str:
+        return "".join([text async for text in self.astream(model, messages, **params)])
+
+    def stream(self, model, messages, **params):
+        """Gerador síncrono dos trechos (consumido na thread do script; a requisição roda no loop de fundo)."""
+        tokens = queue.Queue()
+
+        async def pump():
+            try:
+                async for text in self.astream(model, messages, **params):
+                    tokens.put(text)
+            except Exception as e:
+                tokens.put(e)
+            else:
+                tokens.put(_DONE)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), event_loop())
+        try:
+            while True:
+                item = tokens.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Gerador abandonado (ex.: rerun do Streamlit): cancela a requisição
+            future.cancel()
+
+    def complete(self, model, messages, **params) -> str:
+        return "".join(self.stream(model, messages, **params))
+
+    def latency_stats(self) -> dict:
+        """Percentis (s) do tempo até o primeiro token e do tempo total das respostas recentes."""
+        stats = {"requests": len(self.durations)}
+        for name, values in (("ttft", self.ttft), ("total", self.durations)):
+            if values:
+                p50, p95 = np.percentile(list(values), [50, 95])
+                stats[f"{name}_p50"], stats[f"{name}_p95"] = round(float(p50), 4), round(float(p95), 4)
+        return stats
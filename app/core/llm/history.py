@@ -0,0 +1,143 @@
+import math
+import re
+
+# Contagem exata de tokens com tiktoken (opcional); sem ele, estimativa por caracteres
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+DEFAULT_TOKEN_BUDGET = 4000
+RECENT_MESSAGES = 6          # mensagens recentes mantidas na íntegra (3 turnos)
+SUMMARY_TOKENS = 400         # tamanho máximo do resumo das mensagens antigas
+SUMMARY_LINE_CHARS = 200     # cada mensagem antiga vira uma linha de até N caracteres
+CHARS_PER_TOKEN = 3.5        # estimativa conservadora para português
+MESSAGE_OVERHEAD = 4         # tokens de formatação por mensagem (papel, separadores)
+HISTORY_SHARE = 0.35         # fração do orçamento reservada ao histórico quando o contexto é grande
+MIN_QUESTION_TOKENS = 32     # espaço mínimo para a pergunta (truncada) ao lado das mensagens fixas
+TRUNCATION_SUFFIX = "\n... (truncado)"
+
+_encodings = {}
+
+
+def _encoding(model):
+    if tiktoken is None:
+        return None
+    if model not in _encodings:
+        try:
+            _encodings[model] = tiktoken.encoding_for_model(model)
+        except KeyError:
+            _encodings[model] = tiktoken.get_encoding("o200k_base")
+    return _encodings[model]
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    enc = _encoding(model)
+    if enc is not None:
+        return len(enc.encode(text))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def messages_tokens(messages, model: str = "gpt-4o-mini") -> int:
+    return sum(count_tokens(m["content"], model) + MESSAGE_OVERHEAD for m in messages)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-4o-mini") -> str:
+    """Corta o texto para caber em `max_tokens` (marcando o corte)."""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    room = max(max_tokens - count_tokens(TRUNCATION_SUFFIX, model), 0)
+    enc = _encoding(model)
+    if enc is not None:
+        return enc.decode(enc.encode(text)[:room]) + TRUNCATION_SUFFIX
+    return text[:int(room * CHARS_PER_TOKEN)] + TRUNCATION_SUFFIX
+
+
+def summarize_message(message) -> str:
+    """Linha extrativa: primeira frase da mensagem, limitada a SUMMARY_LINE_CHARS."""
+    text = " ".join(message["content"].split())
+    first = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0]
+    if len(first) > SUMMARY_LINE_CHARS:
+        first = first[:SUMMARY_LINE_CHARS - 3] + "..."
+    who = "Usuário" if message["role"] == "user" else "Assistente"
+    return f"{who}: {first}"
+
+
+def compact_history(history, memory: dict, recent: int = RECENT_MESSAGES,
+                    summary_tokens: int = SUMMARY_TOKENS, model: str = "gpt-4o-mini"):
+    """
+    Janela deslizante: devolve as `recent` últimas mensagens e atualiza em `memory`
+    (ex.: um dict no session_state) o resumo das anteriores. O resumo é incremental:
+    só as mensagens que acabaram de sair da janela são resumidas, e as linhas mais antigas
+    do resumo são descartadas quando ele passa de `summary_tokens`.
+    """
+    history = [m for m in history if m["role"] in ("user", "assistant")]
+    cut = max(len(history) - recent, 0)
+    done = memory.get("summarized", 0)
+    if cut < done:
+        # Histórico foi limpo ou encurtado: recomeça o resumo
+        memory["lines"], done = [], 0
+    lines = memory.setdefault("lines", [])
+    lines.extend(summarize_message(m) for m in history[done:cut])
+    while lines and count_tokens("\n".join(lines), model) > summary_tokens:
+        lines.pop(0)
+    memory["summarized"] = cut
+    return history[cut:], "\n".join(lines)
+
+
+def build_prompt(prefix, history, memory: dict, budget: int = DEFAULT_TOKEN_BUDGET,
+                 recent: int = RECENT_MESSAGES, summary_tokens: int = SUMMARY_TOKENS,
+                 model: str = "gpt-4o-mini"):
+    """
+    Mensagens para o modelo dentro de `budget` tokens.
+
+    `prefix`: mensagens fixas (system + contexto); `history`: conversa completa, terminando na
+    pergunta atual. A pergunta atual sempre entra, truncada se não couber junto com as mensagens
+    fixas do prefixo; o prefixo ocupa o restante, menos uma reserva de até HISTORY_SHARE do
+    orçamento para a conversa (o último item do prefixo, normalmente o contexto, é truncado ou
+    omitido se necessário). Na reserva entram o resumo das mensagens antigas e as mensagens
+    recentes, da mais nova para a mais antiga, enquanto couberem.
+    ValueError se as mensagens fixas não deixarem nem MIN_QUESTION_TOKENS para a pergunta.
+    """
+    window, summary = compact_history(history, memory, recent, summary_tokens, model)
+    question, window = window[-1:], window[:-1]
+    summary_msgs = []
+    if summary:
+        summary_msgs = [{"role": "system", "content": f"Resumo da conversa anterior:\n{summary}"}]
+
+    prefix = [dict(m) for m in prefix]
+    others = messages_tokens(prefix[:-1], model)
+    room = budget - others - MESSAGE_OVERHEAD
+    if room < MIN_QUESTION_TOKENS:
+        raise ValueError(
+            f"Orçamento de {budget} tokens insuficiente: as mensagens fixas do prompt usam {others} tokens "
+            f"e a pergunta precisa de pelo menos {MIN_QUESTION_TOKENS}."
+        )
+    if question and messages_tokens(question, model) > budget - others:
+        question = [dict(question[0], content=truncate_to_tokens(question[0]["content"], room, model))]
+    used = messages_tokens(question, model)
+    reserve = min(messages_tokens(summary_msgs + window, model), int(budget * HISTORY_SHARE))
+
+    fixed = messages_tokens(prefix, model)
+    if prefix and used + fixed + reserve > budget:
+        room = budget - used - reserve - others - MESSAGE_OVERHEAD
+        if room > count_tokens(TRUNCATION_SUFFIX, model):
+            prefix[-1]["content"] = truncate_to_tokens(prefix[-1]["content"], room, model)
+        else:
+            # Sem espaço nem para um trecho do contexto: ele sai do prompt
+            prefix = prefix[:-1]
+        fixed = messages_tokens(prefix, model)
+    used += fixed
+
+    if summary_msgs and used + messages_tokens(summary_msgs, model) > budget:
+        summary_msgs = []
+    used += messages_tokens(summary_msgs, model)
+
+    kept = []
+    for message in reversed(window):
+        cost = messages_tokens([message], model)
+        if used + cost > budget:
+            break
+        kept.insert(0, message)
+        used += cost
+    return prefix + summary_msgs + kept + question
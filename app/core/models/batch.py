@@ -0,0 +1,115 @@
+import hashlib
+import os
+import pickle
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from core.data.database import db_session, load_data
+from core.models.registry import load_artifact
+
+DEFAULT_CHUNKSIZE = 50_000
+
+# Modelo carregado uma única vez em cada processo do pool
+_WORKER_MODEL = None
+
+
+def model_version_from_file(model_path):
+    """Versão do modelo = prefixo do hash SHA-256 do artefato."""
+    digest = hashlib.sha256()
+    with open(model_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def _load_model(model_path):
+    if model_path.endswith(".joblib"):
+        # Artefatos do registro: os arrays são mapeados em memória e compartilhados entre processos
+        return load_artifact(model_path)
+    with open(model_path, "rb") as f:
+        return pickle.load(f)
+
+
+def _init_worker(model_path):
+    global _WORKER_MODEL
+    _WORKER_MODEL = _load_model(model_path)
+
+
+def _score_chunk(chunk, id_col, model=None):
+    model = model if model is not None else _WORKER_MODEL
+    ids = chunk[id_col].tolist()
+    scores = model.predict(chunk.drop(columns=[id_col]))
+    return ids, np.asarray(scores, dtype=np.float64).tolist()
+
+
+def _write_scores(conn, run_id, model_version, ids, scores):
+    conn.executemany(
+        "INSERT INTO predictions (run_id, model_version, Loan_ID, score) VALUES (?, ?, ?, ?)",
+        ((run_id, model_version, i, s) for i, s in zip(ids, scores)),
+    )
+    return len(ids)
+
+
+def run_batch_scoring(model_path, table_name="spec_emprestimo_predict", id_col="Loan_ID",
+                      chunksize=DEFAULT_CHUNKSIZE, n_workers=None, model_version=None, model=None):
+    """
+    Pontua a tabela em blocos e grava o resultado em `predictions` (com run_id e versão do modelo).
+
+    Os blocos são distribuídos entre processos, cada um com o modelo carregado uma única vez;
+    no máximo 2 blocos por processo ficam em memória. Tabelas que cabem em um bloco são
+    pontuadas no próprio processo (usando `model`, se já carregado).
+    Retorna um resumo com linhas, tempo e linhas/segundo.
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    model_version = model_version or model_version_from_file(model_path)
+    run_id = uuid.uuid4().hex
+    start = time.perf_counter()
+    total = 0
+
+    chunks = iter(load_data(table_name, chunksize=chunksize))
+    first = next(chunks, None)
+    second = next(chunks, None)
+
+    with db_session() as conn:
+        if first is not None and (second is None or n_workers == 1):
+            model = model if model is not None else _load_model(model_path)
+            for chunk in (c for c in (first, second) if c is not None):
+                total += _write_scores(conn, run_id, model_version, *_score_chunk(chunk, id_col, model))
+            for chunk in chunks:
+                total += _write_scores(conn, run_id, model_version, *_score_chunk(chunk, id_col, model))
+        elif first is not None:
+            pending = [first, second]
+            with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                     initargs=(model_path,)) as pool:
+                in_flight = set()
+                while pending or in_flight:
+                    # Submete sem ultrapassar o limite de blocos em memória
+                    while len(in_flight) < 2 * n_workers:
+                        chunk = pending.pop(0) if pending else next(chunks, None)
+                        if chunk is None:
+                            break
+                        in_flight.add(pool.submit(_score_chunk, chunk, id_col))
+                    if not in_flight:
+                        break
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        total += _write_scores(conn, run_id, model_version, *future.result())
+
+        seconds = time.perf_counter() - start
+        conn.execute(
+            "INSERT INTO prediction_runs (run_id, model_version, source_table, rows, seconds) VALUES (?, ?, ?, ?, ?)",
+            (run_id, model_version, table_name, total, seconds),
+        )
+
+    report = {
+        "run_id": run_id,
+        "model_version": model_version,
+        "rows": total,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(total / seconds, 1) if seconds > 0 else float(total),
+    }
+    print(f"Pontuação em lote concluída: {total} linhas ({report['rows_per_sec']} linhas/s).")
+    return report
@@ -0,0 +1,172 @@
+import functools
+
+import numpy as np
+import pandas as pd
+
+from core.models.registry import load_artifact
+
+# Valor sentinela usado para descobrir o tratamento de categorias desconhecidas
+_UNKNOWN = "__categoria_desconhecida__"
+# Quantos modelos compilados ficam em memória no processo
+MAX_COMPILED_MODELS = 4
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and value != value)
+
+
+class CompiledScorer:
+    """
+    Modelo linear "compilado": imputação, one-hot, escala e coeficientes dobrados em arrays NumPy.
+
+    score(dict) pontua um único solicitante sem pandas nem sklearn;
+    score_batch(ndarray) faz o mesmo de forma vetorizada (colunas na ordem de `columns`).
+    Para classificadores o resultado é a probabilidade da classe positiva.
+    """
+
+    def __init__(self, num_cols, num_fill, num_weights, cat_cols, cat_categories, cat_weights,
+                 cat_missing, cat_unknown, intercept, link="identity"):
+        self.num_cols = list(num_cols)
+        self.num_fill = np.asarray(num_fill, dtype=np.float64)
+        self.num_weights = np.asarray(num_weights, dtype=np.float64)
+        self.cat_cols = list(cat_cols)
+        self.cat_index = [pd.Index(cats) for cats in cat_categories]
+        # Última posição de cada tabela = peso de categoria desconhecida
+        self.cat_tables = [np.append(np.asarray(w, dtype=np.float64), u) for w, u in zip(cat_weights, cat_unknown)]
+        self.cat_maps = [dict(zip(cats, w)) for cats, w in zip(cat_categories, cat_weights)]
+        self.cat_missing = np.asarray(cat_missing, dtype=np.float64)
+        self.cat_unknown = np.asarray(cat_unknown, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.link = link
+
+    @property
+    def columns(self):
+        return self.num_cols + self.cat_cols
+
+    def _apply_link(self, z):
+        if self.link == "logistic":
+            return 1.0 / (1.0 + np.exp(-z))
+        return z
+
+    def score(self, row: dict) -> float:
+        z = self.intercept
+        for col, fill, w in zip(self.num_cols, self.num_fill, self.num_weights):
+            v = row.get(col)
+            z += w * (fill if _is_missing(v) else float(v))
+        for j, col in enumerate(self.cat_cols):
+            v = row.get(col)
+            z += self.cat_missing[j] if _is_missing(v) else self.cat_maps[j].get(v, self.cat_unknown[j])
+        return float(self._apply_link(z))
+
+    def score_batch(self, X) -> np.ndarray:
+        if isinstance(X, pd.DataFrame):
+            X = X[self.columns].to_numpy(dtype=object)
+        X = np.asarray(X, dtype=object)
+        n_num = len(self.num_cols)
+        z = np.full(X.shape[0], self.intercept)
+        if n_num:
+            num = X[:, :n_num].astype(np.float64)
+            num = np.where(np.isnan(num), self.num_fill, num)
+            z += num @ self.num_weights
+        for j in range(len(self.cat_cols)):
+            col = X[:, n_num + j]
+            idx = self.cat_index[j].get_indexer(col)
+            contrib = self.cat_tables[j][idx]
+            contrib[pd.isna(col)] = self.cat_missing[j]
+            z += contrib
+        return self._apply_link(z)
+
+
+def _block_sizes(ohe):
+    """Número de colunas geradas pelo OneHotEncoder para cada variável de entrada."""
+    infrequent = getattr(ohe, "infrequent_categories_", None)
+    sizes = []
+    for j, cats in enumerate(ohe.categories_):
+        inf = infrequent[j] if infrequent is not None else None
+        n_inf = 0 if inf is None else len(inf)
+        sizes.append(len(cats) - n_inf + (1 if n_inf else 0))
+    return sizes
+
+
+def compile_pipeline(model) -> CompiledScorer:
+    """
+    Compila um Pipeline([("pre", make_preprocess_pipeline(...)), ("reg"|"clf", modelo linear)]).
+    O pré-processamento é avaliado uma única vez sobre linhas-sonda; como ele é afim por coluna,
+    o resultado pode ser reduzido a inclinação/preenchimento (numéricas) e tabelas de pesos (categóricas).
+    """
+    pre = model.steps[0][1]
+    estimator = model.steps[-1][1]
+    ct = pre.named_steps["pre"]
+    num_cols = list(ct.transformers_[0][2])
+    cat_cols = list(ct.transformers_[1][2])
+    cat_pipe = ct.named_transformers_["cat"]
+    ohe = cat_pipe.named_steps["onehot"]
+    cat_fill = cat_pipe.named_steps["impute"].statistics_
+
+    coef = np.asarray(estimator.coef_, dtype=np.float64).ravel()
+    intercept = float(np.ravel(estimator.intercept_)[0])
+    link = "logistic" if hasattr(estimator, "predict_proba") else "identity"
+
+    # Linhas-sonda: numéricas em 0, 1 e NaN; categóricas percorrem as categorias + uma desconhecida
+    cat_lists = [list(c) for c in ohe.categories_]
+    n_rows = max([3] + [len(c) + 1 for c in cat_lists])
+    probe = {}
+    for col in num_cols:
+        probe[col] = np.array([0.0, 1.0, np.nan] + [0.0] * (n_rows - 3))
+    for col, cats in zip(cat_cols, cat_lists):
+        probe[col] = pd.Series(cats + [_UNKNOWN] + [cats[0]] * (n_rows - len(cats) - 1), dtype=object)
+    probe = pd.DataFrame(probe)[ct.feature_names_in_]
+    try:
+        Z = pre.transform(probe)
+        unknown_ok = True
+    except ValueError:
+        # Encoder sem suporte a desconhecidas com esse tipo: sonda sem a linha desconhecida
+        for col, cats in zip(cat_cols, cat_lists):
+            probe[col] = cats + [cats[0]] * (n_rows - len(cats))
+        Z = pre.transform(probe)
+        unknown_ok = False
+    Z = Z.toarray() if hasattr(Z, "toarray") else np.asarray(Z)
+    contrib = Z * coef
+
+    num_slice = ct.output_indices_["num"]
+    num_c = contrib[:, num_slice]
+    base = num_c[0]
+    slope = num_c[1] - num_c[0]
+    nan_delta = num_c[2] - base
+    with np.errstate(divide="ignore", invalid="ignore"):
+        num_fill = np.where(slope != 0, nan_delta / slope, 0.0)
+    intercept += base.sum()
+
+    cat_slice = ct.output_indices_["cat"]
+    cat_c = contrib[:, cat_slice]
+    cat_weights, cat_missing, cat_unknown = [], [], []
+    start = 0
+    for j, size in enumerate(_block_sizes(ohe)):
+        block = cat_c[:, start:start + size].sum(axis=1)
+        start += size
+        n_cats = len(cat_lists[j])
+        weights = block[:n_cats]
+        cat_weights.append(weights)
+        cat_unknown.append(block[n_cats] if unknown_ok else 0.0)
+        cat_missing.append(weights[cat_lists[j].index(cat_fill[j])])
+
+    return CompiledScorer(
+        num_cols, num_fill, slope, cat_cols, cat_lists, cat_weights,
+        cat_missing, cat_unknown, intercept, link=link,
+    )
+
+
+@functools.lru_cache(maxsize=MAX_COMPILED_MODELS)
+def _compiled_for_artifact(path, content_hash):
+    return compile_pipeline(load_artifact(path, content_hash))
+
+
+def load_compiled(model_meta):
+    """
+    CompiledScorer da versão registrada (metadados de ModelRegistry.get), compilado uma vez por
+    processo. Retorna None se o modelo não for um Pipeline linear compilável.
+    """
+    try:
+        return _compiled_for_artifact(model_meta["path"], model_meta.get("content_hash"))
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
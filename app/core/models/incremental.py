@@ -0,0 +1,220 @@
+import copy
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier, SGDRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from core.data.database import db_session, load_data
+from core.features.preprocess import make_preprocess_pipeline
+from core.features.spec import FeatureSpec
+
+INCREMENTAL_CHUNKSIZE = 50_000
+# Amostra uniforme (bottom-k) usada para aprender imputações; tamanho fixo, independente da tabela
+SAMPLE_SIZE = 20_000
+DEFAULT_EPOCHS = 5
+TARGET = "Loan_Status"
+TARGET_MAP = {"Y": 1, "N": 0}
+
+
+def _chunks(table_name, chunksize, max_rowid, since_rowid=0):
+    # Leitura em blocos pelo SQLite (com rowid): memória limitada a um bloco por vez
+    return load_data(
+        table_name, columns=["rowid"] + _columns(table_name),
+        where="rowid > ? AND rowid <= ?", params=(since_rowid, max_rowid), chunksize=chunksize,
+    )
+
+
+def _columns(table_name):
+    with db_session() as conn:
+        return [row[1] for row in conn.execute(f"PRAGMA table_info(\"{table_name}\")")]
+
+
+def _split_xy(chunk, target, target_map, holdout_every):
+    y = chunk[target].map(target_map) if target_map else pd.to_numeric(chunk[target], errors="coerce")
+    keep = y.notna().to_numpy()
+    # Holdout determinístico pelo rowid: a mesma linha fica sempre do mesmo lado entre re-treinos
+    holdout = (chunk["rowid"].to_numpy() % holdout_every == 0) & keep
+    X = chunk.drop(columns=["rowid", target])
+    return X, y.to_numpy(dtype=np.float64), keep & ~holdout, holdout
+
+
+def _sample_and_categories(chunks, sample_size, rng):
+    """
+    Uma passada: amostra uniforme de `sample_size` linhas (menores chaves aleatórias) e o conjunto
+    de valores de cada coluna categórica, para que o one-hot conheça todas sem carregar a tabela.
+    """
+    sample, keys = None, None
+    categories = {}
+    n_rows = 0
+    for chunk in chunks:
+        n_rows += len(chunk)
+        for col in chunk.columns:
+            if not pd.api.types.is_numeric_dtype(chunk[col]):
+                categories.setdefault(col, set()).update(chunk[col].dropna().unique())
+        chunk_keys = rng.random(len(chunk))
+        sample = chunk if sample is None else pd.concat([sample, chunk], ignore_index=True)
+        keys = chunk_keys if keys is None else np.concatenate([keys, chunk_keys])
+        if len(sample) > sample_size:
+            top = np.argpartition(keys, sample_size)[:sample_size]
+            sample, keys = sample.iloc[top].reset_index(drop=True), keys[top]
+    return sample, categories, n_rows
+
+
+def _cover_categories(X_sample, categories):
+    """
+    Amostra + uma linha por categoria ausente dela (cópia de uma linha da amostra com o valor trocado):
+    o tamanho extra é o número de categorias não amostradas, não o número de linhas da tabela.
+    """
+    missing = [(col, value) for col, values in categories.items() if col in X_sample
+               for value in values.difference(X_sample[col].dropna())]
+    if not missing:
+        return X_sample
+    extra = X_sample.iloc[np.arange(len(missing)) % len(X_sample)].reset_index(drop=True)
+    for col in {col for col, _ in missing}:
+        extra[col] = extra[col].astype(object)
+    for i, (col, value) in enumerate(missing):
+        extra.at[i, col] = value
+    return pd.concat([X_sample, extra], ignore_index=True)
+
+
+def _fit_preprocess(chunks, spec, target, sample_size, rng):
+    """Imputação e categorias pela amostra + categorias vistas; escala (desvio) exata, acumulada bloco a bloco."""
+    sample, categories, _ = _sample_and_categories(chunks(), sample_size, rng)
+    if sample is None:
+        raise ValueError("Nenhuma linha para treinar.")
+    X_sample = sample.drop(columns=["rowid", target])
+    if spec is None:
+        spec = FeatureSpec().fit(X_sample)
+    # Tipos inferidos após o FeatureSpec (ex.: Dependents "3+" vira numérica), como no treino em memória
+    covered = spec.transform(_cover_categories(X_sample, categories))
+    pre = make_preprocess_pipeline(covered)
+    pre.fit(covered)
+    # Segunda passada: a escala do modelo final vem da tabela inteira, não da amostra
+    scaler = StandardScaler(with_mean=False)
+    ct = pre.named_steps["pre"]
+    for chunk in chunks():
+        scaler.partial_fit(ct.transform(spec.transform(chunk.drop(columns=["rowid", target]))))
+    pre.steps[-1] = ("scaler", scaler)
+    return pre, spec
+
+
+def _writable(estimator):
+    # Modelos do registro são carregados com mmap (somente leitura); partial_fit precisa de cópias
+    estimator = copy.deepcopy(estimator)
+    for attr in ("coef_", "intercept_"):
+        if hasattr(estimator, attr):
+            setattr(estimator, attr, np.array(getattr(estimator, attr)))
+    return estimator
+
+
+def train_incremental(table_name="spec_emprestimo_train", task="regression", target=TARGET,
+                      target_map=TARGET_MAP, test_size=0.2, epochs=DEFAULT_EPOCHS,
+                      chunksize=INCREMENTAL_CHUNKSIZE, sample_size=SAMPLE_SIZE,
+                      warm_start=None, spec=None, since_rowid=0, random_state=42):
+    """
+    Treino fora da memória: a tabela é lida em blocos do SQLite e o modelo (SGDRegressor ou
+    SGDClassifier com log-loss) é ajustado com partial_fit, em `epochs` passadas. O pré-processamento
+    segue o layout de make_preprocess_pipeline (compatível com o scorer compilado e as importâncias).
+
+    Com `warm_start` (Pipeline SGD anterior) e `since_rowid`, só as linhas novas (delta) são lidas:
+    o pré-processamento e o FeatureSpec anteriores são mantidos e o modelo continua de onde parou.
+    Uma a cada round(1/test_size) linhas (pelo rowid) fica fora do treino; as métricas vêm desse
+    holdout na tabela inteira (com delta vazio, o modelo anterior é apenas reavaliado).
+    Retorna (modelo, spec, relatório com métricas, linhas e `last_rowid` para o próximo delta).
+    """
+    start = time.perf_counter()
+    rng = np.random.default_rng(random_state)
+    holdout_every = max(int(round(1 / test_size)), 2)
+    with db_session() as conn:
+        max_rowid = conn.execute(f'SELECT COALESCE(MAX(rowid), 0) FROM "{table_name}"').fetchone()[0]
+    if since_rowid > max_rowid:
+        # Marca d'água de outra base (ex.: tabela recarregada por inteiro): o delta seria vazio por engano
+        print(f"last_rowid {since_rowid} além do fim de {table_name} ({max_rowid}); treino completo.")
+        warm_start, spec, since_rowid = None, None, 0
+    if max_rowid <= since_rowid and warm_start is None:
+        raise ValueError(f"Nenhuma linha para treinar em {table_name} após rowid {since_rowid}.")
+    if max_rowid <= since_rowid:
+        # Delta vazio: o modelo anterior continua válido e só é reavaliado
+        print(f"Nenhuma linha nova em {table_name}; modelo anterior mantido.")
+        epochs = 0
+
+    def chunks(since=since_rowid):
+        return _chunks(table_name, chunksize, max_rowid, since)
+
+    step = "clf" if task == "classification" else "reg"
+    if warm_start is not None:
+        if spec is None:
+            raise ValueError("warm_start requer o FeatureSpec do modelo anterior.")
+        estimator = warm_start.named_steps[step]
+        if not hasattr(estimator, "partial_fit"):
+            raise ValueError(f"warm_start requer um modelo SGD (recebido {type(estimator).__name__}).")
+        pre, estimator = warm_start.named_steps["pre"], _writable(estimator)
+    else:
+        pre, spec = _fit_preprocess(chunks, spec, target, sample_size, rng)
+        if task == "classification":
+            estimator = SGDClassifier(loss="log_loss", alpha=1e-4, random_state=random_state)
+        else:
+            estimator = SGDRegressor(alpha=1e-4, eta0=0.01, random_state=random_state)
+
+    train_rows = 0
+    for epoch in range(epochs):
+        for chunk in chunks():
+            X, y, train_mask, _ = _split_xy(chunk, target, target_map, holdout_every)
+            if epoch == 0:
+                train_rows += int(train_mask.sum())
+            if not train_mask.any():
+                continue
+            Z = pre.transform(spec.transform(X[train_mask]))
+            order = rng.permutation(Z.shape[0])
+            if task == "classification":
+                estimator.partial_fit(Z[order], y[train_mask][order], classes=np.array([0.0, 1.0]))
+            else:
+                estimator.partial_fit(Z[order], y[train_mask][order])
+
+    # Validação em streaming (acumuladores, sem guardar o holdout), sempre sobre o holdout da
+    # tabela inteira: métricas comparáveis entre treinos completos e continuações com delta
+    model = Pipeline([("pre", pre), (step, estimator)])
+    sq_err = correct = 0.0
+    holdout_rows = 0
+    for chunk in chunks(since=0):
+        X, y, _, holdout_mask = _split_xy(chunk, target, target_map, holdout_every)
+        if holdout_mask.any():
+            holdout_rows += int(holdout_mask.sum())
+            pred = model.predict(X[holdout_mask].pipe(spec.transform))
+            sq_err += float(np.sum((y[holdout_mask] - pred) ** 2))
+            correct += float(np.sum(y[holdout_mask] == pred))
+    if task == "classification":
+        metrics = {"accuracy": correct / holdout_rows if holdout_rows else None}
+    else:
+        metrics = {"rmse": float(np.sqrt(sq_err / holdout_rows)) if holdout_rows else None}
+
+    report = {
+        "metrics": metrics,
+        "train_rows": train_rows,
+        "holdout_rows": holdout_rows,
+        "epochs": epochs,
+        "warm_start": warm_start is not None,
+        "since_rowid": since_rowid,
+        "last_rowid": int(max_rowid),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    print(f"Treino incremental concluído: {train_rows} linhas x {epochs} épocas em {report['seconds']}s.")
+    return model, spec, report
+
+
+def warm_start_from(registry, name, base_hash):
+    """
+    (modelo, FeatureSpec, last_rowid, versão) da versão mais recente treinada em blocos sobre a base
+    `base_hash` (a tabela antes do delta atual); sem ela, (None, None, 0, None) e o treino é completo.
+    Continuar um modelo treinado em outros dados misturaria bases diferentes no mesmo modelo.
+    """
+    if base_hash is None:
+        return None, None, 0, None
+    for meta in reversed(registry.list_versions(name)):
+        if meta.get("data_hash") == base_hash and "last_rowid" in (meta.get("params") or {}):
+            model, meta = registry.load(name, meta["version"])
+            return model, FeatureSpec.from_dict(meta["feature_spec"]), meta["params"]["last_rowid"], meta["version"]
+    return None, None, 0, None
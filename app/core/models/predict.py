@@ -1,18 +1,227 @@
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix, mean_squared_error
+import math
+
 import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+DEFAULT_THRESHOLD = 0.5
+CALIBRATION_BINS = 10
+BOOTSTRAP_SAMPLES = 200
+BOOTSTRAP_ALPHA = 0.05
+# Tamanho de cada bloco de reamostras (reamostras x linhas); cada bloco vai para um worker
+BOOTSTRAP_BATCH_CELLS = 2_000_000
+
+
+def _sorted_scores(y_true, scores):
+    """
+    Ordena uma única vez (score decrescente). Retorna y e scores nessa ordem e o último índice de
+    cada grupo de scores empatados: cada grupo é um limiar distinto da varredura.
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    scores = np.asarray(scores, dtype=np.float64)
+    order = np.argsort(-scores, kind="mergesort")
+    y, s = y_true[order], scores[order]
+    ends = np.r_[np.flatnonzero(np.diff(s)), len(s) - 1]
+    return y, s, ends
+
+
+def _curve_metrics(tp, fp, threshold_idx):
+    """
+    Métricas a partir das contagens acumuladas por limiar (linhas = reamostras, colunas = limiares).
+    threshold_idx: coluna do limiar de decisão (-1 = nenhum positivo previsto).
+    """
+    pos, neg = tp[:, -1], fp[:, -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tpr = np.c_[np.zeros(len(tp)), tp / pos[:, None]]
+        fpr = np.c_[np.zeros(len(fp)), fp / neg[:, None]]
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 1.0)
+        roc_auc = np.sum(np.diff(fpr, axis=1) * (tpr[:, 1:] + tpr[:, :-1]) / 2, axis=1)
+        # Average precision (mesma definição do sklearn): soma de ΔRecall x Precision
+        pr_auc = np.sum(np.diff(tpr, axis=1) * precision, axis=1)
+        if threshold_idx >= 0:
+            tp_t, fp_t = tp[:, threshold_idx], fp[:, threshold_idx]
+        else:
+            tp_t = fp_t = np.zeros(len(tp))
+        fn_t, tn_t = pos - tp_t, neg - fp_t
+        metrics = {
+            "accuracy": (tp_t + tn_t) / (pos + neg),
+            "precision": np.where(tp_t + fp_t > 0, tp_t / (tp_t + fp_t), 0.0),
+            "recall": np.where(pos > 0, tp_t / pos, 0.0),
+            "f1": np.where(2 * tp_t + fp_t + fn_t > 0, 2 * tp_t / (2 * tp_t + fp_t + fn_t), 0.0),
+            "roc_auc": roc_auc,
+            "pr_auc": pr_auc,
+        }
+    return metrics
+
+
+def _threshold_index(thresholds, threshold):
+    # Último grupo com score >= limiar (thresholds em ordem decrescente)
+    return int(np.searchsorted(-thresholds, -threshold, side="right")) - 1
+
+
+def threshold_sweep(y_true, scores):
+    """
+    Contagens da matriz de confusão e precisão/recall/F1 para todos os limiares distintos,
+    com uma única ordenação (O(n log n)). Positivo previsto = score >= limiar.
+    """
+    y, s, ends = _sorted_scores(y_true, scores)
+    tp = np.cumsum(y)[ends]
+    fp = (ends + 1) - tp
+    pos, neg = tp[-1], fp[-1]
+    fn, tn = pos - tp, neg - fp
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return pd.DataFrame({
+            "threshold": s[ends],
+            "tp": tp, "fp": fp, "fn": fn, "tn": tn,
+            "precision": np.where(tp + fp > 0, tp / (tp + fp), 1.0),
+            "recall": tp / pos if pos else np.zeros(len(tp)),
+            "f1": 2 * tp / (2 * tp + fp + fn),
+            "fpr": fp / neg if neg else np.zeros(len(fp)),
+            "accuracy": (tp + tn) / len(y),
+        })
+
+
+def calibration_bins(y_true, scores, n_bins=CALIBRATION_BINS):
+    """Taxa observada vs. score médio em faixas iguais de [0, 1] (scores fora do intervalo vão para as pontas)."""
+    y_true = np.asarray(y_true, dtype=np.float64)
+    scores = np.asarray(scores, dtype=np.float64)
+    idx = np.clip((scores * n_bins).astype(int), 0, n_bins - 1)
+    count = np.bincount(idx, minlength=n_bins)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return pd.DataFrame({
+            "lower": np.arange(n_bins) / n_bins,
+            "upper": np.arange(1, n_bins + 1) / n_bins,
+            "count": count,
+            "mean_score": np.bincount(idx, weights=scores, minlength=n_bins) / count,
+            "observed_rate": np.bincount(idx, weights=y_true, minlength=n_bins) / count,
+        })
+
+
+def _bootstrap_batch(y, s, ends, threshold_idx, n_samples, seed):
+    # Reamostra = pesos (quantas vezes cada linha foi sorteada) sobre a ordem já ordenada:
+    # as curvas de cada reamostra saem de somas acumuladas, sem reordenar
+    n = len(y)
+    rng = np.random.default_rng(seed)
+    draws = rng.integers(0, n, size=(n_samples, n)) + (np.arange(n_samples) * n)[:, None]
+    weights = np.bincount(draws.ravel(), minlength=n_samples * n).reshape(n_samples, n).astype(np.float64)
+    tp = np.cumsum(weights * y, axis=1)[:, ends]
+    fp = np.cumsum(weights * (1 - y), axis=1)[:, ends]
+    metrics = _curve_metrics(tp, fp, threshold_idx)
+    sq_err = weights @ (y - s) ** 2
+    metrics["rmse"] = np.sqrt(sq_err / n)
+    return metrics
+
+
+def bootstrap_ci(y_true, scores, threshold=DEFAULT_THRESHOLD, n_boot=BOOTSTRAP_SAMPLES,
+                 alpha=BOOTSTRAP_ALPHA, n_jobs=-1, random_state=42):
+    """
+    Intervalos de confiança (percentis) por bootstrap para RMSE, ROC-AUC, PR-AUC e as métricas no limiar.
+    As reamostras são vetorizadas em blocos; com mais de um bloco, os blocos rodam em paralelo (joblib).
+    """
+    y, s, ends = _sorted_scores(y_true, scores)
+    threshold_idx = _threshold_index(s[ends], threshold)
+    n_batches = max(1, min(n_boot, math.ceil(n_boot * len(y) / BOOTSTRAP_BATCH_CELLS)))
+    sizes = [len(b) for b in np.array_split(np.arange(n_boot), n_batches)]
+    seeds = np.random.SeedSequence(random_state).spawn(n_batches)
+    if n_batches == 1:
+        batches = [_bootstrap_batch(y, s, ends, threshold_idx, sizes[0], seeds[0])]
+    else:
+        batches = Parallel(n_jobs=n_jobs)(
+            delayed(_bootstrap_batch)(y, s, ends, threshold_idx, size, seed) for size, seed in zip(sizes, seeds)
+        )
+    ci = {}
+    for name in batches[0]:
+        values = np.concatenate([b[name] for b in batches])
+        values = values[np.isfinite(values)]  # reamostras com uma única classe não têm AUC
+        if len(values):
+            lo, hi = np.percentile(values, [100 * alpha / 2, 100 * (1 - alpha / 2)])
+            ci[name] = [float(lo), float(hi)]
+    return ci
+
+
+def evaluate_scores(y_true, scores, threshold=DEFAULT_THRESHOLD, n_bins=CALIBRATION_BINS,
+                    n_boot=BOOTSTRAP_SAMPLES, n_jobs=-1, random_state=42):
+    """
+    Avaliação completa de scores para um alvo 0/1: métricas no limiar, ROC-AUC, PR-AUC, Brier,
+    erro de calibração (ECE) e o melhor limiar por F1; mais a varredura de limiares, as faixas de
+    calibração e os intervalos de confiança por bootstrap (n_boot=0 desliga).
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    scores = np.asarray(scores, dtype=np.float64)
+    sweep = threshold_sweep(y_true, scores)
+    tp, fp = sweep["tp"].to_numpy()[None], sweep["fp"].to_numpy()[None]
+    curve = _curve_metrics(tp, fp, _threshold_index(sweep["threshold"].to_numpy(), threshold))
+    calibration = calibration_bins(y_true, scores, n_bins)
+    filled = calibration["count"] > 0
+    ece = float(np.sum(calibration["count"][filled] / len(y_true)
+                       * np.abs(calibration["observed_rate"][filled] - calibration["mean_score"][filled])))
+    best = sweep["f1"].idxmax()
+    metrics = {name: float(values[0]) for name, values in curve.items()}
+    metrics.update({
+        "brier": float(np.mean((y_true - scores) ** 2)),
+        "ece": ece,
+        "threshold": float(threshold),
+        "best_threshold": float(sweep["threshold"][best]),
+        "best_f1": float(sweep["f1"][best]),
+    })
+    ci = bootstrap_ci(y_true, scores, threshold, n_boot, n_jobs=n_jobs, random_state=random_state) if n_boot else {}
+    return {"metrics": metrics, "ci": ci, "sweep": sweep, "calibration": calibration}
+
+
+def _is_binary(y):
+    y = np.asarray(y)
+    return np.issubdtype(y.dtype, np.number) and np.isin(np.unique(y), [0, 1]).all()
+
+
+def _evaluation(report, keys):
+    """Bloco `evaluation`: métricas de curva/calibração escolhidas + intervalos (só com bootstrap)."""
+    evaluation = {k: report["metrics"][k] for k in keys}
+    if report["ci"]:
+        evaluation["ci"] = report["ci"]
+    return evaluation
+
+
+def headline_metrics(metrics):
+    """Métricas escalares do topo (sem o bloco `evaluation`): o que vai para o chat e o prompt do LLM."""
+    if not isinstance(metrics, dict):
+        return metrics
+    return {k: v for k, v in metrics.items() if not isinstance(v, dict)}
+
+
+def evaluate_classifier(model, X_test, y_test, threshold=DEFAULT_THRESHOLD, pos_label=1, n_boot=0, n_jobs=-1):
+    """
+    Métricas no limiar (accuracy, precision, recall, f1) e a matriz de confusão [[tn, fp], [fn, tp]].
+    Os rótulos podem ser de qualquer tipo (ex.: "Y"/"N"): `pos_label` é a classe positiva.
+    `evaluation` traz ROC-AUC, PR-AUC, Brier, ECE e o melhor limiar; com n_boot > 0, também os intervalos.
+    """
+    classes = list(model.classes_)
+    scores = model.predict_proba(X_test)[:, classes.index(pos_label)]
+    y_true = (np.asarray(y_test) == pos_label).astype(np.float64)
+    report = evaluate_scores(y_true, scores, threshold, n_boot=n_boot, n_jobs=n_jobs)
+    metrics = {k: report["metrics"][k] for k in ("accuracy", "precision", "recall", "f1")}
+    metrics["evaluation"] = _evaluation(report, ("roc_auc", "pr_auc", "brier", "ece", "best_threshold", "best_f1"))
+    sweep = report["sweep"]
+    idx = _threshold_index(sweep["threshold"].to_numpy(), threshold)
+    if idx >= 0:
+        tp, fp, fn, tn = (int(sweep[c].iloc[idx]) for c in ("tp", "fp", "fn", "tn"))
+    else:
+        # Nenhum score acima do limiar: tudo previsto como negativo
+        tp, fp = 0, 0
+        fn, tn = int(sweep["tp"].iloc[-1]), int(sweep["fp"].iloc[-1])
+    return metrics, [[tn, fp], [fn, tp]]
+
 
-def evaluate_classifier(model, X_test, y_test):
-    y_pred = model.predict(X_test)
-    metrics = {
-        "accuracy": float(accuracy_score(y_test, y_pred)),
-        "precision": float(precision_score(y_test, y_pred, zero_division=0)),
-        "recall": float(recall_score(y_test, y_pred, zero_division=0)),
-        "f1": float(f1_score(y_test, y_pred, zero_division=0)),
-    }
-    cm = confusion_matrix(y_test, y_pred).tolist()
-    return metrics, cm
-
-def evaluate_regressor(model, X_test, y_test):
-    y_pred = model.predict(X_test)
-    rmse = float(np.sqrt(mean_squared_error(y_test, y_pred)))
-    return {"rmse": rmse}
+def evaluate_regressor(model, X_test, y_test, threshold=DEFAULT_THRESHOLD, n_boot=0, n_jobs=-1):
+    """
+    {"rmse": ...}; com alvo 0/1 (saída da regressão usada como score de aprovação), o bloco
+    `evaluation` traz as métricas de decisão no limiar, ROC-AUC, PR-AUC, ECE e o melhor limiar
+    (e os intervalos por bootstrap com n_boot > 0).
+    """
+    y_pred = np.asarray(model.predict(X_test), dtype=np.float64)
+    y_true = np.asarray(y_test)
+    rmse = float(np.sqrt(np.mean((y_true - y_pred) ** 2)))
+    if not _is_binary(y_true):
+        return {"rmse": rmse}
+    report = evaluate_scores(y_true, y_pred, threshold, n_boot=n_boot, n_jobs=n_jobs)
+    keys = ("accuracy", "precision", "recall", "f1", "roc_auc", "pr_auc", "ece", "threshold", "best_threshold", "best_f1")
+    return {"rmse": rmse, "evaluation": _evaluation(report, keys)}
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import joblib
+
+# Reexportados: o hash dos dados (`data_hash`) é calculado na camada de dados
+from core.data.fingerprint import append_fingerprint, dataframe_fingerprint, frames_fingerprint
+
+ARTIFACT_NAME = "model.joblib"
+METADATA_NAME = "metadata.json"
+# Números de versão já reservados (uma pasta vazia por número)
+CLAIMS_DIR = ".claims"
+# Quantos modelos carregados ficam em memória (compartilhados por todas as sessões)
+MAX_LOADED_MODELS = 4
+
+_LOADED = OrderedDict()
+_LOADED_LOCK = threading.Lock()
+
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _version_number(entry):
+    """Número da versão a partir do nome da pasta (`v0012-<hash>` -> 12)."""
+    return int(entry[1:].split("-", 1)[0])
+
+
+class ModelRegistry:
+    """
+    Registro de modelos versionados por conteúdo.
+
+    Cada versão fica em `<raiz>/<nome>/v0001-<hash>/` com o artefato joblib (sem compressão,
+    para que os arrays NumPy possam ser mapeados em memória) e um metadata.json
+    (hash dos dados, parâmetros, métricas e o FeatureSpec usado no treino).
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def _model_dir(self, name):
+        return os.path.join(self.root, name)
+
+    def _version_dirs(self, name):
+        """Nomes das pastas de versão (`v0001-<hash>`), da mais antiga para a mais nova."""
+        model_dir = self._model_dir(name)
+        if not os.path.isdir(model_dir):
+            return []
+        entries = [e for e in os.listdir(model_dir) if e.startswith("v") and "-" in e]
+        return sorted(entries, key=_version_number)
+
+    def _read_meta(self, name, version):
+        meta_path = os.path.join(self._model_dir(name), version, METADATA_NAME)
+        if not os.path.exists(meta_path):
+            # Versão reservada por um save ainda em andamento (ou interrompido)
+            return None
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def list_versions(self, name):
+        """Metadados de todas as versões do modelo, da mais antiga para a mais nova."""
+        versions = (self._read_meta(name, v) for v in self._version_dirs(name))
+        return [meta for meta in versions if meta is not None]
+
+    def get(self, name, version=None):
+        """
+        Metadados da versão pedida (ou da mais recente); None se não existir.
+        Lê só o metadata.json da versão: a ordem vem dos nomes das pastas.
+        """
+        if version is not None:
+            return self._read_meta(name, version)
+        for entry in reversed(self._version_dirs(name)):
+            meta = self._read_meta(name, entry)
+            if meta is not None:
+                return meta
+        return None
+
+    def _claim_number(self, name):
+        """
+        Reserva o próximo número de versão com os.mkdir em `<nome>/.claims/` (atômico).
+        Processos concorrentes nunca recebem o mesmo número; quem perde a corrida tenta o seguinte.
+        """
+        claims_dir = os.path.join(self._model_dir(name), CLAIMS_DIR)
+        os.makedirs(claims_dir, exist_ok=True)
+        while True:
+            taken = [int(c) for c in os.listdir(claims_dir) if c.isdigit()]
+            taken += [_version_number(v) for v in self._version_dirs(name)]
+            number = max(taken, default=0) + 1
+            try:
+                os.mkdir(os.path.join(claims_dir, f"{number:04d}"))
+                return number
+            except FileExistsError:
+                continue
+
+    def save(self, model, name, data_hash=None, params=None, metrics=None, feature_spec=None):
+        """
+        Salva o modelo e retorna os metadados da versão.
+        Um artefato idêntico a uma versão existente não gera versão nova.
+        """
+        model_dir = self._model_dir(name)
+        os.makedirs(model_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=".save-", dir=model_dir)
+        try:
+            tmp_path = os.path.join(tmp_dir, ARTIFACT_NAME)
+            joblib.dump(model, tmp_path)
+            content_hash = _sha256_file(tmp_path)
+
+            # O hash curto está no nome da pasta: só as candidatas têm o metadata lido
+            for entry in self._version_dirs(name):
+                if entry.endswith(f"-{content_hash[:12]}"):
+                    meta = self._read_meta(name, entry)
+                    if meta is not None and meta["content_hash"] == content_hash:
+                        return meta
+
+            version = f"v{self._claim_number(name):04d}-{content_hash[:12]}"
+            version_dir = os.path.join(model_dir, version)
+            os.mkdir(version_dir)
+
+            artifact_path = os.path.join(version_dir, ARTIFACT_NAME)
+            os.replace(tmp_path, artifact_path)
+            meta = {
+                "name": name,
+                "version": version,
+                "content_hash": content_hash,
+                "path": artifact_path,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "data_hash": data_hash,
+                "params": params or {},
+                "metrics": metrics or {},
+                "feature_spec": feature_spec,
+            }
+            # metadata.json aparece de uma vez: leitores nunca veem uma versão pela metade
+            meta_tmp = os.path.join(tmp_dir, METADATA_NAME)
+            with open(meta_tmp, "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2, default=str)
+            os.replace(meta_tmp, os.path.join(version_dir, METADATA_NAME))
+            return meta
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def load(self, name, version=None):
+        """
+        Carrega o modelo (arrays mapeados em memória, somente leitura).
+        O cache é do processo: sessões e cliques repetidos compartilham a mesma cópia.
+        """
+        meta = self.get(name, version)
+        if meta is None:
+            raise FileNotFoundError(f"Nenhuma versão registrada para o modelo '{name}'.")
+        return load_artifact(meta["path"], meta["content_hash"]), meta
+
+    def clear(self):
+        """Remove todas as versões do registro e esvazia o cache de modelos carregados."""
+        clear_loaded_models()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def load_artifact(path, content_hash=None):
+    """Carrega um artefato joblib com mmap, reaproveitando o cache do processo (LRU)."""
+    key = content_hash or os.path.abspath(path)
+    with _LOADED_LOCK:
+        if key in _LOADED:
+            _LOADED.move_to_end(key)
+            return _LOADED[key]
+    model = joblib.load(path, mmap_mode="r")
+    with _LOADED_LOCK:
+        _LOADED[key] = model
+        _LOADED.move_to_end(key)
+        while len(_LOADED) > MAX_LOADED_MODELS:
+            _LOADED.popitem(last=False)
+    return model
+
+
+def clear_loaded_models():
+    with _LOADED_LOCK:
+        _LOADED.clear()
@@ -0,0 +1,67 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import core.data.database as database
+
+
+def stage_key(stage, upstream, params=None):
+    """
+    Chave de um estágio = hash(estágio, saída do estágio anterior, parâmetros do estágio).
+    O estágio seguinte é chaveado pela *saída* deste: mudar os parâmetros de um estágio invalida
+    só os estágios depois dele, e refazer um estágio com o mesmo resultado não invalida nenhum.
+    """
+    payload = json.dumps({"stage": stage, "upstream": upstream, "params": params or {}},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+class RunCache:
+    """
+    Cache de execuções do pipeline em disco, endereçado por conteúdo.
+
+    `<raiz>/<estágio>/<chave>.json` guarda as saídas de cada estágio (versões, hashes, métricas).
+    Os dados em si não são copiados: o ETL guarda só a versão e o hash da tabela publicada.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def _entry_path(self, stage, key):
+        return os.path.join(self.root, stage, f"{key}.json")
+
+    def get(self, stage, key):
+        """Saídas registradas para a chave do estágio; None se o estágio nunca rodou com ela."""
+        path = self._entry_path(stage, key)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def put(self, stage, key, outputs):
+        """Registra as saídas do estágio (gravação atômica) e retorna a entrada."""
+        entry = {"stage": stage, "key": key, "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), **outputs}
+        path = self._entry_path(stage, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False, indent=2, default=str)
+        os.replace(tmp_path, path)
+        return entry
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def table_outputs(table_name):
+    """
+    Saídas de um estágio de ETL: versão publicada da tabela e o hash do conteúdo gravado por
+    publish_table (a carga incremental encadeia o hash do delta; a tabela não é relida aqui).
+    """
+    return {
+        "table": table_name,
+        "table_version": database.get_table_version(table_name),
+        "data_hash": database.get_table_hash(table_name),
+    }
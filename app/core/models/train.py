@@ -1,7 +1,31 @@
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression, LinearRegression
+import math
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from joblib import Parallel, delayed
+from sklearn.base import clone, is_classifier
+from sklearn.model_selection import train_test_split, KFold, StratifiedKFold, ParameterGrid
+from sklearn.linear_model import LogisticRegression, LinearRegression, Ridge
+from sklearn.metrics import get_scorer
 from sklearn.pipeline import Pipeline
 
+# Espaços de busca padrão de tune_classifier / tune_regressor
+CLASSIFIER_GRID = {
+    "C": [0.01, 0.1, 1.0, 10.0, 100.0],
+    "solver": ["lbfgs", "liblinear"],
+    "class_weight": [None, "balanced"],
+}
+REGRESSOR_GRID = {
+    "alpha": [0.01, 0.1, 1.0, 10.0, 100.0],
+    "solver": ["cholesky", "lsqr", "sparse_cg"],
+}
+# Solvers do Ridge que não ajustam o intercepto com matriz esparsa (o sklearn recusa com ValueError)
+RIDGE_DENSE_ONLY_SOLVERS = {"svd", "cholesky", "saga"}
+CV_FOLDS = 5
+HALVING_FACTOR = 3      # a cada rodada fica 1/3 dos candidatos, com 3x mais linhas
+MIN_ROWS = 50           # menor amostra de treino usada na primeira rodada
+
 def split(X, y, test_size=0.2, random_state=42):
     return train_test_split(X, y, test_size=test_size, random_state=random_state, stratify=None)
 
@@ -18,3 +42,106 @@ def train_regressor(X, y, pre, test_size=0.2):
     model = Pipeline([("pre", pre), ("reg", reg)])
     model.fit(X_train, y_train)
     return model, X_test, y_test
+
+def _fit_fold(pre, X_train, y_train, X_val, y_val, order):
+    # Pré-processamento ajustado uma vez por fold; as linhas de treino saem embaralhadas
+    # para que qualquer prefixo seja uma amostra aleatória (rodadas com menos linhas)
+    pre = clone(pre).fit(X_train, y_train)
+    return pre.transform(X_train.iloc[order]), y_train[order], pre.transform(X_val), y_val
+
+def _fit_score(estimator, params, X_train, y_train, X_val, y_val, scorer):
+    if is_classifier(estimator) and len(np.unique(y_train)) < 2:
+        # Amostra pequena da primeira rodada com uma única classe: candidato sem nota nesta rodada
+        return -np.inf
+    try:
+        model = clone(estimator).set_params(**params).fit(X_train, y_train)
+        return float(scorer(model, X_val, y_val))
+    except ValueError as e:
+        # Com dados válidos, a falha vem da configuração (grade incompatível com o estimador ou a matriz)
+        raise ValueError(f"Candidato {params} inválido para {type(estimator).__name__}: {e}") from e
+
+def _sparse_safe_grid(estimator, grid):
+    """Remove da grade os solvers do Ridge que não aceitam matriz esparsa com intercepto."""
+    if not (isinstance(estimator, Ridge) and estimator.fit_intercept):
+        return grid
+    grids = []
+    for g in (grid if isinstance(grid, list) else [grid]):
+        solvers = g.get("solver")
+        if solvers is not None:
+            dropped = [s for s in solvers if s in RIDGE_DENSE_ONLY_SOLVERS]
+            if dropped:
+                print(f"Matriz esparsa: solvers {dropped} removidos da busca.")
+                g = {**g, "solver": [s for s in solvers if s not in RIDGE_DENSE_ONLY_SOLVERS] or ["sparse_cg"]}
+        grids.append(g)
+    return grids if isinstance(grid, list) else grids[0]
+
+def _tune(estimator, step, grid, X, y, pre, test_size, cv, eta, scoring, stratified, n_jobs, random_state):
+    start = time.perf_counter()
+    X_train, X_test, y_train, y_test = split(X, y, test_size=test_size, random_state=random_state)
+    y_arr = np.asarray(y_train)
+    scorer = get_scorer(scoring)
+    rng = np.random.default_rng(random_state)
+    splitter = (StratifiedKFold if stratified else KFold)(n_splits=cv, shuffle=True, random_state=random_state)
+
+    with Parallel(n_jobs=n_jobs) as parallel:
+        folds = parallel(
+            delayed(_fit_fold)(pre, X_train.iloc[tr], y_arr[tr], X_train.iloc[va], y_arr[va], rng.permutation(len(tr)))
+            for tr, va in splitter.split(X_train, y_arr)
+        )
+
+        if sp.issparse(folds[0][0]):
+            grid = _sparse_safe_grid(estimator, grid)
+
+        # Successive halving: todos os candidatos começam com poucas linhas; os melhores
+        # 1/eta avançam para a rodada seguinte, com eta vezes mais linhas (a última usa o fold inteiro)
+        candidates = list(ParameterGrid(grid))
+        n_rungs = max(math.ceil(math.log(len(candidates), eta)), 1)
+        fold_rows = min(len(f[1]) for f in folds)
+        rungs, n_fits = [], 0
+        for rung in range(n_rungs):
+            n_rows = fold_rows if rung == n_rungs - 1 else min(max(int(fold_rows * eta ** (rung - n_rungs + 1)), MIN_ROWS), fold_rows)
+            scores = parallel(
+                delayed(_fit_score)(estimator, params, Xtr[:n_rows], ytr[:n_rows], Xva, yva, scorer)
+                for params in candidates for Xtr, ytr, Xva, yva in folds
+            )
+            n_fits += len(scores)
+            means = np.asarray(scores, dtype=float).reshape(len(candidates), cv).mean(axis=1)
+            order = np.argsort(-means, kind="stable")
+            rungs.append({"rung": rung, "n_rows": n_rows, "candidates": len(candidates),
+                          "best_score": float(means[order[0]]), "best_params": candidates[order[0]]})
+            if rung < n_rungs - 1:
+                candidates = [candidates[i] for i in order[:math.ceil(len(candidates) / eta)]]
+    best_params, best_score = candidates[order[0]], float(means[order[0]])
+
+    # Modelo final: pré-processamento ajustado uma vez no treino inteiro + melhor configuração
+    pre = clone(pre).fit(X_train, y_train)
+    final = clone(estimator).set_params(**best_params).fit(pre.transform(X_train), y_arr)
+    model = Pipeline([("pre", pre), (step, final)])
+    search = {
+        "best_params": best_params,
+        "best_score": best_score,
+        "scoring": scoring,
+        "cv": cv,
+        "n_candidates": len(ParameterGrid(grid)),
+        "n_fits": n_fits + 1,
+        "rungs": rungs,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    return model, X_test, y_test, search
+
+def tune_classifier(X, y, pre, test_size=0.2, param_grid=None, cv=CV_FOLDS, eta=HALVING_FACTOR,
+                    scoring="roc_auc", n_jobs=-1, random_state=42):
+    """
+    Busca de hiperparâmetros da regressão logística (C, solver, class_weight) com validação
+    cruzada estratificada em k folds e successive halving. O pré-processamento é ajustado uma
+    vez por fold e reaproveitado por todos os candidatos; folds e candidatos rodam em paralelo (joblib).
+    Retorna (modelo, X_test, y_test, resumo da busca).
+    """
+    return _tune(LogisticRegression(max_iter=1000), "clf", param_grid or CLASSIFIER_GRID, X, y, pre,
+                 test_size, cv, eta, scoring, True, n_jobs, random_state)
+
+def tune_regressor(X, y, pre, test_size=0.2, param_grid=None, cv=CV_FOLDS, eta=HALVING_FACTOR,
+                   scoring="neg_root_mean_squared_error", n_jobs=-1, random_state=42):
+    """Como tune_classifier, para regressão Ridge (alpha, solver) com k folds simples."""
+    return _tune(Ridge(), "reg", param_grid or REGRESSOR_GRID, X, y, pre,
+                 test_size, cv, eta, scoring, False, n_jobs, random_state)
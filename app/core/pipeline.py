@@ -0,0 +1,176 @@
+import pandas as pd
+
+from core.data.database import (
+    create_database_and_tables,
+    migrate_database,
+    insert_csv_to_sor,
+    run_etl_sor_to_sot,
+    run_etl_sot_to_spec_train,
+    run_etl_incremental,
+    run_etl_for_test_data,
+    load_data,
+    get_table_version,
+    get_table_hash,
+    drop_database,
+)
+import core.data.database as database
+from core.data.io import read_csv_smart
+from core.explain.coefficients import extract_linear_importances
+from core.features.preprocess import make_preprocess_pipeline
+from core.features.spec import FeatureSpec
+from core.models.batch import run_batch_scoring
+from core.models.incremental import train_incremental, warm_start_from
+from core.models.predict import evaluate_regressor
+from core.models.runs import stage_key, table_outputs
+from core.models.train import train_regressor, tune_regressor
+from core.retrieval.index import load_retrieval_index, remove_indexes
+
+TRAIN_TABLE = "spec_emprestimo_train"
+TARGET = "Loan_Status"
+CSV_CHUNKSIZE = 100_000
+
+
+def model_importances(model) -> pd.DataFrame:
+    """Importâncias (coeficientes) de um Pipeline linear treinado."""
+    pre = model.named_steps["pre"]
+    return extract_linear_importances(model, pre.feature_names_in_, pre)
+
+
+def _run_etl(runs, train_file, digest, incremental, chunksize):
+    """Estágio ETL; pulado se este upload já foi carregado e o banco ainda tem essa versão."""
+    # Chave sem a versão da base: repetir a mesma carga incremental reaproveita a execução em vez de republicar
+    etl_key = stage_key("etl", digest, {"incremental": incremental})
+    etl_run = runs.get("etl", etl_key)
+    if etl_run is not None and get_table_version(TRAIN_TABLE) == etl_run["table_version"]:
+        return etl_run, True
+
+    # Leitura em blocos: o pico de memória fica em torno de um bloco do CSV
+    chunks = read_csv_smart(train_file, chunksize=chunksize)
+    # Hash da base antes do delta: liga esta carga ao modelo que pode ser continuado (warm start)
+    base_hash = get_table_hash(TRAIN_TABLE) if incremental else None
+    if incremental:
+        # Carga diária: anexa o delta e processa apenas as linhas novas
+        migrate_database()
+        insert_csv_to_sor(chunks, incremental=True)
+        run_etl_incremental()
+    else:
+        create_database_and_tables()
+        insert_csv_to_sor(chunks)
+        run_etl_sor_to_sot(mode="sql")
+        run_etl_sot_to_spec_train(mode="sql")
+        # Carga completa: o índice de busca do chat já fica pronto (no incremental, na primeira busca)
+        load_retrieval_index(TRAIN_TABLE)
+    return runs.put("etl", etl_key, {**table_outputs(TRAIN_TABLE), "base_hash": base_hash}), False
+
+
+def _fit_in_memory(test_size, tune, sparse):
+    """LinearRegression (ou Ridge com busca por CV) sobre a SPEC inteira em memória."""
+    df_spec_train = load_data(TRAIN_TABLE)
+    y = df_spec_train[TARGET].map({'Y': 1, 'N': 0})
+    X = df_spec_train.drop(columns=[TARGET])
+
+    # Colunas especiais e imputação (ajustadas uma vez, reaplicadas na previsão)
+    spec = FeatureSpec().fit(X)
+    X = spec.transform(X)
+
+    pre = make_preprocess_pipeline(X, sparse=sparse)
+    params = {"estimator": "LinearRegression", "test_size": test_size}
+    if tune:
+        # Ridge com alpha/solver escolhidos por CV; o melhor é reajustado no treino inteiro
+        model, X_test, y_test, search = tune_regressor(X, y, pre, test_size=test_size)
+        params = {"estimator": "Ridge", "test_size": test_size, **search["best_params"],
+                  "cv_score": search["best_score"], "cv_fits": search["n_fits"]}
+    else:
+        model, X_test, y_test = train_regressor(X, y, pre, test_size=test_size)
+    params["sparse"] = sparse
+    return model, spec, evaluate_regressor(model, X_test, y_test), params
+
+
+def _fit_out_of_core(registry, model_name, test_size, base_hash):
+    """
+    SGDRegressor em blocos lidos direto do SQLite. Com `base_hash` (carga incremental), continua
+    só com o delta a versão treinada em blocos sobre essa base; sem ela, treina na tabela inteira.
+    """
+    warm_model, spec, since_rowid, base_version = warm_start_from(registry, model_name, base_hash)
+    model, spec, report = train_incremental(
+        test_size=test_size, warm_start=warm_model, spec=spec, since_rowid=since_rowid)
+    params = {"estimator": "SGDRegressor", "test_size": test_size, "epochs": report["epochs"],
+              "warm_start": report["warm_start"], "last_rowid": report["last_rowid"],
+              "warm_start_from": base_version if report["warm_start"] else None}
+    return model, spec, report["metrics"], params
+
+
+def _run_fit(registry, runs, model_name, etl_run, test_size, out_of_core, tune, sparse, warm_start):
+    """Estágio de treino, chaveado pelo conteúdo da SPEC (não pelo upload) + parâmetros."""
+    fit_key = stage_key("fit", etl_run["data_hash"], {
+        "test_size": test_size, "out_of_core": out_of_core, "tune": tune, "sparse": sparse,
+        "warm_start": warm_start,
+    })
+    fit_run = runs.get("fit", fit_key)
+    if fit_run is not None and registry.get(model_name, fit_run["version"]) is not None:
+        # Mesmos dados e parâmetros: reaproveita modelo, métricas e importâncias já registrados
+        return fit_run, True
+
+    if out_of_core:
+        base_hash = etl_run.get("base_hash") if warm_start else None
+        model, spec, metrics, params = _fit_out_of_core(registry, model_name, test_size, base_hash)
+    else:
+        model, spec, metrics, params = _fit_in_memory(test_size, tune, sparse)
+
+    # Nova versão no registro (o FeatureSpec vai junto nos metadados)
+    model_meta = registry.save(
+        model, model_name,
+        data_hash=etl_run["data_hash"],
+        params=params,
+        metrics=metrics,
+        feature_spec=spec.to_dict(),
+    )
+    return runs.put("fit", fit_key, {
+        "version": model_meta["version"],
+        "warm_start_from": params.get("warm_start_from"),
+        "metrics": metrics,
+        "importances": model_importances(model).to_dict("records"),
+    }), False
+
+
+def run_training(registry, runs, model_name, train_file, digest, test_size=0.2, incremental=False,
+                 out_of_core=False, tune=False, sparse=False, chunksize=CSV_CHUNKSIZE):
+    """
+    Fluxo do botão "Executar Treino": CSV -> SOR -> SOT -> SPEC -> modelo no registro.
+    Cada estágio é pulado quando o cache de execuções já tem a sua saída.
+
+    Retorna (entrada do estágio de treino: version, metrics, importances; estágios reaproveitados).
+    """
+    reused = []
+    etl_run, etl_reused = _run_etl(runs, train_file, digest, incremental, chunksize)
+    if etl_reused:
+        reused.append("ETL")
+    fit_run, fit_reused = _run_fit(registry, runs, model_name, etl_run, test_size, out_of_core, tune, sparse,
+                                   warm_start=out_of_core and incremental)
+    if fit_reused:
+        reused.append("treino")
+    return fit_run, reused
+
+
+def run_scoring(registry, model_name, version, df_test):
+    """
+    Fluxo do botão de previsões: limpa o lote com o FeatureSpec da versão e pontua em blocos.
+    Retorna (relatório da execução, DataFrame Loan_ID + Loan_Status).
+    """
+    # Modelo em cache no processo: cliques repetidos não desserializam de novo
+    model, model_meta = registry.load(model_name, version)
+    # Limpeza com os valores aprendidos no treino (não recalcula no lote)
+    run_etl_for_test_data(df_test, FeatureSpec.from_dict(model_meta["feature_spec"]))
+    # Pontuação em blocos; o resultado fica na tabela `predictions`
+    report = run_batch_scoring(model_meta["path"], model_version=model_meta["version"], model=model)
+    result_df = load_data(
+        "predictions", columns=["Loan_ID", "score"],
+        where="run_id = ?", params=(report["run_id"],)
+    ).rename(columns={"score": "Loan_Status"})
+    return report, result_df
+
+
+def reset_database():
+    """Botão "Limpar Tudo": remove o banco com seus artefatos e os índices de busca."""
+    remove_indexes(database.DB_NAME)
+    drop_database()
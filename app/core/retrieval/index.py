@@ -0,0 +1,403 @@
+import functools
+import glob
+import json
+import os
+import re
+import shutil
+import threading
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+import core.data.database as database
+
+# Tabelas com índice de busca (um por versão publicada pelo ETL)
+RETRIEVAL_TABLES = ("spec_emprestimo_train",)
+TARGET_COLUMN = "Loan_Status"
+TOP_K = 8
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Faixas (tercis) usadas como termos textuais para as colunas numéricas
+BUCKETS = ("baixo", "medio", "alto")
+
+# Palavras da pergunta -> termos do índice (<coluna>_<valor>, já normalizados)
+TEXT_ALIASES = {
+    "homem": "gender_m", "homens": "gender_m", "masculino": "gender_m",
+    "mulher": "gender_f", "mulheres": "gender_f", "feminino": "gender_f",
+    "casado": "married_y", "casados": "married_y", "casada": "married_y", "casadas": "married_y",
+    "solteiro": "married_n", "solteiros": "married_n", "solteira": "married_n", "solteiras": "married_n",
+    "graduado": "education_graduate", "graduados": "education_graduate", "graduada": "education_graduate",
+    "graduadas": "education_graduate", "formado": "education_graduate", "formados": "education_graduate",
+    "autonomo": "self_employed_yes", "autonomos": "self_employed_yes", "autonoma": "self_employed_yes",
+    "autonomas": "self_employed_yes", "empreendedor": "self_employed_yes", "empreendedores": "self_employed_yes",
+    "rural": "property_area_rural", "rurais": "property_area_rural",
+    "urbano": "property_area_urban", "urbana": "property_area_urban", "urbanos": "property_area_urban",
+    "urbanas": "property_area_urban", "cidade": "property_area_urban",
+    "semiurbano": "property_area_semiurban", "semiurbana": "property_area_semiurban",
+    "semiurbanos": "property_area_semiurban", "semiurbanas": "property_area_semiurban",
+    "aprovado": "loan_status_y", "aprovados": "loan_status_y", "aprovada": "loan_status_y",
+    "aprovadas": "loan_status_y",
+    "negado": "loan_status_n", "negados": "loan_status_n", "negada": "loan_status_n", "negadas": "loan_status_n",
+    "recusado": "loan_status_n", "recusados": "loan_status_n", "reprovado": "loan_status_n",
+    "reprovados": "loan_status_n",
+}
+# Termo complementar quando a palavra vem precedida de "não"/"sem"
+NEGATIONS = {
+    "married_y": "married_n", "married_n": "married_y",
+    "education_graduate": "education_not_graduate",
+    "self_employed_yes": "self_employed_no",
+    "loan_status_y": "loan_status_n", "loan_status_n": "loan_status_y",
+}
+NEGATION_WORDS = ("nao", "sem")
+# Palavras da pergunta -> colunas numéricas (valor citado ou faixa baixo/médio/alto)
+NUMERIC_ALIASES = {
+    "renda": "ApplicantIncome", "salario": "ApplicantIncome", "rendimento": "ApplicantIncome",
+    "coaplicante": "CoapplicantIncome", "conjuge": "CoapplicantIncome",
+    "valor": "LoanAmount", "montante": "LoanAmount", "quantia": "LoanAmount",
+    "prazo": "Loan_Amount_Term", "historico": "Credit_History",
+}
+BUCKET_WORDS = {
+    "baixa": "baixo", "baixo": "baixo", "baixas": "baixo", "baixos": "baixo", "pequeno": "baixo",
+    "pequena": "baixo", "menor": "baixo",
+    "media": "medio", "medio": "medio", "medias": "medio", "medios": "medio",
+    "alta": "alto", "alto": "alto", "altas": "alto", "altos": "alto", "elevada": "alto",
+    "elevado": "alto", "grande": "alto", "maior": "alto",
+}
+DEPENDENTS_WORDS = ("dependente", "dependentes", "filho", "filhos")
+
+_TOKEN_RE = re.compile(r"[a-z0-9_+]+(?:[.,][0-9]+)*")
+_ARRAYS = ("term_indptr", "term_rows", "term_weights", "numeric_raw", "numeric_z", "codes")
+
+
+def normalize_text(text) -> str:
+    """Minúsculas e sem acentos."""
+    text = unicodedata.normalize("NFKD", str(text).lower())
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def _term(column, value):
+    return re.sub(r"\W+", "_", normalize_text(f"{column}_{value}")).strip("_")
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(normalize_text(text))
+
+
+def _parse_number(token):
+    if re.fullmatch(r"\d{1,3}(\.\d{3})+(,\d+)?", token):
+        token = token.replace(".", "")
+    try:
+        return float(token.replace(",", "."))
+    except ValueError:
+        return None
+
+
+def index_dir(db_path):
+    """Diretório dos índices, ao lado do arquivo do banco."""
+    return db_path + ".retrieval"
+
+
+def index_path(db_path, table_name, version):
+    return os.path.join(index_dir(db_path), f"{table_name}-v{version}")
+
+
+def build_index(df: pd.DataFrame, path, target=TARGET_COLUMN):
+    """
+    Constrói o índice da tabela e grava em `path` (arrays .npy + meta.json).
+
+    Texto: BM25 sobre termos <coluna>_<valor> das categóricas, o valor isolado (quando longo)
+    e a faixa (tercil) de cada numérica, guardado por termo (linhas + pesos) para somar só os termos da pergunta.
+    Numérico: matriz padronizada (z-score, ausentes = média) para vizinhos mais próximos.
+    """
+    n = len(df)
+    numeric_cols = list(df.select_dtypes(include="number").columns)
+    categorical_cols = [c for c in df.columns if c not in numeric_cols]
+
+    vocab = {}
+    sources = {}
+    row_parts, term_parts = [], []
+
+    def add_terms(term_of_code, codes):
+        # term_of_code: termo por código de categoria (None = sem termo)
+        ids = np.array([vocab.setdefault(t, len(vocab)) if t else -1 for t in term_of_code] + [-1])
+        for t in set(ids[ids >= 0].tolist()):
+            sources[t] = sources.get(t, 0) + 1
+        term_ids = ids[codes]
+        keep = term_ids >= 0
+        row_parts.append(np.flatnonzero(keep))
+        term_parts.append(term_ids[keep])
+
+    codes = np.empty((n, len(categorical_cols)), dtype=np.int32)
+    categories = {}
+    for j, col in enumerate(categorical_cols):
+        col_codes, cats = pd.factorize(df[col])
+        codes[:, j] = col_codes
+        categories[col] = [str(c) for c in cats]
+        add_terms([_term(col, c) for c in cats], col_codes)
+        bare = [_term("", c) for c in cats]
+        add_terms([b if len(b) > 3 else None for b in bare], col_codes)
+
+    raw = df[numeric_cols].to_numpy(dtype=np.float32, na_value=np.nan) if numeric_cols else np.empty((n, 0), np.float32)
+    with np.errstate(invalid="ignore"):
+        means = np.nanmean(raw, axis=0) if n else np.zeros(len(numeric_cols))
+        stds = np.nanstd(raw, axis=0) if n else np.ones(len(numeric_cols))
+    means = np.nan_to_num(means)
+    stds = np.where(np.nan_to_num(stds) > 0, np.nan_to_num(stds), 1.0)
+    z = np.nan_to_num((raw - means) / stds).astype(np.float32)
+    edges = {}
+    for j, col in enumerate(numeric_cols):
+        values = raw[:, j]
+        cuts = np.nanquantile(values, [1 / 3, 2 / 3]) if np.isfinite(values).any() else np.array([0.0, 0.0])
+        edges[col] = [float(c) for c in cuts]
+        bucket = np.where(np.isnan(values), len(BUCKETS), np.searchsorted(cuts, values, side="right"))
+        add_terms([_term(col, b) for b in BUCKETS], bucket)
+
+    rows = np.concatenate(row_parts) if row_parts else np.empty(0, dtype=np.int64)
+    terms = np.concatenate(term_parts) if term_parts else np.empty(0, dtype=np.int64)
+    # Agrupa por termo (ordenação estável: as linhas de cada origem continuam crescentes)
+    order = np.argsort(terms.astype(np.int32), kind="stable")
+    terms, rows = terms[order], rows[order]
+    # Termo vindo de mais de uma coluna pode repetir a linha: conta uma vez
+    shared = [t for t, count in sources.items() if count > 1]
+    if shared:
+        keep = np.ones(len(rows), dtype=bool)
+        bounds = np.searchsorted(terms, [shared, np.add(shared, 1)])
+        for start, end in zip(*bounds):
+            block = np.argsort(rows[start:end], kind="stable")
+            sorted_rows = rows[start:end][block]
+            keep[start + block[1:][sorted_rows[1:] == sorted_rows[:-1]]] = False
+        terms, rows = terms[keep], rows[keep]
+    # BM25: tf = 1 por par (linha, termo); normalização pelo tamanho do documento
+    doc_len = np.bincount(rows, minlength=n).astype(np.float64)
+    avgdl = doc_len.mean() if n else 0.0
+    doc_freq = np.bincount(terms, minlength=len(vocab)).astype(np.float64)
+    idf = np.log(1.0 + (n - doc_freq + 0.5) / (doc_freq + 0.5))
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len / max(avgdl, 1e-9))
+    weights = idf[terms] * (BM25_K1 + 1) / (1 + norm[rows])
+
+    arrays = {
+        "term_indptr": np.concatenate([[0], np.cumsum(doc_freq)]).astype(np.int64),
+        "term_rows": rows.astype(np.int32),
+        "term_weights": weights.astype(np.float32),
+        "numeric_raw": raw,
+        "numeric_z": z,
+        "codes": codes,
+    }
+    meta = {
+        "n_rows": n,
+        "columns": list(df.columns),
+        "numeric_columns": numeric_cols,
+        "categorical_columns": categorical_cols,
+        "categories": categories,
+        "vocab": sorted(vocab, key=vocab.get),
+        "means": means.tolist(),
+        "stds": stds.tolist(),
+        "bucket_edges": edges,
+        "target": target if target in categorical_cols else None,
+    }
+
+    tmp_path = path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_path, f"{name}.npy"), array)
+    with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    return path
+
+
+def write_index(df, db_path, table_name, version):
+    """Indexa a versão publicada da tabela e remove os índices de versões anteriores."""
+    os.makedirs(index_dir(db_path), exist_ok=True)
+    path = build_index(df, index_path(db_path, table_name, version))
+    for old in glob.glob(os.path.join(index_dir(db_path), f"{table_name}-v*")):
+        if old != path:
+            shutil.rmtree(old, ignore_errors=True)
+    return path
+
+
+def remove_indexes(db_path):
+    _index_for_version.cache_clear()
+    shutil.rmtree(index_dir(db_path), ignore_errors=True)
+
+
+class RowIndex:
+    """Índice de linhas carregado do disco; os arrays são mapeados em memória (somente leitura)."""
+
+    def __init__(self, meta, arrays):
+        self.meta = meta
+        self.arrays = arrays
+        self.term_ids = {t: i for i, t in enumerate(meta["vocab"])}
+        self.numeric_columns = meta["numeric_columns"]
+        self.categorical_columns = meta["categorical_columns"]
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(os.path.join(path, "meta.json")):
+            return None
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in _ARRAYS}
+        return cls(meta, arrays)
+
+    @property
+    def n_rows(self):
+        return self.meta["n_rows"]
+
+    def parse_query(self, question):
+        """Extrai da pergunta os termos do índice e os valores numéricos citados."""
+        tokens = tokenize(question)
+        terms, numeric = [], {}
+        for i, token in enumerate(tokens):
+            prev = tokens[i - 1] if i else ""
+            following = tokens[i + 1:i + 4]
+            term = TEXT_ALIASES.get(token, token if token in self.term_ids else None)
+            if term and prev in NEGATION_WORDS:
+                term = NEGATIONS.get(term, term)
+            if token in DEPENDENTS_WORDS:
+                count = 0 if prev in NEGATION_WORDS else _parse_number(prev)
+                if count is not None:
+                    term = _term("Dependents", "3+" if count >= 3 else int(count))
+            column = NUMERIC_ALIASES.get(token)
+            if column in self.numeric_columns:
+                for word in following:
+                    value = _parse_number(word)
+                    if value is not None:
+                        numeric[column] = value
+                        break
+                    if word in BUCKET_WORDS:
+                        term = _term(column, BUCKET_WORDS[word])
+                        break
+            if term in self.term_ids and term not in terms:
+                terms.append(term)
+        return terms, numeric
+
+    def _rows_frame(self, rows):
+        codes = np.asarray(self.arrays["codes"][rows])
+        raw = np.asarray(self.arrays["numeric_raw"][rows])
+        data = {}
+        for col in self.meta["columns"]:
+            if col in self.numeric_columns:
+                data[col] = raw[:, self.numeric_columns.index(col)]
+            else:
+                j = self.categorical_columns.index(col)
+                cats = np.array(self.meta["categories"][col] + [None], dtype=object)
+                data[col] = cats[codes[:, j]]
+        return pd.DataFrame(data, index=rows)
+
+    def search(self, question, k=TOP_K, numeric=None):
+        """
+        Linhas mais relevantes para a pergunta e agregados sobre todas as linhas que casam.
+        Linhas que contêm todos os termos casam; com valores numéricos citados, as linhas
+        são ordenadas pela distância padronizada até eles (vizinhos mais próximos),
+        senão pela pontuação BM25.
+        """
+        terms, parsed = self.parse_query(question)
+        numeric = {**parsed, **(numeric or {})}
+        n = self.n_rows
+        indptr, term_rows, term_weights = (self.arrays[a] for a in ("term_indptr", "term_rows", "term_weights"))
+
+        scores = np.zeros(n, dtype=np.float32)
+        hits = np.zeros(n, dtype=np.int16)
+        for term in terms:
+            t = self.term_ids[term]
+            rows = term_rows[indptr[t]:indptr[t + 1]]
+            scores[rows] += term_weights[indptr[t]:indptr[t + 1]]
+            hits[rows] += 1
+        match = hits == len(terms) if terms else np.ones(n, dtype=bool)
+        candidates = np.flatnonzero(match)
+
+        dims = [self.numeric_columns.index(c) for c in numeric if c in self.numeric_columns]
+        if dims and len(candidates):
+            target = (np.array([numeric[self.numeric_columns[d]] for d in dims]) - np.take(self.meta["means"], dims)) \
+                / np.take(self.meta["stds"], dims)
+            z = np.asarray(self.arrays["numeric_z"][candidates][:, dims])
+            rank = ((z - target) ** 2).sum(axis=1)
+        elif terms:
+            rank = -scores[candidates]
+        else:
+            rank = None
+
+        if rank is None:
+            top = np.empty(0, dtype=np.int64)
+        else:
+            k = min(k, len(candidates))
+            part = np.argpartition(rank, k - 1)[:k] if k else np.empty(0, dtype=np.int64)
+            top = candidates[part[np.argsort(rank[part], kind="stable")]]
+
+        return {
+            "terms": terms,
+            "numeric": {c: numeric[c] for c in numeric if c in self.numeric_columns},
+            "n_matches": int(len(candidates)),
+            "n_rows": n,
+            "rows": self._rows_frame(top),
+            "aggregates": self.aggregate(candidates),
+        }
+
+    def aggregate(self, rows):
+        """Médias das numéricas e distribuição do alvo sobre as linhas informadas."""
+        aggregates = {}
+        if len(rows) == 0:
+            return aggregates
+        raw = np.asarray(self.arrays["numeric_raw"]) if len(rows) == self.n_rows else np.asarray(self.arrays["numeric_raw"][rows])
+        with np.errstate(invalid="ignore"):
+            means = np.nanmean(raw, axis=0) if raw.size else []
+        aggregates["mean"] = {c: float(m) for c, m in zip(self.numeric_columns, means) if m == m}
+        target = self.meta["target"]
+        if target:
+            j = self.categorical_columns.index(target)
+            codes = np.asarray(self.arrays["codes"][:, j])[rows]
+            counts = np.bincount(codes[codes >= 0], minlength=len(self.meta["categories"][target]))
+            aggregates[target] = {cat: int(c) for cat, c in zip(self.meta["categories"][target], counts)}
+        return aggregates
+
+
+@functools.lru_cache(maxsize=4)
+def _index_for_version(db_path, table_name, version):
+    return RowIndex.load(index_path(db_path, table_name, version))
+
+
+_INDEX_LOCK = threading.Lock()
+
+
+def load_retrieval_index(table_name: str = "spec_emprestimo_train"):
+    """
+    Índice de busca da versão publicada da tabela (arrays mapeados em memória); None se não houver.
+    O índice depende de estatísticas globais (IDF do BM25, médias do z-score, tercis), então cada
+    nova versão (inclusive após uma carga incremental) é indexada aqui, uma vez, na primeira busca.
+    """
+    version = database.get_table_version(table_name)
+    if version is None:
+        return None
+    path = index_path(database.DB_NAME, table_name, version)
+    if table_name in RETRIEVAL_TABLES and not os.path.exists(path):
+        with _INDEX_LOCK:
+            if not os.path.exists(path):
+                write_index(database.load_data(table_name), database.DB_NAME, table_name, version)
+    return _index_for_version(database.DB_NAME, table_name, version)
+
+
+def render_retrieval_context(result, max_chars=None) -> str:
+    """Texto curto para o prompt: o que foi buscado, agregados das linhas que casam e as linhas mais próximas."""
+    terms = ", ".join(result["terms"]) or "(nenhum)"
+    values = ", ".join(f"{c}≈{v:g}" for c, v in result["numeric"].items()) or "(nenhum)"
+    share = result["n_matches"] / result["n_rows"] if result["n_rows"] else 0.0
+    parts = [f"[Busca] termos: {terms} | valores: {values}",
+             f"[Agregados] {result['n_matches']} linhas ({share:.1%} da base)"]
+    aggregates = result["aggregates"]
+    for col, counts in aggregates.items():
+        if col == "mean":
+            continue
+        total = sum(counts.values()) or 1
+        parts.append(f"{col}: " + ", ".join(f"{v} {c / total:.1%}" for v, c in counts.items()))
+    if aggregates.get("mean"):
+        parts.append("Médias: " + ", ".join(f"{c}={m:.1f}" for c, m in aggregates["mean"].items()))
+    if not result["rows"].empty:
+        parts.append("[Linhas mais relevantes]\n" + result["rows"].to_string())
+    ctx = "\n".join(parts)
+    if max_chars is None:
+        return ctx
+    return ctx[:max_chars] + ("\n... (contexto truncado)" if len(ctx) > max_chars else "")
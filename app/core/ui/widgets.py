@@ -0,0 +1,51 @@
+import os
+
+import streamlit as st
+
+from core.data.io import file_digest, read_csv_smart
+
+# Quantos uploads distintos ficam em cache (LRU, compartilhado entre sessões)
+UPLOAD_CACHE_ENTRIES = 4
+
+
+@st.cache_data(max_entries=UPLOAD_CACHE_ENTRIES)
+def convert_df_to_csv(run_id, _df):
+    # Chave = run_id: evita re-hashear o DataFrame de previsões a cada rerun
+    return _df.to_csv(index=False).encode('utf-8')
+
+
+def upload_digest(file):
+    """Hash do conteúdo do upload (ou do arquivo local), calculado uma única vez por sessão."""
+    memo = st.session_state.setdefault("upload_digests", {})
+    if isinstance(file, str):
+        stat = os.stat(file)
+        key = (file, stat.st_mtime_ns, stat.st_size)
+    else:
+        key = file.file_id
+    if key not in memo:
+        memo[key] = file_digest(file)
+    return memo[key]
+
+
+@st.cache_resource(max_entries=UPLOAD_CACHE_ENTRIES)
+def parse_upload(digest, _file):
+    """
+    CSV já convertido em DataFrame, chaveado pelo hash do conteúdo.
+    cache_resource devolve o mesmo objeto (sem cópia): o DataFrame é somente leitura.
+    """
+    return read_csv_smart(_file)
+
+
+def find_upload(uploaded_files, name):
+    """Primeiro arquivo enviado cujo nome contém `name` (ex.: "train", "test"); None se não houver."""
+    return next((f for f in uploaded_files or [] if name in f.name.lower()), None)
+
+
+def applicant_inputs(scorer, spec):
+    """Campos de um solicitante: numéricas com o valor de imputação do treino, categóricas com as categorias do modelo."""
+    row = {}
+    for col in scorer.num_cols:
+        row[col] = st.number_input(col, value=float(spec.fill_values.get(col, 0.0)))
+    for col, categories in zip(scorer.cat_cols, scorer.cat_index):
+        row[col] = st.selectbox(col, list(categories))
+    return row
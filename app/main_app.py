@@ -1,24 +1,15 @@
 import streamlit as st
 import pandas as pd
 import os
-import pickle
-from sklearn.impute import SimpleImputer
+import time
 
 # --- Importações do Projeto ---
-from core.data.io import read_csv_smart
-from core.data.database import (
-    create_database_and_tables,
-    insert_csv_to_sor,
-    run_etl_sor_to_sot,
-    run_etl_sot_to_spec_train,
-    run_etl_for_test_data,
-    load_data,
-    drop_database
-)
-from core.features.preprocess import make_preprocess_pipeline
-from core.models.train import train_regressor
-from core.models.predict import evaluate_regressor
-from core.explain.coefficients import extract_linear_importances
+from core.features.spec import FeatureSpec
+from core.models.compiled import load_compiled
+from core.models.registry import ModelRegistry
+from core.models.runs import RunCache
+from core.pipeline import reset_database, run_scoring, run_training
+from core.ui.widgets import applicant_inputs, convert_df_to_csv, find_upload, parse_upload, upload_digest
 from core.chatbot.rules import answer_from_metrics
 
 # --- Configurações da Página e Estado ---
@@ -41,12 +32,10 @@ if "importances" not in st.session_state:
 MODEL_DIR = "model"
 if not os.path.exists(MODEL_DIR):
     os.makedirs(MODEL_DIR)
-MODEL_PATH = os.path.join(MODEL_DIR, "regressor_model.pickle")
-
-# --- Funções Auxiliares ---
-@st.cache_data
-def convert_df_to_csv(df):
-    return df.to_csv(index=False).encode('utf-8')
+REGISTRY = ModelRegistry(os.path.join(MODEL_DIR, "registry"))
+# Execuções do pipeline (ETL e treino) por hash do upload + parâmetros
+RUNS = RunCache(os.path.join(MODEL_DIR, "runs"))
+MODEL_NAME = "regressor"
 
 # --- Título e Sidebar ---
 st.title("Pipeline de Previsão de Empréstimo")
@@ -64,81 +53,45 @@ with st.sidebar:
     # --- Treinar Novo Modelo ---
     st.subheader("Treinar Novo Modelo")
     test_size = st.slider("Tamanho do conjunto de teste (validação)", 0.1, 0.4, 0.2, 0.05)
+    incremental = st.checkbox("Carga incremental (anexar delta à base existente)", value=False)
+    out_of_core = st.checkbox("Treino em blocos (SGD, sem carregar a base inteira; com carga incremental, só o delta)", value=False)
+    tune = st.checkbox("Buscar hiperparâmetros (validação cruzada + successive halving)", value=False)
+    sparse = st.checkbox("Pré-processamento esparso (CSR float32 de ponta a ponta)", value=False)
     if st.button("Executar Treino"):
-        df_train = None
-        for file in uploaded_files:
-            if "train" in file.name.lower():
-                df_train = read_csv_smart(file)
-        
-        if df_train is not None:
+        train_file = find_upload(uploaded_files, "train")
+        if train_file is not None:
             with st.spinner("Treinando o modelo..."):
-                create_database_and_tables()
-                insert_csv_to_sor(df_train)
-                run_etl_sor_to_sot()
-                run_etl_sot_to_spec_train()
-                df_spec_train = load_data("spec_emprestimo_train")
-                
-                # --- Target e Features ---
-                target = "Loan_Status"
-                y = df_spec_train[target].map({'Y': 1, 'N': 0})  # Convertendo target
-                X = df_spec_train.drop(columns=[target])
-                
-                # --- Corrigindo colunas especiais ---
-                X['Dependents'] = X['Dependents'].replace('3+', 3).astype(float)
-                X['Credit_History'] = X['Credit_History'].replace({'N': 0, 'Y': 1}).astype(float)
-                
-                # --- Imputação de valores faltantes ---
-                num_cols = ['Dependents', 'ApplicantIncome', 'CoapplicantIncome', 
-                            'LoanAmount', 'Loan_Amount_Term', 'Credit_History']
-                num_imputer = SimpleImputer(strategy='mean')
-                X[num_cols] = num_imputer.fit_transform(X[num_cols])
-                
-                # --- Pipeline e Treino ---
-                pre = make_preprocess_pipeline(X)
-                model, X_test, y_test = train_regressor(X, y, pre, test_size=test_size)
-                
-                with open(MODEL_PATH, "wb") as f:
-                    pickle.dump(model, f)
-                
-                st.session_state.metrics = evaluate_regressor(model, X_test, y_test)
-                st.session_state.importances = extract_linear_importances(model, X.columns, pre)
+                # ETL e treino pulados quando o cache de execuções já tem a saída do estágio
+                fit_run, reused = run_training(
+                    REGISTRY, RUNS, MODEL_NAME, train_file, upload_digest(train_file),
+                    test_size=test_size, incremental=incremental, out_of_core=out_of_core, tune=tune, sparse=sparse,
+                )
+                st.session_state.metrics = fit_run["metrics"]
+                st.session_state.importances = pd.DataFrame(fit_run["importances"])
+                st.session_state.model_version = fit_run["version"]
                 st.session_state.model_trained = True
                 st.session_state.predictions_made = False
+
             st.success("Modelo treinado e salvo com sucesso!")
+            if reused:
+                st.caption(f"Reaproveitado do cache de execuções: {', '.join(reused)}.")
         else:
             st.warning("Arquivo 'Train.csv' não encontrado.")
 
     # --- Usar Modelo Existente ---
     st.subheader("Usar Modelo Existente")
     if st.button("Carregar Modelo e Fazer Previsões"):
-        if not os.path.exists(MODEL_PATH):
+        model_meta = REGISTRY.get(MODEL_NAME, st.session_state.get("model_version"))
+        if model_meta is None:
             st.error("Nenhum modelo treinado foi encontrado! Execute o treinamento primeiro.")
         else:
-            df_test = None
-            for file in uploaded_files:
-                if "test" in file.name.lower():
-                    df_test = read_csv_smart(file)
-            
-            if df_test is not None:
+            test_file = find_upload(uploaded_files, "test")
+            if test_file is not None:
                 with st.spinner("Carregando modelo e fazendo previsões..."):
-                    run_etl_for_test_data(df_test)
-                    df_spec_predict = load_data("spec_emprestimo_predict")
-                    
-                    # --- Corrigindo colunas especiais ---
-                    df_spec_predict['Dependents'] = df_spec_predict['Dependents'].replace('3+', 3).astype(float)
-                    df_spec_predict['Credit_History'] = df_spec_predict['Credit_History'].replace({'N': 0, 'Y': 1}).astype(float)
-                    df_spec_predict[num_cols] = num_imputer.transform(df_spec_predict[num_cols])
-                    
-                    with open(MODEL_PATH, 'rb') as f:
-                        model = pickle.load(f)
-
-                    ids = df_spec_predict[['Loan_ID']]
-                    X_predict = df_spec_predict.drop(columns=['Loan_ID'])
-                    predictions = model.predict(X_predict)
-                    
-                    result_df = ids.copy()
-                    result_df['Loan_Status'] = predictions
+                    df_test = parse_upload(upload_digest(test_file), test_file)
+                    report, result_df = run_scoring(REGISTRY, MODEL_NAME, model_meta["version"], df_test)
                     st.session_state.prediction_df = result_df
+                    st.session_state.scoring_report = report
                     st.session_state.predictions_made = True
                 st.success("Previsões geradas com sucesso!")
             else:
@@ -147,9 +100,9 @@ with st.sidebar:
     # --- Limpeza ---
     st.header("3. Manutenção")
     if st.button("Limpar Tudo"):
-        drop_database()
-        if os.path.exists(MODEL_PATH):
-            os.remove(MODEL_PATH)
+        reset_database()
+        REGISTRY.clear()
+        RUNS.clear()
         st.session_state.clear()
         st.info("Banco de dados, modelo salvo e sessão resetados.")
         st.rerun()
@@ -172,8 +125,11 @@ with tab_predict:
     if not st.session_state.predictions_made:
         st.info("Faça uma previsão para ver os resultados.")
     else:
+        report = st.session_state.scoring_report
+        st.caption(f"Execução {report['run_id'][:8]} · modelo {report['model_version']} · "
+                   f"{report['rows']} linhas em {report['seconds']}s ({report['rows_per_sec']} linhas/s)")
         st.dataframe(st.session_state.prediction_df)
-        csv_data = convert_df_to_csv(st.session_state.prediction_df)
+        csv_data = convert_df_to_csv(report["run_id"], st.session_state.prediction_df)
         st.download_button(
            label="Download CSV",
            data=csv_data,
@@ -181,6 +137,24 @@ with tab_predict:
            mime='text/csv',
         )
 
+    # --- Um solicitante: modelo compilado (arrays NumPy), sem DataFrame nem Pipeline a cada clique ---
+    st.subheader("Simular um Solicitante")
+    model_meta = REGISTRY.get(MODEL_NAME, st.session_state.get("model_version")) if st.session_state.model_trained else None
+    scorer = load_compiled(model_meta) if model_meta is not None else None
+    if scorer is None:
+        st.info("Treine um modelo linear para simular um solicitante.")
+    else:
+        spec = FeatureSpec.from_dict(model_meta["feature_spec"])
+        with st.form("applicant"):
+            applicant = applicant_inputs(scorer, spec)
+            submitted = st.form_submit_button("Pontuar")
+        if submitted:
+            start = time.perf_counter()
+            score = scorer.score(spec.transform_row(applicant))
+            elapsed_us = (time.perf_counter() - start) * 1e6
+            st.metric("Score previsto (Loan_Status)", f"{score:.3f}")
+            st.caption(f"Modelo {model_meta['version']} · pontuado em {elapsed_us:.0f} µs")
+
 with tab_chat:
     st.header("Assistente do Modelo")
     if not st.session_state.model_trained:
@@ -0,0 +1,103 @@
+"""
+Benchmark: pico de memória (RSS máximo do processo) do treino em memória (tabela inteira +
+LinearRegression) vs. treino incremental em blocos (SGD + partial_fit), para tabelas SPEC crescentes.
+Cada treino roda em um subprocesso próprio, então o pico inclui o interpretador e as bibliotecas.
+
+Uso: python benchmarks/bench_incremental.py [linhas ...]
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+import core.data.database as database
+from core.features.preprocess import make_preprocess_pipeline
+from core.features.spec import FeatureSpec
+from core.models.incremental import train_incremental
+from core.models.predict import evaluate_regressor
+from core.models.train import train_regressor
+
+
+def make_chunk(n_rows, rng):
+    income = rng.lognormal(8.3, 0.6, n_rows)
+    amount = rng.lognormal(4.8, 0.5, n_rows)
+    credit = rng.choice([0.0, 1.0, np.nan], n_rows, p=[0.15, 0.8, 0.05])
+    logit = 2.5 * np.nan_to_num(credit, nan=1.0) - 0.6 * np.log(amount / income * 100) - 0.3
+    return pd.DataFrame({
+        "Gender": rng.choice(["M", "F", None], n_rows, p=[0.78, 0.2, 0.02]),
+        "Married": rng.choice(["Y", "N"], n_rows),
+        "Dependents": rng.choice(["0", "1", "2", "3+"], n_rows),
+        "Education": rng.choice(["Graduate", "Not Graduate"], n_rows),
+        "Self_Employed": rng.choice(["Yes", "No"], n_rows, p=[0.15, 0.85]),
+        "ApplicantIncome": income,
+        "CoapplicantIncome": rng.lognormal(7, 1.2, n_rows) * rng.integers(0, 2, n_rows),
+        "LoanAmount": np.where(rng.uniform(size=n_rows) < 0.03, np.nan, amount),
+        "Loan_Amount_Term": rng.choice([120.0, 180.0, 360.0], n_rows),
+        "Credit_History": credit,
+        "Property_Area": rng.choice(["Urban", "Rural", "Semiurban"], n_rows),
+        "Loan_Status": np.where(rng.uniform(size=n_rows) < 1 / (1 + np.exp(-logit)), "Y", "N"),
+    })
+
+
+def fill_table(n_rows, chunksize=100_000, seed=0):
+    rng = np.random.default_rng(seed)
+    database.drop_database()
+    database.create_database_and_tables()
+    with database.db_session() as conn:
+        for start in range(0, n_rows, chunksize):
+            make_chunk(min(chunksize, n_rows - start), rng).to_sql(
+                "spec_emprestimo_train", conn, if_exists="append", index=False)
+
+
+def in_memory():
+    # Fluxo atual dos apps: tabela inteira em um DataFrame + cópias do FeatureSpec/split
+    df = database.load_data("spec_emprestimo_train")
+    y = df["Loan_Status"].map({"Y": 1, "N": 0})
+    X = df.drop(columns=["Loan_Status"])
+    spec = FeatureSpec().fit(X)
+    X = spec.transform(X)
+    model, X_test, y_test = train_regressor(X, y, make_preprocess_pipeline(X))
+    return evaluate_regressor(model, X_test, y_test)["rmse"]
+
+
+def incremental():
+    _, _, report = train_incremental(epochs=3)
+    return report["metrics"]["rmse"]
+
+
+MODES = {"em memória": in_memory, "incremental": incremental}
+
+
+def run_child(mode, db_path):
+    # Executado no subprocesso: treina e informa RMSE, tempo e pico de memória
+    database.DB_NAME = db_path
+    start = time.perf_counter()
+    rmse = MODES[mode]()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{rmse} {time.perf_counter() - start} {peak}")
+
+
+def main():
+    if sys.argv[1:2] == ["--child"]:
+        return run_child(sys.argv[2], sys.argv[3])
+    sizes = [int(n) for n in sys.argv[1:]] or [100_000, 300_000, 900_000]
+    database.DB_NAME = os.path.join(tempfile.mkdtemp(), "bench_incremental.db")
+    print(f"{'linhas':>9} {'modo':<12} {'pico RSS (MiB)':>15} {'tempo (s)':>10} {'RMSE':>7}")
+    for n_rows in sizes:
+        fill_table(n_rows)
+        for mode in MODES:
+            out = subprocess.run([sys.executable, __file__, "--child", mode, database.DB_NAME],
+                                 capture_output=True, text=True, check=True).stdout
+            rmse, seconds, peak = map(float, out.strip().splitlines()[-1].split())
+            print(f"{n_rows:>9} {mode:<12} {peak:>15.1f} {seconds:>10.2f} {rmse:>7.4f}", flush=True)
+    database.drop_database()
+
+
+if __name__ == "__main__":
+    main()
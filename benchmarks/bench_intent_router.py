@@ -0,0 +1,65 @@
+"""
+Benchmark: latência de decisão do roteador de intenções (trie de palavras-chave) e fração das
+perguntas de rotina respondidas sem o LLM.
+
+Uso: python benchmarks/bench_intent_router.py [repetições]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+from core.chatbot.rules import ROUTER, IntentRouter
+
+# (pergunta, intenção esperada; None = deve seguir para o LLM)
+QUESTIONS = [
+    ("Quais as variáveis mais importantes?", "importances"),
+    ("Quais features pesam mais no modelo?", "importances"),
+    ("O que mais influencia a aprovação?", "importances"),
+    ("Me mostra os coeficientes", "importances"),
+    ("Qual o RMSE?", "metrics"),
+    ("Qual a acurácia do modelo?", "metrics"),
+    ("Como está o desempenho?", "metrics"),
+    ("Qual o R2 e o erro médio?", "metrics"),
+    ("Como foi treinado?", "pipeline"),
+    ("Explica o pipeline de pré-processamento", "pipeline"),
+    ("Vocês usam one-hot?", "pipeline"),
+    ("E a LGPD?", "lgpd"),
+    ("Como fica a privacidade dos dados pessoais?", "lgpd"),
+    ("Oi", "greeting"),
+    ("Obrigado!", "greeting"),
+    ("Qual a renda média dos casados?", None),
+    ("Quantos empréstimos foram aprovados em área urbana?", None),
+    ("Quais variáveis existem na base?", None),
+    ("Compare a inadimplência de homens e mulheres", None),
+    ("Por que o cliente LP001002 foi recusado?", None),
+]
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    start = time.perf_counter()
+    router = IntentRouter()
+    build_ms = (time.perf_counter() - start) * 1000
+
+    hits = sum(ROUTER.route(q) == expected for q, expected in QUESTIONS)
+    local = sum(ROUTER.route(q) is not None for q, _ in QUESTIONS)
+    routine = sum(expected is not None for _, expected in QUESTIONS)
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for q, _ in QUESTIONS:
+            router.route(q)
+    per_decision = (time.perf_counter() - start) / (repeats * len(QUESTIONS))
+
+    print(f"trie compilada em {build_ms:.2f} ms")
+    print(f"decisão: {per_decision * 1e6:.1f} µs por pergunta ({repeats * len(QUESTIONS)} decisões)")
+    print(f"acertos: {hits}/{len(QUESTIONS)} · respondidas localmente: {local} (rotina: {routine})")
+    for q, expected in QUESTIONS:
+        got = ROUTER.route(q)
+        flag = "" if got == expected else "  <-- esperado " + str(expected)
+        print(f"  {str(got):<12} {q}{flag}")
+
+
+if __name__ == "__main__":
+    main()
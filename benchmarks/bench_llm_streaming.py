@@ -0,0 +1,78 @@
+"""
+Benchmark: tempo até o primeiro token (TTFT) com streaming vs. resposta bloqueante,
+e duas conversas (modelo + RAG) em sequência vs. concorrentes, contra um servidor simulado local.
+
+Uso: python benchmarks/bench_llm_streaming.py [palavras_por_resposta] [latência_1º_token_s] [latência_por_palavra_s]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+# O servidor simulado é o mesmo dos testes
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests"))
+from core.llm.client import StreamingChatClient
+from fakes import FakeStreamingClient
+
+QUESTIONS = [
+    [{"role": "user", "content": "Quais variáveis mais pesam no modelo?"}],
+    [{"role": "user", "content": "Qual a taxa de aprovação dos casados?"}],
+]
+
+
+def timed_stream(client, messages):
+    start = time.perf_counter()
+    ttft = None
+    for _ in client.stream("fake", messages):
+        if ttft is None:
+            ttft = time.perf_counter() - start
+    return ttft, time.perf_counter() - start
+
+
+def complete_concurrently(client, conversations):
+    """Uma thread por conversa, como sessões do Streamlit pedindo respostas ao mesmo tempo."""
+    with ThreadPoolExecutor(max_workers=len(conversations)) as pool:
+        return list(pool.map(lambda messages: client.complete("fake", messages), conversations))
+
+
+def main():
+    n_words = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    first_latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.4
+    token_latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.01
+    fake = FakeStreamingClient(reply=lambda m: "palavra " * n_words,
+                               first_token_latency=first_latency, token_latency=token_latency)
+    client = StreamingChatClient(fake)
+
+    # Bloqueante: o texto só aparece quando a resposta termina (TTFT = tempo total)
+    start = time.perf_counter()
+    client.complete("fake", QUESTIONS[0])
+    blocking = time.perf_counter() - start
+    ttft, total = timed_stream(client, QUESTIONS[0])
+    print(f"{'modo':<28} {'1º token (s)':>13} {'total (s)':>10}")
+    print(f"{'bloqueante':<28} {blocking:>13.3f} {blocking:>10.3f}")
+    print(f"{'streaming':<28} {ttft:>13.3f} {total:>10.3f}")
+
+    # Chat do modelo + chat RAG
+    start = time.perf_counter()
+    for messages in QUESTIONS:
+        client.complete("fake", messages)
+    sequential = time.perf_counter() - start
+    start = time.perf_counter()
+    complete_concurrently(client, QUESTIONS)
+    concurrent = time.perf_counter() - start
+    print(f"{'2 chats em sequência':<28} {'':>13} {sequential:>10.3f}")
+    print(f"{'2 chats concorrentes':<28} {'':>13} {concurrent:>10.3f}  ({sequential / concurrent:.1f}x)")
+
+    # Rajada acima do limite: as excedentes esperam na fila do semáforo
+    burst = 3 * client.max_concurrent
+    fake.max_in_flight = 0
+    start = time.perf_counter()
+    complete_concurrently(client, [QUESTIONS[i % 2] for i in range(burst)])
+    print(f"{f'{burst} requisições (limite {client.max_concurrent})':<28} {'':>13} "
+          f"{time.perf_counter() - start:>10.3f}  (pico simultâneo: {fake.max_in_flight})")
+    print(client.latency_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark: make_preprocess_pipeline padrão vs. modo esparso (CSR float32, entradas `category`) e
+agrupamento de categorias raras, em 1M de linhas. Mede o tempo de fit_transform, o tamanho da matriz
+transformada (matrix_memory) e o acréscimo de RSS máximo durante a transformação.
+Cada caso roda em um subprocesso próprio.
+
+Uso: python benchmarks/bench_sparse_preprocess.py [linhas] [categorias da coluna de alta cardinalidade]
+"""
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+from core.features.preprocess import make_preprocess_pipeline, matrix_memory
+from bench_incremental import make_chunk
+
+MODES = {
+    "padrão": {},
+    "esparso float32": {"sparse": True},
+    "esparso + raras": {"sparse": True, "min_frequency": 0.001},
+}
+
+
+def make_data(n_rows, n_branches, seed=0):
+    rng = np.random.default_rng(seed)
+    X = make_chunk(n_rows, rng).drop(columns=["Loan_Status"])
+    if n_branches:
+        # Agências com frequência tipo Zipf: poucas grandes, cauda longa de raras
+        p = 1 / np.arange(1, n_branches + 1)
+        X["Branch"] = rng.choice([f"ag{i:05d}" for i in range(n_branches)], n_rows, p=p / p.sum())
+    return X
+
+
+def run_child(mode, n_rows, n_branches):
+    X = make_data(n_rows, n_branches)
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    start = time.perf_counter()
+    Z = make_preprocess_pipeline(X, **MODES[mode]).fit_transform(X)
+    seconds = time.perf_counter() - start
+    extra = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 - base
+    mem = matrix_memory(Z)
+    print(f"{mem['format']} {mem['dtype']} {mem['shape'][1]} {mem['density']} {mem['mib']} {seconds} {extra}")
+
+
+def main():
+    if sys.argv[1:2] == ["--child"]:
+        return run_child(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_branches = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+    print(f"{n_rows} linhas")
+    print(f"{'base':<20} {'modo':<16} {'formato':<8} {'dtype':<8} {'colunas':>8} {'densidade':>10} "
+          f"{'matriz (MiB)':>13} {'tempo (s)':>10} {'+RSS (MiB)':>11}")
+    for label, branches in (("empréstimos", 0), (f"+ {n_branches} agências", n_branches)):
+        for mode in MODES:
+            out = subprocess.run([sys.executable, __file__, "--child", mode, str(n_rows), str(branches)],
+                                 capture_output=True, text=True, check=True).stdout
+            fmt, dtype, n_cols, density, mib, seconds, extra = out.split()
+            print(f"{label:<20} {mode:<16} {fmt:<8} {dtype:<8} {int(n_cols):>8} {float(density):>10.3f} "
+                  f"{float(mib):>13.1f} {float(seconds):>10.2f} {float(extra):>11.1f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
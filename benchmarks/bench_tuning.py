@@ -0,0 +1,77 @@
+"""
+Benchmark: tune_classifier (pré-processamento por fold reaproveitado + successive halving)
+vs. GridSearchCV sobre o Pipeline completo, em relação a um único ajuste.
+
+Uso: python benchmarks/bench_tuning.py [linhas] [n_jobs]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import GridSearchCV
+from sklearn.pipeline import Pipeline
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+from core.features.preprocess import make_preprocess_pipeline
+from core.models.train import CLASSIFIER_GRID, CV_FOLDS, split, train_classifier, tune_classifier
+
+
+def make_data(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    income = rng.lognormal(8.5, 0.6, n_rows)
+    amount = rng.lognormal(4.8, 0.5, n_rows)
+    df = pd.DataFrame({
+        "ApplicantIncome": income,
+        "LoanAmount": amount,
+        "Loan_Amount_Term": rng.choice([120.0, 180.0, 360.0], n_rows),
+        "Credit_History": rng.choice([0.0, 1.0, np.nan], n_rows, p=[0.15, 0.8, 0.05]),
+        "Property_Area": rng.choice(["Urban", "Rural", "Semiurban"], n_rows),
+        "Education": rng.choice(["Graduate", "Not Graduate"], n_rows),
+        "Branch": rng.choice([f"ag{i:03d}" for i in range(200)], n_rows),
+    })
+    logit = 2.5 * df["Credit_History"].fillna(1) - 0.6 * np.log(amount / income * 100) - 0.5
+    y = pd.Series((rng.uniform(size=n_rows) < 1 / (1 + np.exp(-logit))).astype(int))
+    return df, y
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def grid_search(X, y, pre, n_jobs):
+    X_train, _, y_train, _ = split(X, y)
+    model = Pipeline([("pre", pre), ("clf", LogisticRegression(max_iter=1000))])
+    grid = {f"clf__{k}": v for k, v in CLASSIFIER_GRID.items()}
+    search = GridSearchCV(model, grid, cv=CV_FOLDS, scoring="roc_auc", n_jobs=n_jobs).fit(X_train, y_train)
+    return {k.removeprefix("clf__"): v for k, v in search.best_params_.items()}, search.best_score_
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_jobs = int(sys.argv[2]) if len(sys.argv) > 2 else -1
+    X, y = make_data(n_rows)
+    pre = make_preprocess_pipeline(X)
+
+    _, t_single = timed(train_classifier, X, y, pre)
+    (grid_params, grid_score), t_grid = timed(grid_search, X, y, pre, n_jobs)
+    (_, _, _, search), t_tune = timed(tune_classifier, X, y, pre, n_jobs=n_jobs)
+
+    n_grid = len(CLASSIFIER_GRID["C"]) * len(CLASSIFIER_GRID["solver"]) * len(CLASSIFIER_GRID["class_weight"])
+    print(f"{n_rows} linhas, {n_grid} candidatos, {CV_FOLDS} folds, n_jobs={n_jobs}")
+    print(f"{'método':<22} {'tempo (s)':>10} {'x 1 ajuste':>11} {'ajustes':>8} {'AUC (CV)':>9}")
+    print(f"{'ajuste único':<22} {t_single:>10.2f} {1:>10.1f}x {1:>8}")
+    print(f"{'GridSearchCV':<22} {t_grid:>10.2f} {t_grid / t_single:>10.1f}x {n_grid * CV_FOLDS + 1:>8} {grid_score:>9.4f}")
+    print(f"{'tune_classifier':<22} {t_tune:>10.2f} {t_tune / t_single:>10.1f}x {search['n_fits']:>8} {search['best_score']:>9.4f}")
+    print(f"melhor (grid):   {grid_params}")
+    print(f"melhor (halving): {search['best_params']}")
+    for rung in search["rungs"]:
+        print(f"  rodada {rung['rung']}: {rung['candidates']:>2} candidatos x {rung['n_rows']} linhas -> {rung['best_score']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
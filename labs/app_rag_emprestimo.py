@@ -1,9 +1,23 @@
 
+import hashlib
 import os
+import sys
 import numpy as np
 import pandas as pd
 import streamlit as st
-from openai import OpenAI
+from openai import AsyncOpenAI
+
+# Reaproveita os sketches mergeáveis do app (app/core/data/sketch.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+from core.data.sketch import CoMomentSketch, sketch_chunks, to_float_matrix
+from core.data.stats import correlation_matrix, target_correlations
+from core.llm.cache import CompletionCache
+from core.llm.client import StreamingChatClient
+from core.llm.history import DEFAULT_TOKEN_BUDGET, build_prompt
+
+CSV_CHUNKSIZE = 100_000
+# Respostas em cache ao lado do CSV; novas versões do contexto não reaproveitam respostas antigas
+LLM_CACHE = CompletionCache('llm_cache.db')
 
 st.set_page_config(page_title="RAG (Resumo Estatístico) — Empréstimos", page_icon="💰")
 
@@ -22,65 +36,107 @@ def get_client():
     if not k:
         st.error("Defina OPENAI_API_KEY (ambiente) ou .streamlit/secrets.toml com openai_api_key.")
         st.stop()
-    os.environ['OPENAI_API_KEY'] = k
-    return OpenAI()
+    return streaming_client(k)
+
+@st.cache_resource
+def streaming_client(key: str) -> StreamingChatClient:
+    # Compartilhado entre sessões: limite de concorrência e métricas de latência únicos
+    return StreamingChatClient(AsyncOpenAI(api_key=key))
 
-def load_loan_data():
-    df = None
+def load_loan_stats():
+    stats = None
     if os.path.exists('emprestimos.csv'):
         try:
-            df = pd.read_csv('emprestimos.csv')
+            stats = load_stats('emprestimos.csv', os.stat('emprestimos.csv').st_mtime_ns)
         except Exception:
             pass
-    if df is None:
+    if stats is None:
         st.error("Coloque um arquivo 'emprestimos.csv' na pasta (com colunas como valor, juros, renda, inadimplente, etc).")
         st.stop()
-    return df
-
-def numeric_summary(df: pd.DataFrame) -> str:
-    num_cols = df.select_dtypes(include='number').columns
-    if len(num_cols) == 0:
-        return "(Sem colunas numéricas)"
-    desc = df[num_cols].describe().T
-    desc['median'] = df[num_cols].median()
-    cols = ['count','mean','median','std','min','max']
-    return desc[cols].to_string()
-
-def categorical_summary(df: pd.DataFrame) -> str:
-    cat_cols = df.select_dtypes(include=['object','category','bool']).columns
-    if len(cat_cols) == 0:
-        return "(Sem colunas categóricas)"
-    lines = []
-    for c in cat_cols:
-        vc = df[c].value_counts(dropna=False).head(5)
-        lines.append(f"Coluna: {c}\n{vc.to_string()}\n")
-    return "\n".join(lines)
-
-def correlation_with_default(df: pd.DataFrame) -> str:
-    if 'inadimplente' not in df.columns:
-        return "(Coluna 'inadimplente' não encontrada)"
-    try:
-        s = pd.to_numeric(df['inadimplente'], errors='coerce')
-        num_cols = df.select_dtypes(include='number').columns
-        corrs = []
-        for c in num_cols:
-            if c == 'inadimplente':
-                continue
-            corr = s.corr(pd.to_numeric(df[c], errors='coerce'))
-            if pd.notna(corr):
-                corrs.append((c, corr))
-        corrs.sort(key=lambda x: abs(x[1]), reverse=True)
-        lines = [f"{c}: {v:.3f}" for c, v in corrs[:10]]
-        return "\n".join(lines) if lines else "(Não foi possível calcular correlações)"
-    except Exception as e:
-        return f"(Erro ao calcular correlações: {e})"
-
-def build_context(df: pd.DataFrame, max_chars: int = 4000) -> str:
+    return stats
+
+def numeric_summary(sketch) -> pd.DataFrame:
+    if not sketch.numeric_columns:
+        return None
+    m = sketch.moments
+    return pd.DataFrame({
+        'count': m.n,
+        'mean': m.mean,
+        'median': [q.quantile(0.5) for q in sketch.quantiles],
+        'std': m.std,
+        'min': m.min,
+        'max': m.max,
+    }, index=sketch.numeric_columns)
+
+def categorical_summary(sketch) -> dict:
+    summary = {}
+    for c, hitters in zip(sketch.categorical_columns, sketch.heavy_hitters):
+        top = hitters.top(5)
+        summary[c] = pd.Series([n for _, n in top], index=pd.Index([v for v, _ in top], name=c), name='count')
+    return summary
+
+def correlation_with_default(corr: pd.DataFrame) -> str:
+    """Top 10 correlações com 'inadimplente', lidas da matriz completa (feature x feature)."""
+    if 'inadimplente' not in corr.columns:
+        return "(Não foi possível calcular correlações)"
+    lines = [f"{c}: {v:.3f}" for c, v in target_correlations(corr, 'inadimplente').head(10).items()]
+    return "\n".join(lines) if lines else "(Não foi possível calcular correlações)"
+
+def compute_stats(chunks, n_workers: int = 1) -> dict:
+    """
+    Estatísticas da base em uma única passada sobre os blocos (sketches mergeáveis),
+    sem carregar o arquivo inteiro; o contexto é montado a partir delas.
+    """
+    sketch = sketch_chunks(chunks, n_workers=n_workers)
+    return {
+        "shape": (sketch.n_rows, len(sketch.columns or ())),
+        "numeric": numeric_summary(sketch),
+        "categorical": categorical_summary(sketch),
+        "columns": list(sketch.columns or ()),
+        # Pearson sai dos co-momentos acumulados na mesma passada
+        "correlation_matrix": sketch.correlation(),
+    }
+
+@st.cache_data(max_entries=4)
+def load_stats(path: str, mtime_ns: int) -> dict:
+    # Chave = caminho + data de modificação: o CSV só é relido quando muda
+    return compute_stats(pd.read_csv(path, chunksize=CSV_CHUNKSIZE))
+
+@st.cache_data(max_entries=8)
+def load_correlation(path: str, mtime_ns: int, method: str) -> pd.DataFrame:
+    """Matriz de correlação completa, em cache por versão do arquivo e método."""
+    if method == "pearson":
+        stats = load_stats(path, mtime_ns)
+        corr = stats["correlation_matrix"]
+        if 'inadimplente' in stats["columns"] and 'inadimplente' not in corr.columns:
+            # Alvo lido como texto: convertido com pd.to_numeric(errors="coerce"), como no Spearman,
+            # e correlacionado com as numéricas numa segunda passada em blocos
+            columns = list(corr.columns) + ['inadimplente']
+            sketch = CoMomentSketch(len(columns))
+            for chunk in pd.read_csv(path, chunksize=CSV_CHUNKSIZE, usecols=columns):
+                sketch.update(to_float_matrix(chunk, columns))
+            corr = pd.DataFrame(sketch.correlation(), index=columns, columns=columns)
+        return corr
+    # Spearman precisa dos postos globais: lê o arquivo inteiro uma vez
+    df = pd.read_csv(path)
+    columns = list(df.select_dtypes(include='number').columns)
+    if 'inadimplente' in df.columns and 'inadimplente' not in columns:
+        columns.append('inadimplente')
+    return correlation_matrix(df, method=method, columns=columns)
+
+def build_context(stats: dict, max_chars: int = 4000) -> str:
+    """Monta o contexto a partir das estatísticas pré-calculadas (custo proporcional ao número de colunas)."""
     parts = []
-    parts.append(f"Shape: {df.shape[0]} linhas x {df.shape[1]} colunas")
-    parts.append("\n[Resumo numérico]\n" + numeric_summary(df))
-    parts.append("\n[Resumo categórico]\n" + categorical_summary(df))
-    parts.append("\n[Correlação com 'inadimplente']\n" + correlation_with_default(df))
+    parts.append(f"Shape: {stats['shape'][0]} linhas x {stats['shape'][1]} colunas")
+    numeric = stats["numeric"]
+    parts.append("\n[Resumo numérico]\n" + (numeric.to_string() if numeric is not None else "(Sem colunas numéricas)"))
+    categorical = [f"Coluna: {c}\n{vc.to_string()}\n" for c, vc in stats["categorical"].items()]
+    parts.append("\n[Resumo categórico]\n" + ("\n".join(categorical) if categorical else "(Sem colunas categóricas)"))
+    if 'inadimplente' not in stats["columns"]:
+        correlation = "(Coluna 'inadimplente' não encontrada)"
+    else:
+        correlation = correlation_with_default(stats["correlation_matrix"])
+    parts.append("\n[Correlação com 'inadimplente']\n" + correlation)
     ctx = "\n\n".join(parts)
     if len(ctx) > max_chars:
         ctx = ctx[:max_chars] + "\n... (contexto truncado)"
@@ -92,7 +148,9 @@ st.caption("Analisa uma base de empréstimos e gera contexto para perguntas inte
 with st.sidebar:
     st.header("Configurações")
     max_ctx = st.slider("Limite do contexto (caracteres)", 500, 12000, 4000, step=500)
+    token_budget = st.slider("Orçamento do prompt (tokens)", 1000, 16000, DEFAULT_TOKEN_BUDGET, step=500)
     show_ctx = st.checkbox("Mostrar contexto gerado", value=False)
+    corr_method = st.selectbox("Correlação", ["pearson", "spearman"], index=0)
     model = st.selectbox("Modelo", ["gpt-4o-mini","gpt-4o","gpt-4.1-mini"], index=0)
     sys_prompt = st.text_area(
         "System prompt",
@@ -101,9 +159,14 @@ with st.sidebar:
     )
     if st.button("Limpar conversa"):
         st.session_state.messages = []
+        st.session_state.history_memory = {}
 
-df = load_loan_data()
-context_text = build_context(df, max_chars=max_ctx)
+stats = load_loan_stats()
+if corr_method != "pearson":
+    stats = {**stats, "correlation_matrix": load_correlation(
+        'emprestimos.csv', os.stat('emprestimos.csv').st_mtime_ns, corr_method)}
+context_text = build_context(stats, max_chars=max_ctx)
+context_version = hashlib.sha256(context_text.encode('utf-8')).hexdigest()
 
 if show_ctx:
     with st.expander("Ver contexto (resumo da base)"):
@@ -127,18 +190,25 @@ if prompt:
     st.session_state.messages.append({'role':'user','content': prompt})
     with st.chat_message('user'):
         st.markdown(prompt)
-    try:
-        client = get_client()
-        msgs = st.session_state.messages.copy()
-        msgs.insert(1, {'role':'user','content': f"Contexto da base:\n{context_text}"})
-        resp = client.chat.completions.create(
-            model=model,
-            messages=msgs,
-            temperature=0.4,
-        )
-        reply = resp.choices[0].message.content
-    except Exception as e:
-        reply = f"Erro: {e}"
+    client = get_client()
+    # Histórico recente na íntegra + resumo das mensagens antigas, dentro do orçamento de tokens
+    msgs = build_prompt(
+        [st.session_state.messages[0], {'role':'user','content': f"Contexto da base:\n{context_text}"}],
+        st.session_state.messages[1:],
+        st.session_state.setdefault('history_memory', {}),
+        budget=token_budget,
+        model=model,
+    )
     with st.chat_message('assistant'):
-        st.markdown(reply)
+        try:
+            reply = st.write_stream(LLM_CACHE.stream(
+                client, model, msgs,
+                context_version=context_version,
+                question=prompt,
+                near_duplicates=True,
+                temperature=0.4,
+            ))
+        except Exception as e:
+            reply = f"Erro: {e}"
+            st.markdown(reply)
     st.session_state.messages.append({'role':'assistant','content': reply})
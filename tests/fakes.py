@@ -0,0 +1,66 @@
+import asyncio
+import re
+import time
+from types import SimpleNamespace
+
+
+def _echo_reply(messages):
+    question = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+    return f"Resposta simulada para: {question}"
+
+
+class FakeChatClient:
+    """
+    Cliente local com a mesma interface de `OpenAI().chat.completions.create`, sem rede.
+    Simula latência fixa por chamada; `calls` conta as requisições recebidas.
+    """
+
+    def __init__(self, reply=_echo_reply, latency=0.5):
+        self.reply = reply
+        self.latency = latency
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, **params):
+        self.calls += 1
+        time.sleep(self.latency)
+        message = SimpleNamespace(role="assistant", content=self.reply(messages))
+        return SimpleNamespace(model=model, choices=[SimpleNamespace(index=0, message=message)])
+
+
+class FakeStreamingClient:
+    """
+    Servidor de streaming simulado com a interface de `AsyncOpenAI().chat.completions.create(stream=True)`.
+    O primeiro trecho chega após `first_token_latency` e cada palavra seguinte após `token_latency`;
+    `calls` conta as requisições e `max_in_flight` registra o pico de requisições simultâneas.
+    """
+
+    def __init__(self, reply=_echo_reply, first_token_latency=0.3, token_latency=0.02):
+        self.reply = reply
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, model, messages, stream=False, **params):
+        self.calls += 1
+        words = re.findall(r"\S+\s*", self.reply(messages))
+        if not stream:
+            await asyncio.sleep(self.first_token_latency + self.token_latency * len(words))
+            message = SimpleNamespace(role="assistant", content="".join(words))
+            return SimpleNamespace(model=model, choices=[SimpleNamespace(index=0, message=message)])
+        return self._chunks(words)
+
+    async def _chunks(self, words):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.first_token_latency)
+            for i, word in enumerate(words):
+                if i:
+                    await asyncio.sleep(self.token_latency)
+                yield SimpleNamespace(choices=[SimpleNamespace(index=0, delta=SimpleNamespace(content=word))])
+        finally:
+            self.in_flight -= 1
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.features.preprocess import make_preprocess_pipeline
+from core.features.spec import FeatureSpec
+from core.models.compiled import compile_pipeline
+from core.models.train import train_classifier, train_regressor
+
+
+def make_loans(n_rows, seed=0):
+    """Base no formato da SPEC de treino, com ausentes em numéricas e categóricas."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Gender": rng.choice(["Male", "Female", None], n_rows, p=[0.75, 0.2, 0.05]),
+        "Married": rng.choice(["Yes", "No", None], n_rows, p=[0.6, 0.38, 0.02]),
+        "Dependents": rng.choice(["0", "1", "2", "3+", None], n_rows, p=[0.55, 0.17, 0.16, 0.09, 0.03]),
+        "Education": rng.choice(["Graduate", "Not Graduate"], n_rows, p=[0.78, 0.22]),
+        "Self_Employed": rng.choice(["No", "Yes", None], n_rows, p=[0.8, 0.14, 0.06]),
+        "ApplicantIncome": rng.lognormal(8.3, 0.6, n_rows).round(),
+        "CoapplicantIncome": np.where(rng.uniform(size=n_rows) < 0.45, 0.0, rng.lognormal(7.3, 0.7, n_rows).round()),
+        "LoanAmount": np.where(rng.uniform(size=n_rows) < 0.04, np.nan, rng.lognormal(4.8, 0.5, n_rows).round()),
+        "Loan_Amount_Term": rng.choice([360.0, 180.0, 480.0, 300.0, np.nan], n_rows, p=[0.82, 0.07, 0.04, 0.04, 0.03]),
+        "Credit_History": rng.choice([1.0, 0.0, np.nan], n_rows, p=[0.8, 0.15, 0.05]),
+        "Property_Area": rng.choice(["Semiurban", "Urban", "Rural"], n_rows),
+    })
+    approved = (df["Credit_History"].fillna(1) == 1) & (rng.uniform(size=n_rows) < 0.8)
+    y = pd.Series(np.where(approved, 1, 0), name="Loan_Status")
+    return df, y
+
+
+@pytest.fixture(scope="module")
+def loans():
+    X, y = make_loans(600)
+    spec = FeatureSpec().fit(X)
+    return spec, spec.transform(X), y
+
+
+def scoring_rows(spec, X):
+    """Linhas de previsão: ausentes crus (o pré-processamento imputa) e uma categoria nunca vista."""
+    rows = X.head(40).copy()
+    rows.loc[rows.index[:3], "LoanAmount"] = np.nan
+    rows.loc[rows.index[3:6], "Property_Area"] = None
+    rows.loc[rows.index[6:9], "Property_Area"] = "Metropolitana"
+    return rows
+
+
+PIPELINES = {
+    "dense": {},
+    "sparse": {"sparse": True, "dtype": np.float64},
+    "min_frequency": {"min_frequency": 50},
+}
+
+
+@pytest.mark.parametrize("options", PIPELINES.values(), ids=PIPELINES.keys())
+def test_score_batch_matches_regressor_predict(loans, options):
+    spec, X, y = loans
+    model, _, _ = train_regressor(X, y, make_preprocess_pipeline(X, **options))
+    scorer = compile_pipeline(model)
+    rows = scoring_rows(spec, X)
+    np.testing.assert_allclose(scorer.score_batch(rows), model.predict(rows), rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("options", PIPELINES.values(), ids=PIPELINES.keys())
+def test_score_batch_matches_classifier_predict_proba(loans, options):
+    spec, X, y = loans
+    model, _, _ = train_classifier(X, y, make_preprocess_pipeline(X, **options))
+    scorer = compile_pipeline(model)
+    rows = scoring_rows(spec, X)
+    np.testing.assert_allclose(scorer.score_batch(rows), model.predict_proba(rows)[:, 1], rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("train", [train_regressor, train_classifier], ids=["regressor", "classifier"])
+def test_score_matches_score_batch(loans, train):
+    spec, X, y = loans
+    model, _, _ = train(X, y, make_preprocess_pipeline(X))
+    scorer = compile_pipeline(model)
+    rows = scoring_rows(spec, X)
+    single = [scorer.score(row) for row in rows.to_dict("records")]
+    np.testing.assert_allclose(single, scorer.score_batch(rows), rtol=0, atol=1e-12)
+
+
+def test_transform_row_matches_transform(loans):
+    spec, _, _ = loans
+    raw, _ = make_loans(50, seed=1)
+    expected = spec.transform(raw)
+    for record, row in zip(raw.to_dict("records"), expected.to_dict("records")):
+        assert spec.transform_row(record) == pytest.approx(row, nan_ok=True)
+
+
+def test_single_applicant_matches_pipeline(loans):
+    spec, X, y = loans
+    model, _, _ = train_regressor(X, y, make_preprocess_pipeline(X))
+    applicant = {"Gender": "Female", "Married": "No", "Dependents": "3+", "Education": "Graduate",
+                 "Self_Employed": None, "ApplicantIncome": 4200.0, "CoapplicantIncome": 0.0,
+                 "LoanAmount": None, "Loan_Amount_Term": 360.0, "Credit_History": 1.0,
+                 "Property_Area": "Urban"}
+    expected = model.predict(spec.transform(pd.DataFrame([applicant])))[0]
+    assert compile_pipeline(model).score(spec.transform_row(applicant)) == pytest.approx(expected, abs=1e-9)
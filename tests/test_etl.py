@@ -0,0 +1,50 @@
+import os
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import core.data.database as database
+from core.data.io import read_csv_smart
+
+TRAIN_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "notebooks", "train_u6lujuX_CVtuZ9i.csv")
+TABLES = ("sot_emprestimo", "spec_emprestimo_train")
+
+
+def run_full_etl(tmp_path, monkeypatch, mode):
+    monkeypatch.setattr(database, "DB_NAME", str(tmp_path / f"{mode}.db"))
+    database.create_database_and_tables()
+    database.insert_csv_to_sor(read_csv_smart(TRAIN_CSV))
+    database.run_etl_sor_to_sot(mode=mode)
+    database.run_etl_sot_to_spec_train(mode=mode)
+    conn = sqlite3.connect(database.DB_NAME)
+    try:
+        return {
+            "schema": {t: conn.execute("SELECT sql FROM sqlite_master WHERE name = ?", (t,)).fetchone()
+                       for t in TABLES},
+            "rows": {t: pd.read_sql_query(f"SELECT * FROM {t}", conn) for t in TABLES},
+            "watermarks": conn.execute("SELECT * FROM etl_watermark ORDER BY layer").fetchall(),
+            "fill_values": conn.execute("SELECT * FROM etl_fill_values ORDER BY column_name").fetchall(),
+        }
+    finally:
+        conn.close()
+
+
+def test_pandas_mode_matches_sql_mode(tmp_path, monkeypatch):
+    sql = run_full_etl(tmp_path, monkeypatch, "sql")
+    pandas_mode = run_full_etl(tmp_path, monkeypatch, "pandas")
+    # As tabelas tipadas do DDL são mantidas (sem to_sql recriando com tipos inferidos)
+    assert pandas_mode["schema"] == sql["schema"]
+    for table in TABLES:
+        pd.testing.assert_frame_equal(pandas_mode["rows"][table], sql["rows"][table])
+    assert pandas_mode["watermarks"] == sql["watermarks"]
+    assert pandas_mode["fill_values"] == sql["fill_values"]
+
+
+@pytest.mark.parametrize("mode", ["sql", "pandas"])
+def test_incremental_load_after_full_etl(tmp_path, monkeypatch, mode):
+    run_full_etl(tmp_path, monkeypatch, mode)
+    delta = read_csv_smart(TRAIN_CSV).head(5).assign(Loan_ID=lambda d: d["Loan_ID"] + "_novo")
+    database.insert_csv_to_sor(delta, incremental=True)
+    database.run_etl_incremental()
+    assert len(database.load_data("spec_emprestimo_train")) == 614 + 5
@@ -0,0 +1,105 @@
+import pytest
+
+import core.llm.cache as llm_cache
+from core.llm.cache import CompletionCache
+from fakes import FakeChatClient
+
+SYSTEM = {"role": "system", "content": "Você é um analista financeiro."}
+
+
+class Clock:
+    """Relógio controlado pelo teste no lugar de time.time do módulo do cache."""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_cache.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = CompletionCache(str(tmp_path / "llm_cache.db"))
+    yield cache
+    cache.clear()
+
+
+def ask(question, history=()):
+    return [SYSTEM, *history, {"role": "user", "content": question}]
+
+
+def put(cache, question, response, history=()):
+    cache.put("gpt", ask(question, history), response, context_version="v1", question=question)
+
+
+def get_near(cache, question, history=()):
+    return cache.get("gpt", ask(question, history), context_version="v1", question=question, near_duplicates=True)
+
+
+def test_entries_expire_after_ttl(cache, clock):
+    cache.ttl = 60
+    put(cache, "Qual a renda média?", "R$ 5.000")
+    clock.advance(59)
+    assert get_near(cache, "Qual a renda média?") == "R$ 5.000"
+    clock.advance(2)
+    assert get_near(cache, "Qual a renda média?") is None
+
+
+def test_least_recently_used_entry_is_evicted(cache, clock):
+    cache.max_entries = 2
+    put(cache, "pergunta um", "1")
+    clock.advance(1)
+    put(cache, "pergunta dois", "2")
+    clock.advance(1)
+    # Uso recente protege a primeira entrada; a segunda vira a menos usada
+    assert get_near(cache, "pergunta um") == "1"
+    clock.advance(1)
+    put(cache, "pergunta tres", "3")
+    assert get_near(cache, "pergunta um") == "1"
+    assert get_near(cache, "pergunta dois") is None
+    assert get_near(cache, "pergunta tres") == "3"
+
+
+def test_near_duplicate_hits_on_wording_only(cache, clock):
+    put(cache, "Qual a renda média dos casados?", "R$ 6.000")
+    assert get_near(cache, "qual a renda media dos casados") == "R$ 6.000"
+    assert get_near(cache, "Dos casados, qual a renda média?") == "R$ 6.000"
+    assert cache.stats["near"] == 2
+
+
+@pytest.mark.parametrize("question", [
+    "Qual a renda média dos solteiros?",
+    "Qual a renda média dos casados reprovados?",
+    "Qual a renda média dos não casados?",
+], ids=["other-word", "extra-word", "negation"])
+def test_near_duplicate_misses_when_content_words_differ(cache, clock, question):
+    put(cache, "Qual a renda média dos casados?", "R$ 6.000")
+    assert get_near(cache, question) is None
+
+
+def test_near_duplicate_misses_when_history_differs(cache, clock):
+    history = [{"role": "user", "content": "Considere só a zona rural."}, {"role": "assistant", "content": "Ok."}]
+    put(cache, "Qual a renda média dos casados?", "R$ 6.000", history=history)
+    assert get_near(cache, "qual a renda media dos casados", history=history) == "R$ 6.000"
+    assert get_near(cache, "qual a renda media dos casados") is None
+
+
+def test_complete_calls_the_client_once(cache, clock):
+    client = FakeChatClient(latency=0)
+    first = cache.complete(client, "gpt", ask("Quais variáveis pesam mais?"), context_version="v1")
+    second = cache.complete(client, "gpt", ask("Quais variáveis pesam mais?"), context_version="v1")
+    assert first == second == "Resposta simulada para: Quais variáveis pesam mais?"
+    assert client.calls == 1
+    # Outra versão do contexto (novo ETL ou modelo) não reaproveita a resposta
+    cache.complete(client, "gpt", ask("Quais variáveis pesam mais?"), context_version="v2")
+    assert client.calls == 2
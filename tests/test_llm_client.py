@@ -0,0 +1,59 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core.llm.client import StreamingChatClient
+from fakes import FakeStreamingClient
+
+MESSAGES = [{"role": "user", "content": "Quais variáveis pesam mais?"}]
+
+
+def test_stream_yields_the_reply_in_chunks():
+    client = StreamingChatClient(FakeStreamingClient(first_token_latency=0.01, token_latency=0))
+    chunks = list(client.stream("fake", MESSAGES))
+    assert len(chunks) > 1
+    assert "".join(chunks) == "Resposta simulada para: Quais variáveis pesam mais?"
+    assert client.latency_stats()["requests"] == 1
+
+
+def test_concurrent_sessions_respect_the_limit():
+    fake = FakeStreamingClient(first_token_latency=0.05, token_latency=0)
+    client = StreamingChatClient(fake, max_concurrent=2)
+    # Uma thread por sessão do Streamlit, todas no loop de fundo compartilhado
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        replies = list(pool.map(lambda _: client.complete("fake", MESSAGES), range(6)))
+    assert len(set(replies)) == 1
+    assert fake.calls == 6
+    assert fake.max_in_flight == 2
+
+
+def test_first_token_timeout_raises():
+    client = StreamingChatClient(FakeStreamingClient(first_token_latency=1.0), first_token_timeout=0.05)
+    with pytest.raises(TimeoutError, match="primeiro token"):
+        client.complete("fake", MESSAGES)
+
+
+def test_full_response_timeout_raises():
+    fake = FakeStreamingClient(reply=lambda m: "palavra " * 50, first_token_latency=0, token_latency=0.02)
+    client = StreamingChatClient(fake, first_token_timeout=1.0, timeout=0.2)
+    with pytest.raises(TimeoutError, match="resposta completa"):
+        client.complete("fake", MESSAGES)
+    # A vaga do semáforo é devolvida mesmo após o timeout
+    fake.reply = lambda m: "ok"
+    assert client.complete("fake", MESSAGES) == "ok"
+
+
+def test_semaphore_is_per_event_loop():
+    fake = FakeStreamingClient(first_token_latency=0.02, token_latency=0)
+    client = StreamingChatClient(fake, max_concurrent=2)
+
+    async def burst():
+        return await asyncio.gather(*(client.acomplete("fake", MESSAGES) for _ in range(5)))
+
+    # Cada asyncio.run cria um loop novo; um semáforo preso ao loop anterior levantaria RuntimeError
+    for _ in range(2):
+        fake.max_in_flight = 0
+        assert len(asyncio.run(burst())) == 5
+        assert fake.max_in_flight == 2
+    assert client.complete("fake", MESSAGES).startswith("Resposta simulada")
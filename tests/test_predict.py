@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression, LogisticRegression
+from sklearn.metrics import (
+    accuracy_score, average_precision_score, confusion_matrix, f1_score, precision_score, recall_score,
+    roc_auc_score,
+)
+
+from core.models.predict import (
+    evaluate_classifier, evaluate_regressor, evaluate_scores, headline_metrics, threshold_sweep
+)
+
+
+def make_scores(n_rows=400, seed=0, decimals=None):
+    """Alvo 0/1 e scores correlacionados; com `decimals`, scores arredondados (limiares empatados)."""
+    rng = np.random.default_rng(seed)
+    y = (rng.uniform(size=n_rows) < 0.35).astype(int)
+    scores = np.clip(0.3 * y + rng.normal(0.4, 0.2, n_rows), 0, 1)
+    if decimals is not None:
+        scores = scores.round(decimals)
+    return y, scores
+
+
+@pytest.mark.parametrize("decimals", [None, 1], ids=["distinct", "ties"])
+def test_threshold_sweep_matches_sklearn(decimals):
+    y, scores = make_scores(n_rows=150, decimals=decimals)
+    sweep = threshold_sweep(y, scores)
+    assert sweep["threshold"].is_monotonic_decreasing
+    assert len(sweep) == len(np.unique(scores))
+    for row in sweep.itertuples():
+        y_pred = (scores >= row.threshold).astype(int)
+        tn, fp, fn, tp = confusion_matrix(y, y_pred, labels=[0, 1]).ravel()
+        assert (row.tp, row.fp, row.fn, row.tn) == (tp, fp, fn, tn)
+        assert row.precision == pytest.approx(precision_score(y, y_pred, zero_division=1.0))
+        assert row.recall == pytest.approx(recall_score(y, y_pred))
+        assert row.f1 == pytest.approx(f1_score(y, y_pred))
+        assert row.accuracy == pytest.approx(accuracy_score(y, y_pred))
+
+
+@pytest.mark.parametrize("decimals", [None, 1], ids=["distinct", "ties"])
+def test_auc_matches_sklearn(decimals):
+    y, scores = make_scores(decimals=decimals)
+    metrics = evaluate_scores(y, scores, n_boot=0)["metrics"]
+    assert metrics["roc_auc"] == pytest.approx(roc_auc_score(y, scores), abs=1e-12)
+    assert metrics["pr_auc"] == pytest.approx(average_precision_score(y, scores), abs=1e-12)
+
+
+def test_evaluate_classifier_with_string_labels():
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(500, 3))
+    y = np.where(X[:, 0] + 0.5 * rng.normal(size=500) > 0.3, "Y", "N")
+    model = LogisticRegression().fit(X, y)
+
+    metrics, cm = evaluate_classifier(model, X, y, pos_label="Y")
+
+    y_pred = np.where(model.predict_proba(X)[:, list(model.classes_).index("Y")] >= 0.5, "Y", "N")
+    assert cm == confusion_matrix(y, y_pred, labels=["N", "Y"]).tolist()
+    assert metrics["accuracy"] == pytest.approx(accuracy_score(y, y_pred))
+    assert metrics["precision"] == pytest.approx(precision_score(y, y_pred, pos_label="Y"))
+    assert metrics["recall"] == pytest.approx(recall_score(y, y_pred, pos_label="Y"))
+    assert metrics["f1"] == pytest.approx(f1_score(y, y_pred, pos_label="Y"))
+    assert metrics["evaluation"]["roc_auc"] == pytest.approx(
+        roc_auc_score(y == "Y", model.predict_proba(X)[:, 1]), abs=1e-12)
+    # Bootstrap só quando pedido
+    assert "ci" not in metrics["evaluation"]
+
+
+def test_evaluate_regressor_keeps_rmse_at_top_level():
+    y, scores = make_scores()
+    X = scores.reshape(-1, 1)
+    model = LinearRegression().fit(X, y)
+
+    metrics = evaluate_regressor(model, X, y)
+    assert metrics["rmse"] == pytest.approx(np.sqrt(np.mean((y - model.predict(X)) ** 2)))
+    assert headline_metrics(metrics) == {"rmse": metrics["rmse"]}
+    assert "ci" not in metrics["evaluation"]
+
+    with_ci = evaluate_regressor(model, X, y, n_boot=50, n_jobs=1)
+    lo, hi = with_ci["evaluation"]["ci"]["roc_auc"]
+    assert lo <= with_ci["evaluation"]["roc_auc"] <= hi
+
+    # Alvo contínuo: só o RMSE
+    assert set(evaluate_regressor(model, X, scores)) == {"rmse"}